@@ -7,13 +7,14 @@
 
 import os
 import sys
-import json
 import time
 from pathlib import Path
 
 # 添加项目根目录
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
+import file_cache
+import browser_daemon
 
 
 class DouyinAccountManager:
@@ -25,13 +26,7 @@ class DouyinAccountManager:
 
     def get_accounts(self):
         """获取所有账号"""
-        if not os.path.exists(self.accounts_file):
-            return []
-        with open(self.accounts_file, 'r', encoding='utf-8') as f:
-            content = f.read().strip()
-            if not content:
-                return []
-            return json.loads(content)
+        return file_cache.load_json(self.accounts_file, default=[])
 
     def get_active_accounts(self):
         """获取所有活跃账号"""
@@ -159,8 +154,7 @@ class DouyinAccountManager:
 
     def _save_accounts(self, accounts):
         """保存账号列表"""
-        with open(self.accounts_file, 'w', encoding='utf-8') as f:
-            json.dump(accounts, f, ensure_ascii=False, indent=2)
+        file_cache.save_json(self.accounts_file, accounts)
 
 
 def _get_next_account_id(accounts):
@@ -203,7 +197,7 @@ def add_douyin_account():
 
     with sync_playwright() as p:
         print("\n  正在启动浏览器...")
-        browser = p.chromium.launch(headless=False, channel="chrome")
+        browser = browser_daemon.launch_or_connect(p, headless=False, channel="chrome")
         context = browser.new_context(
             viewport={'width': 1280, 'height': 720},
             user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
@@ -348,7 +342,8 @@ def open_douyin_account():
 
     try:
         with sync_playwright() as p:
-            browser = p.chromium.launch(
+            browser = browser_daemon.launch_or_connect(
+                p,
                 headless=False,
                 args=['--start-fullscreen', '--disable-blink-features=AutomationControlled']
             )
@@ -13,6 +13,7 @@ from pathlib import Path
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
+import browser_daemon
 
 
 def check_wechat_state():
@@ -57,7 +58,8 @@ def login_wechat():
 
     try:
         playwright = sync_playwright().start()
-        browser = playwright.chromium.launch(
+        browser = browser_daemon.launch_or_connect(
+            playwright,
             headless=config.WECHAT_HEADLESS,
             channel="chrome"
         )
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+等待方式耗时对比
+在本地模拟的抖音发布页面上走一遍“打开页面 → 选择文件 → 填写标题、简介和话题 → 设置定时 → 发布”：
+  - 旧流程：替换前的发布步骤（固定 sleep、逐字输入）
+  - 新流程：直接调用 publishers/douyin.py 中的 upload_video / fill_title / fill_description /
+            set_schedule / wait_upload_ready / click_publish（UploadTracker、PublishWatcher 等都是实际代码）
+输出每个任务的平均耗时。模拟页面的各个元素按固定延迟出现，不访问任何平台。
+
+用法: python bench_waits.py [--runs 3] [--headed]
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import config
+from publishers import douyin
+
+MOCK_URL = douyin.UPLOAD_URL
+UPLOAD_MS = 1500            # 选择文件到出现“重新上传”的时间
+FORM_MS = 400               # 选择文件到出现发布表单的时间
+PUBLISH_ENABLE_MS = 600     # 表单出现到发布按钮可用的时间
+API_MS = 300                # 发布接口响应时间
+
+TITLE = '测试标题'
+DESCRIPTION = '这是一段用于对比等待方式耗时的测试简介'
+TOPICS = ['测试', '自动发布']
+SCHEDULED_TIME = '2030-01-01 10:00'
+
+# 模拟上传页：元素、类名和文字与 publishers/douyin.py 使用的选择器一致
+MOCK_PAGE = """
+<!doctype html>
+<html><body>
+<input type="file" id="file">
+<div id="form" style="display:none">
+  <input class="semi-input" placeholder="填写作品标题">
+  <div class="editor-kit-container" contenteditable="true"></div>
+  <div class="topic-suggest" style="display:none"></div>
+  <label id="schedule-label">定时发布</label>
+  <input placeholder="日期和时间" style="display:none">
+  <div class="upload-progress"></div>
+  <span id="upload-state"></span>
+  <button class="button-dhlUZE primary-cECiOJ" disabled>发布</button>
+</div>
+<script>
+const $ = (s) => document.querySelector(s);
+$('#file').addEventListener('change', () => {
+  fetch('/upload/chunk', {method: 'POST', body: 'x'.repeat(1024)});
+  let percent = 0;
+  const progress = setInterval(() => {
+    percent = Math.min(percent + 10, 100);
+    $('.upload-progress').textContent = percent + '%';
+    if (percent >= 100) clearInterval(progress);
+  }, __UPLOAD_STEP__);
+  setTimeout(() => { $('#upload-state').textContent = '重新上传'; }, __UPLOAD_MS__);
+  setTimeout(() => {
+    $('#form').style.display = 'block';
+    setTimeout(() => { $('button').disabled = false; }, __PUBLISH_ENABLE_MS__);
+  }, __FORM_MS__);
+});
+const editor = $('.editor-kit-container');
+const suggest = $('.topic-suggest');
+editor.addEventListener('input', () => {
+  if (!/#[^\\s#]+$/.test(editor.textContent) || suggest.dataset.pending) return;
+  suggest.dataset.pending = '1';
+  setTimeout(() => {
+    suggest.style.display = 'block';
+    let n = 0;
+    const timer = setInterval(() => {
+      suggest.textContent = '联想 ' + (++n);
+      if (n >= 4) clearInterval(timer);
+    }, 50);
+  }, 200);
+});
+editor.addEventListener('keydown', (e) => {
+  if (e.key === 'Enter' && suggest.style.display === 'block') {
+    e.preventDefault();
+    suggest.style.display = 'none';
+    delete suggest.dataset.pending;
+    editor.textContent += ' ';
+  }
+});
+$('#schedule-label').addEventListener('click', () => {
+  setTimeout(() => { $('input[placeholder="日期和时间"]').style.display = 'block'; }, 300);
+});
+$('button').addEventListener('click', () => {
+  fetch('/web/api/media/aweme/create', {method: 'POST', body: '{}'});
+});
+</script>
+</body></html>
+"""
+for _name, _value in (('UPLOAD_MS', UPLOAD_MS), ('UPLOAD_STEP', UPLOAD_MS // 10),
+                      ('FORM_MS', FORM_MS), ('PUBLISH_ENABLE_MS', PUBLISH_ENABLE_MS)):
+    MOCK_PAGE = MOCK_PAGE.replace(f'__{_name}__', str(_value))
+
+
+async def _route(route):
+    url = route.request.url
+    if 'aweme/create' in url:
+        await asyncio.sleep(API_MS / 1000)
+        await route.fulfill(status=200, content_type='application/json',
+                            body='{"status_code": 0, "item_id": "1"}')
+    elif '/upload/' in url:
+        await route.fulfill(status=200, content_type='application/json', body='{}')
+    else:
+        await route.fulfill(status=200, content_type='text/html', body=MOCK_PAGE)
+
+
+async def _run_old(page, video_path):
+    """替换前的步骤和固定等待（逐字输入）"""
+    await page.goto(MOCK_URL)
+    await asyncio.sleep(3)
+
+    await page.locator('input[type="file"]').first.set_input_files(video_path)
+    await asyncio.sleep(3)
+
+    title_input = page.locator('.semi-input').first
+    await title_input.click()
+    await title_input.fill(TITLE)
+    await asyncio.sleep(1)
+
+    await page.locator('.editor-kit-container').first.click()
+    await asyncio.sleep(0.5)
+    await page.keyboard.type(DESCRIPTION)
+    await asyncio.sleep(1)
+    for topic in TOPICS:
+        await page.keyboard.type(f'#{topic}')
+        await asyncio.sleep(0.5)
+        await page.keyboard.press('Enter')
+        await asyncio.sleep(0.5)
+
+    await page.locator('label:has-text("定时发布")').first.click()
+    await asyncio.sleep(1)
+    time_input = page.locator(douyin.SCHEDULE_INPUT_SELECTOR).first
+    await time_input.click()
+    await asyncio.sleep(0.5)
+    await page.keyboard.press(douyin.SELECT_ALL_KEY)
+    await asyncio.sleep(0.3)
+    await page.keyboard.type(SCHEDULED_TIME)
+    await asyncio.sleep(0.5)
+    await page.keyboard.press('Enter')
+    await asyncio.sleep(0.5)
+
+    await page.locator(douyin.PUBLISH_BUTTON_SELECTOR).first.click()
+    await asyncio.sleep(2)
+    await asyncio.sleep(3)
+
+
+async def _run_new(page, video_path):
+    """publish_single_task 中的发布步骤（不含上下文池和历史记录）"""
+    await page.goto(MOCK_URL, wait_until='domcontentloaded')
+    tracker = await douyin.upload_video(page, video_path)
+    try:
+        await douyin.fill_title(page, TITLE)
+        await douyin.fill_description(page, DESCRIPTION, TOPICS)
+        await douyin.set_schedule(page, SCHEDULED_TIME)
+        await douyin.wait_upload_ready(tracker, config.DOUYIN_TIMEOUT['upload'])
+        await douyin.click_publish(page)
+    finally:
+        tracker.close()
+
+
+async def run_bench(runs=3, headless=True):
+    """
+    :return: {'old': [每次耗时], 'new': [每次耗时]}
+    """
+    from playwright.async_api import async_playwright
+
+    fd, video_path = tempfile.mkstemp(suffix='.mp4')
+    os.write(fd, b'\x00' * 1024)
+    os.close(fd)
+
+    results = {'old': [], 'new': []}
+    try:
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=headless)
+            try:
+                for name, flow in (('old', _run_old), ('new', _run_new)):
+                    for _ in range(runs):
+                        context = await browser.new_context()
+                        await context.route('**/*', _route)
+                        page = await context.new_page()
+                        started = time.perf_counter()
+                        await flow(page, video_path)
+                        results[name].append(time.perf_counter() - started)
+                        await context.close()
+            finally:
+                await browser.close()
+    finally:
+        os.remove(video_path)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='固定 sleep 与条件等待的耗时对比（本地模拟页面）')
+    parser.add_argument('--runs', type=int, default=3, help='每种流程运行次数（默认 3）')
+    parser.add_argument('--headed', action='store_true', help='显示浏览器窗口')
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run_bench(args.runs, headless=not args.headed))
+    old = sum(results['old']) / len(results['old'])
+    new = sum(results['new']) / len(results['new'])
+    print(f"\n  固定 sleep: 每个任务平均 {old:.2f} 秒")
+    print(f"  条件等待:   每个任务平均 {new:.2f} 秒")
+    print(f"  >> 每个任务节省 {old - new:.2f} 秒 ({(old - new) / old:.0%})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
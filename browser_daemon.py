@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+常驻浏览器服务
+`python main.py browser-daemon` 启动一个长期运行的 Chromium 并开放本机 CDP 端口，
+发布器和账号工具通过 connect_over_cdp 连接复用，省去每次冷启动浏览器；
+服务未运行时各调用方照旧自行启动浏览器
+"""
+
+import os
+import time
+import json
+import urllib.request
+from datetime import datetime
+
+import config
+import file_cache
+
+
+def _probe(endpoint_url, timeout=0.5):
+    """CDP 端口是否可用"""
+    try:
+        with urllib.request.urlopen(endpoint_url + '/json/version', timeout=timeout) as resp:
+            return resp.status == 200
+    except Exception:
+        return False
+
+
+def daemon_info():
+    """
+    正在运行的常驻浏览器信息
+    :return: {'endpoint', 'headless', 'args', ...}，服务未运行返回 None
+    """
+    if not os.path.exists(config.BROWSER_DAEMON_FILE):
+        return None
+    try:
+        with open(config.BROWSER_DAEMON_FILE, 'r', encoding='utf-8') as f:
+            info = json.load(f)
+    except (OSError, ValueError):
+        return None
+    url = info.get('endpoint')
+    if url and _probe(url):
+        return info
+    return None
+
+
+def endpoint():
+    """
+    常驻浏览器的连接地址
+    :return: 'http://127.0.0.1:端口'，服务未运行返回 None
+    """
+    info = daemon_info()
+    return info['endpoint'] if info else None
+
+
+def _compatible_endpoint(launch_kwargs):
+    """
+    能满足本次启动参数的常驻浏览器地址
+    界面模式必须一致，需要的启动参数（args）常驻浏览器必须都带有；channel 不要求一致
+    :return: 连接地址，服务未运行或不满足时返回 None
+    """
+    info = daemon_info()
+    if not info:
+        return None
+    # 旧版本写入的服务信息没有这两项，按启动时的默认值（有界面、无附加参数）处理
+    daemon_headless = info.get('headless', False)
+    wanted_headless = launch_kwargs.get('headless', True)
+    missing = [a for a in launch_kwargs.get('args', []) if a not in info.get('args', [])]
+    if daemon_headless != wanted_headless or missing:
+        reason = "界面模式不同" if daemon_headless != wanted_headless else f"缺少启动参数 {' '.join(missing)}"
+        print(f"  >> 常驻浏览器{reason}，本次启动独立浏览器")
+        return None
+    return info['endpoint']
+
+
+def launch_or_connect(playwright, **launch_kwargs):
+    """
+    连接常驻浏览器，服务未运行或其界面模式、启动参数不满足时按 launch_kwargs 启动新浏览器（sync_api）
+    返回的浏览器调用 close() 时：连接的只断开连接并关闭自己创建的上下文，启动的则关闭浏览器
+    """
+    url = _compatible_endpoint(launch_kwargs)
+    if url:
+        try:
+            browser = playwright.chromium.connect_over_cdp(url)
+            print(f"  >> 已连接常驻浏览器 ({url})")
+            return browser
+        except Exception as e:
+            print(f"  !! 连接常驻浏览器失败，改为启动新浏览器: {e}")
+    return playwright.chromium.launch(**launch_kwargs)
+
+
+async def launch_or_connect_async(playwright, **launch_kwargs):
+    """launch_or_connect 的 async_api 版本"""
+    url = _compatible_endpoint(launch_kwargs)
+    if url:
+        try:
+            browser = await playwright.chromium.connect_over_cdp(url)
+            print(f"  >> 已连接常驻浏览器 ({url})")
+            return browser
+        except Exception as e:
+            print(f"  !! 连接常驻浏览器失败，改为启动新浏览器: {e}")
+    return await playwright.chromium.launch(**launch_kwargs)
+
+
+def headless_context_options(browser, headless):
+    """
+    无界面模式下创建上下文的附加参数
+    无界面 Chromium 的默认 UA 带有 HeadlessChrome，部分站点会拒绝，这里换成普通 Chrome 的 UA
+    """
+    if not headless:
+        return {}
+    return {
+        'user_agent': config.HEADLESS_USER_AGENT.format(version=browser.version),
+        'viewport': {'width': 1280, 'height': 800},
+    }
+
+
+def run_daemon(port=None, headless=False):
+    """
+    启动常驻浏览器并保持运行，Ctrl+C 退出
+    :return: 退出码
+    """
+    from playwright.sync_api import sync_playwright
+
+    port = port or config.BROWSER_DAEMON_PORT
+    url = f'http://127.0.0.1:{port}'
+
+    running = endpoint()
+    if running:
+        print(f"  !! 常驻浏览器已在运行: {running}")
+        return 1
+
+    with sync_playwright() as p:
+        print("  正在启动常驻浏览器...")
+        extra_args = list(config.BROWSER_DAEMON_ARGS)
+        launch_kwargs = {
+            'headless': headless,
+            'args': [f'--remote-debugging-port={port}', '--remote-debugging-address=127.0.0.1']
+                    + extra_args,
+        }
+        if config.BROWSER_DAEMON_CHANNEL:
+            launch_kwargs['channel'] = config.BROWSER_DAEMON_CHANNEL
+        browser = p.chromium.launch(**launch_kwargs)
+
+        try:
+            if not _probe(url, timeout=5):
+                print(f"  !! 调试端口 {port} 不可用")
+                return 1
+
+            file_cache.write_json_atomic(config.BROWSER_DAEMON_FILE, {
+                'endpoint': url,
+                'headless': headless,
+                'args': extra_args,
+                'pid': os.getpid(),
+                'started_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            })
+            print(f"  >> 常驻浏览器已启动: {url}")
+            print("  >> 发布和账号操作会自动连接，按 Ctrl+C 退出")
+
+            while _probe(url, timeout=2):
+                time.sleep(2)
+            print("\n  !! 浏览器已退出")
+        except KeyboardInterrupt:
+            print("\n  正在关闭常驻浏览器...")
+        finally:
+            if os.path.exists(config.BROWSER_DAEMON_FILE):
+                os.remove(config.BROWSER_DAEMON_FILE)
+            try:
+                browser.close()
+            except Exception:
+                pass
+    return 0
@@ -20,9 +20,19 @@ BROWSER_STATE_DIR = os.path.join(DATA_DIR, 'browser_state')
 
 # 核心数据文件
 VIDEOS_FILE = os.path.join(DATA_DIR, 'videos.json')
+VIDEOS_DB_FILE = os.path.join(DATA_DIR, 'videos.db')
+VIDEOS_JOURNAL_FILE = os.path.join(DATA_DIR, 'videos.journal.jsonl')
+VIDEO_ID_COUNTER_FILE = os.path.join(DATA_DIR, 'videos.counter.json')
+# 任务表按平台和日期分区: tasks/<平台>/<YYYY-MM-DD>.json，index.json 记录各日期的完成情况
+TASK_PARTITION_DIRS = {
+    'douyin': os.path.join(TASKS_DIR, 'douyin'),
+    'wechat': os.path.join(TASKS_DIR, 'wechat'),
+}
+# 旧版单文件任务表（只保存一天），首次使用时自动迁移到分区
 DOUYIN_TASKS_FILE = os.path.join(TASKS_DIR, 'douyin_tasks.json')
 WECHAT_TASKS_FILE = os.path.join(TASKS_DIR, 'wechat_tasks.json')
-PUBLISH_HISTORY_FILE = os.path.join(TASKS_DIR, 'publish_history.json')
+PUBLISH_HISTORY_FILE = os.path.join(TASKS_DIR, 'publish_history.jsonl')
+PUBLISH_HISTORY_INDEX_FILE = os.path.join(TASKS_DIR, 'publish_history.index.db')
 
 # 账号相关
 DOUYIN_ACCOUNTS_FILE = os.path.join(BROWSER_STATE_DIR, 'douyin_accounts.json')
@@ -31,13 +41,65 @@ WECHAT_STATE_FILE = os.path.join(BROWSER_STATE_DIR, 'wechat_browser_state.json')
 # 抖音发布配置
 DOUYIN_CONFIG_FILE = os.path.join(CONFIG_DIR, 'douyin_config.json')
 
+# ==================== 视频库配置 ====================
+# 存储后端: 'json' 使用 videos.json；'sqlite' 使用 videos.db（带索引，适合大视频库）
+# 切换到 sqlite 前先执行: python main.py migrate-videos
+VIDEO_STORE_BACKEND = 'json'
+
+# json 后端的变更日志累计到多少条后合并回 videos.json
+VIDEOS_JOURNAL_COMPACT_THRESHOLD = 200
+
+# ==================== 任务状态配置 ====================
+# 任务状态变更先追加到 <任务文件>.log，累计多少条后合并回任务文件
+TASK_LOG_SNAPSHOT_EVERY = 50
+
+# 执行中任务的租约时长和续约间隔（秒）；租约过期的任务下次运行时自动恢复为待发布
+TASK_LEASE_SECONDS = 300
+TASK_HEARTBEAT_INTERVAL = 60
+
 # ==================== 抖音默认配置 ====================
+# videos_per_account 是每个账号每天的上限；account_caps 可按账号ID单独设置上限
+# 可选 start_minute、interval_minutes（设置后代替 interval_hours）实现分钟级的时间间隔
 DOUYIN_DEFAULT_CONFIG = {
     "videos_per_account": 7,
     "start_hour": 8,
-    "interval_hours": 2
+    "interval_hours": 2,
+    "end_time": "23:59",
+    "blackouts": [],
+    "account_caps": {}
 }
 
+# 同时发布的抖音账号数（共用一个浏览器，每个账号使用独立的浏览器上下文）
+DOUYIN_MAX_WORKERS = 3
+
+# 无界面运行（服务器上无需桌面环境）；登录状态失效的账号会跳过，需通过菜单 6 重新扫码
+DOUYIN_HEADLESS = False
+
+# 同一账号复用一个浏览器上下文，发布这么多条后关闭重建（失败时立即重建）
+DOUYIN_CONTEXT_MAX_USES = 10
+
+# 同一账号相邻任务之间的等待秒数
+DOUYIN_TASK_INTERVAL = 5
+
+# 抖音默认超时（毫秒），上传从选择文件开始计时
+# 启用自适应超时后按文件大小和发布历史计算，样本不足时使用这里的值
+DOUYIN_TIMEOUT = {
+    'upload': 600000,
+    'page_load': 30000,
+    'element_wait': 10000,
+}
+
+# 定时时间读回校验不一致时的尝试次数（只重试设置时间这一步）
+DOUYIN_SCHEDULE_ATTEMPTS = 3
+
+# 简介和话题整段插入（False 时逐字模拟按键，速度对比见发布历史中的 text_chars_per_sec）
+DOUYIN_FAST_TEXT_INPUT = True
+
+# 抖音发布接口（根据其响应确认发布结果）、响应中的作品ID字段、发布成功后跳转的页面
+DOUYIN_PUBLISH_API_PATTERN = r'/web/api/media/aweme/(create|post)'
+DOUYIN_PUBLISH_ID_KEYS = ('item_id', 'aweme_id')
+DOUYIN_PUBLISH_SUCCESS_URL = r'/content/manage'
+
 # ==================== 视频号配置 ====================
 # 位置设置
 WECHAT_SHOW_LOCATION = False
@@ -48,18 +110,107 @@ WECHAT_DECLARE_ORIGINAL = True
 
 # 定时发布
 WECHAT_ENABLE_SCHEDULE = True
+WECHAT_SCHEDULE_ATTEMPTS = 2           # 读回校验不一致时的尝试次数
 
-# 浏览器设置
+# 浏览器设置（无界面模式下需要扫码时会临时打开浏览器窗口）
 WECHAT_HEADLESS = False
 WECHAT_STATE_VALID_DAYS = 7
 
 # 视频号目标页面
 WECHAT_TARGET_URL = "https://channels.weixin.qq.com/platform/post/create"
 
-# 视频号每次发布数量
+# 视频号发表接口（根据其响应确认发布结果）、响应中的作品ID字段、发表成功后跳转的页面
+WECHAT_PUBLISH_API_PATTERN = r'/post/post_create'
+WECHAT_PUBLISH_ID_KEYS = ('objectId', 'exportId', 'id')
+WECHAT_PUBLISH_SUCCESS_URL = r'/post/list'
+
+# 视频号每天发布数量
 WECHAT_PUBLISH_COUNT = 8
 WECHAT_START_HOUR = 8
 WECHAT_INTERVAL_HOURS = 2
+WECHAT_START_MINUTE = 0
+WECHAT_INTERVAL_MINUTES = None         # 设置后代替 WECHAT_INTERVAL_HOURS
+WECHAT_END_TIME = "23:59"              # 当天最晚的发布时间，排不下的视频顺延到下一天
+WECHAT_BLACKOUTS = []                  # 不发布的时间段，如 [("12:00", "13:30")]
+
+# ==================== 多日排期配置 ====================
+# python main.py plan 默认排期的天数（从开始日期起，已有任务表的日期跳过）
+PLAN_HORIZON_DAYS = 7
+
+
+# ==================== 常驻浏览器配置 ====================
+# `python main.py browser-daemon` 启动后，发布和账号操作通过 CDP 连接该浏览器
+BROWSER_DAEMON_PORT = 9222
+BROWSER_DAEMON_CHANNEL = None          # 例如 "chrome" 使用本机安装的 Chrome
+# 常驻浏览器的附加启动参数；调用方需要的参数（如账号窗口的 --start-fullscreen）不在其中时，调用方自行启动浏览器
+BROWSER_DAEMON_ARGS = []
+BROWSER_DAEMON_FILE = os.path.join(BROWSER_STATE_DIR, 'browser_daemon.json')
+
+# 无界面模式使用的 UA（{version} 替换为浏览器版本），默认 UA 带有 HeadlessChrome 标识
+HEADLESS_USER_AGENT = ('Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 '
+                       '(KHTML, like Gecko) Chrome/{version} Safari/537.36')
+
+
+# ==================== 精简浏览器配置 ====================
+# 发布用的浏览器上下文拦截与表单无关的资源，并关闭页面动画
+LEAN_BROWSER_ENABLED = True
+LEAN_DISABLE_ANIMATIONS = True
+LEAN_BLOCK_RESOURCE_TYPES = ['image', 'font']
+
+# 各资源类型按扩展名拦截（通过 CDP 按 URL 拦截，无法按资源类型判断）
+# 不拦截视频扩展名，避免误伤上传请求
+LEAN_BLOCK_EXTENSIONS = {
+    'image': ['png', 'jpg', 'jpeg', 'gif', 'webp', 'svg', 'ico', 'avif'],
+    'font': ['woff', 'woff2', 'ttf', 'otf', 'eot'],
+}
+
+# 统计上报、监控等请求（URL 通配符，* 匹配任意字符）
+# 不要加入 mssdk 等安全/签名 SDK 的域名，拦截后发布接口可能校验失败
+LEAN_BLOCK_URL_PATTERNS = [
+    f'*//{sub}*.{host}.com/*'
+    for sub in ('mcs', 'mon')
+    for host in ('snssdk', 'zijieapi', 'bytedance', 'douyin')
+] + [
+    '*slardar*',
+    '*/monitor_browser/*',
+    '*badjs*',
+    '*jsmonitor*',
+    '*google-analytics.com/*',
+    '*//hm.baidu.com/*',
+]
+
+# 被拦截资源的估算大小（字节），用于统计节省的流量
+LEAN_ESTIMATED_BYTES = {
+    'image': 40 * 1024,
+    'media': 512 * 1024,
+    'font': 80 * 1024,
+    'other': 8 * 1024,
+}
+
+
+# ==================== 页面等待配置 ====================
+# 单次等待条件（元素可见、请求结束、DOM 稳定）的超时上限（毫秒）
+WAIT_TIMEOUT_CEILING = 30000
+
+# 点击发布后等待发布接口响应或成功跳转的超时（毫秒）
+PUBLISH_CONFIRM_TIMEOUT = 30000
+
+
+# ==================== 自适应超时配置 ====================
+# 按文件大小和发布历史中的实际耗时（p95 × 余量）计算每个任务的超时
+ADAPTIVE_TIMEOUT_ENABLED = True
+ADAPTIVE_TIMEOUT_WINDOW = 200           # 参与统计的最近记录数
+ADAPTIVE_TIMEOUT_MIN_SAMPLES = 5        # 账号样本不足时改用平台整体样本，仍不足用默认值
+ADAPTIVE_TIMEOUT_PERCENTILE = 95
+ADAPTIVE_TIMEOUT_MARGIN = 1.5
+ADAPTIVE_UPLOAD_MIN_SPEED = 256 * 1024  # 没有历史时假定的最低上传速度（字节/秒）
+
+# 各类超时的上下限（毫秒）
+ADAPTIVE_TIMEOUT_LIMITS = {
+    'upload': (60000, 3600000),
+    'page_load': (10000, 120000),
+    'element_wait': (3000, 30000),
+}
 
 
 # ==================== 初始化目录 ====================
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文件读取缓存
+按 (路径, mtime_ns, 文件大小) 缓存解析结果，文件未变化时不再重复读取；
+通过本模块写入的文件会直接更新缓存
+
+注意：返回的是缓存中的共享对象，修改后需要通过 save_json / update 写回
+"""
+
+import os
+import json
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:   # Windows
+    fcntl = None
+    import msvcrt
+
+
+def file_signature(path):
+    """文件签名 (mtime_ns, size)，文件不存在返回 None"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _read_json(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read().strip()
+        if not content:
+            return None
+        return json.loads(content)
+
+
+def write_json_atomic(path, data):
+    """
+    先写临时文件再替换，写入中途崩溃不会截断原文件
+    临时文件名每次不同，多个进程同时写同一文件不会互相覆盖临时文件
+    """
+    directory, name = os.path.split(os.path.abspath(path))
+    fd, tmp_file = tempfile.mkstemp(prefix=name + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, path)
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+
+
+def _lock_fd(fd):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        return
+    while True:
+        try:
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            continue   # LK_LOCK 重试 10 秒后仍未拿到锁会抛出异常，继续等待
+
+
+def _unlock_fd(fd):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+_file_locks = {}   # path -> [线程锁, 持有层数, 锁文件描述符]
+_file_locks_guard = threading.Lock()
+
+
+@contextmanager
+def file_lock(path):
+    """
+    跨进程排他锁（锁文件 <path>.lock），用于“读取 → 判断 → 写入”需要原子完成的场合
+    同一线程可以重入；同进程的其他线程在进程内等待
+    """
+    with _file_locks_guard:
+        entry = _file_locks.setdefault(path, [threading.RLock(), 0, None])
+    with entry[0]:
+        if entry[1] == 0:
+            fd = os.open(path + '.lock', os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                _lock_fd(fd)
+            except BaseException:
+                os.close(fd)
+                raise
+            entry[2] = fd
+        entry[1] += 1
+        try:
+            yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                fd, entry[2] = entry[2], None
+                try:
+                    _unlock_fd(fd)
+                finally:
+                    os.close(fd)
+
+
+class FileCache:
+    """按文件签名校验的进程内读缓存"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._entries = {}   # key -> (签名, 数据)
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+    @staticmethod
+    def _key(paths):
+        return (paths,) if isinstance(paths, str) else tuple(paths)
+
+    def load(self, paths, loader):
+        """
+        读取缓存，文件变化时调用 loader() 重新加载
+        :param paths: 单个路径，或共同决定数据内容的一组路径
+        :param loader: 无参函数，返回解析后的数据
+        loader 在缓存锁外运行（它可能要等待跨进程文件锁），加载前后签名一致才写入缓存
+        """
+        key = self._key(paths)
+        with self._lock:
+            signature = tuple(file_signature(p) for p in key)
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self.hits += 1
+                self.bytes_saved += sum(s[1] for s in signature if s)
+                return entry[1]
+            self.misses += 1
+
+        data = loader()
+
+        with self._lock:
+            after = tuple(file_signature(p) for p in key)
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == after:
+                # 其他线程已经加载了同一版本，返回同一个共享对象
+                return entry[1]
+            if after == signature:
+                self._entries[key] = (signature, data)
+            return data
+
+    def update(self, paths, data):
+        """本进程写入文件后，用当前签名更新缓存"""
+        key = self._key(paths)
+        with self._lock:
+            signature = tuple(file_signature(p) for p in key)
+            self._entries[key] = (signature, data)
+
+    def invalidate(self, paths):
+        """丢弃缓存"""
+        with self._lock:
+            self._entries.pop(self._key(paths), None)
+
+    def load_json(self, path, default=None):
+        """读取 JSON 文件，文件不存在或为空时返回 default"""
+        data = self.load(path, lambda: _read_json(path))
+        return default if data is None else data
+
+    def save_json(self, path, data):
+        """写入 JSON 文件并更新缓存"""
+        with self._lock:
+            write_json_atomic(path, data)
+            self.update(path, data)
+
+    def stats(self):
+        """命中统计"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'bytes_saved': self.bytes_saved,
+            }
+
+    def summary(self):
+        """一行统计文字"""
+        s = self.stats()
+        return (f"命中 {s['hits']} 次, 未命中 {s['misses']} 次, "
+                f"命中率 {s['hit_rate']:.0%}, 节省读取 {s['bytes_saved'] / 1024:.1f} KB")
+
+
+# 进程内共享实例
+_cache = FileCache()
+
+load = _cache.load
+update = _cache.update
+invalidate = _cache.invalidate
+load_json = _cache.load_json
+save_json = _cache.save_json
+stats = _cache.stats
+summary = _cache.summary
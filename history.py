@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+发布历史模块
+每次发布尝试（成功或失败）追加一行 JSON 到 publish_history.jsonl，
+记录各步骤耗时、文件大小、错误信息和平台作品ID，供超时估算等统计使用。
+历史文件只追加不修改；publish_history.index.db 按账号、平台、日期、视频建索引，
+只保存每条记录在历史文件中的位置，查询时按位置读取原始记录
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+import config
+
+_lock = threading.Lock()
+
+
+class StepTimer:
+    """
+    步骤计时
+    用法:
+        timer = StepTimer()
+        with timer.step('upload'):
+            ...
+        timer.steps  ->  {'upload': 12.3}
+    """
+
+    def __init__(self):
+        self.steps = {}
+        self.started_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self._t0 = time.monotonic()
+
+    def step(self, name):
+        return _Step(self, name)
+
+    def add(self, name, seconds):
+        """直接记录一个步骤耗时"""
+        self.steps[name] = round(self.steps.get(name, 0) + seconds, 3)
+
+    @property
+    def total(self):
+        return round(time.monotonic() - self._t0, 3)
+
+
+class _Step:
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self._t0 = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.timer.add(self.name, time.monotonic() - self._t0)
+        return False
+
+
+def record_attempt(platform, account_id, task_id, video_id, success, timer,
+                   file_size=0, error=None, **extra):
+    """
+    追加一条发布记录
+    :param timer: StepTimer
+    """
+    record = {
+        'platform': platform,
+        'account_id': account_id,
+        'task_id': task_id,
+        'video_id': video_id,
+        'status': 'success' if success else 'failed',
+        'error': error,
+        'file_size': file_size,
+        'steps': timer.steps,
+        'duration': timer.total,
+        'started_at': timer.started_at,
+        'finished_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    record.update(extra)
+
+    os.makedirs(os.path.dirname(config.PUBLISH_HISTORY_FILE), exist_ok=True)
+    line = json.dumps(record, ensure_ascii=False) + '\n'
+    with _lock:
+        with open(config.PUBLISH_HISTORY_FILE, 'a', encoding='utf-8') as f:
+            f.write(line)
+    return record
+
+
+def recent_records(limit=500, platform=None, account_id=None):
+    """
+    读取最近的发布记录（只读文件末尾，不扫描整个历史）
+    :return: 按时间顺序的记录列表，最多 limit 条
+    """
+    path = config.PUBLISH_HISTORY_FILE
+    if not os.path.exists(path):
+        return []
+
+    # 按块从文件末尾向前读，直到凑够 limit 条匹配记录或读到开头
+    records = []
+    block = 256 * 1024
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        remainder = b''
+        while end > 0 and len(records) < limit:
+            start = max(0, end - block)
+            f.seek(start)
+            chunk = f.read(end - start) + remainder
+            lines = chunk.split(b'\n')
+            remainder = lines.pop(0) if start > 0 else b''
+            for raw in reversed(lines):
+                if not raw.strip():
+                    continue
+                try:
+                    r = json.loads(raw.decode('utf-8'))
+                except ValueError:
+                    continue
+                if platform and r.get('platform') != platform:
+                    continue
+                if account_id and r.get('account_id') != account_id:
+                    continue
+                records.append(r)
+                if len(records) >= limit:
+                    break
+            end = start
+
+    records.reverse()
+    return records
+
+
+class HistoryIndex:
+    """
+    历史文件的二级索引（SQLite）
+    索引滞后于历史文件时，查询前从上次位置继续扫描补齐；历史文件变短（被替换）时重建
+    """
+
+    def __init__(self, history_file=None, index_file=None):
+        self.history_file = history_file or config.PUBLISH_HISTORY_FILE
+        self.index_file = index_file or config.PUBLISH_HISTORY_INDEX_FILE
+        self._lock = threading.RLock()
+        os.makedirs(os.path.dirname(self.index_file), exist_ok=True)
+        self._conn = sqlite3.connect(self.index_file, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._init_schema()
+
+    def _init_schema(self):
+        with self._lock, self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS records (
+                    offset INTEGER PRIMARY KEY,
+                    length INTEGER NOT NULL,
+                    platform TEXT,
+                    account_id TEXT,
+                    date TEXT,
+                    video_id TEXT,
+                    task_id TEXT,
+                    status TEXT,
+                    item_id TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_records_account
+                    ON records (account_id, date);
+                CREATE INDEX IF NOT EXISTS idx_records_platform
+                    ON records (platform, date);
+                CREATE INDEX IF NOT EXISTS idx_records_date ON records (date);
+                CREATE INDEX IF NOT EXISTS idx_records_video ON records (video_id);
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                );
+            """)
+
+    def _indexed_upto(self):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'indexed_upto'").fetchone()
+        return row['value'] if row else 0
+
+    def rebuild(self):
+        """清空索引并从头扫描历史文件"""
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM records')
+            self._conn.execute("DELETE FROM meta WHERE key = 'indexed_upto'")
+        return self.sync()
+
+    def sync(self):
+        """
+        把历史文件中尚未索引的记录加入索引（写了一半的末尾行留到下次）
+        :return: 新索引的记录数
+        """
+        if not os.path.exists(self.history_file):
+            return 0
+        with self._lock:
+            size = os.path.getsize(self.history_file)
+            start = self._indexed_upto()
+            if size < start:
+                return self.rebuild()
+            if size == start:
+                return 0
+
+            rows = []
+            offset = start
+            with open(self.history_file, 'rb') as f:
+                f.seek(start)
+                for raw in f:
+                    if not raw.endswith(b'\n'):
+                        break
+                    try:
+                        r = json.loads(raw.decode('utf-8'))
+                    except ValueError:
+                        r = None
+                    if isinstance(r, dict):
+                        rows.append((
+                            offset, len(raw), r.get('platform'),
+                            None if r.get('account_id') is None else str(r['account_id']),
+                            (r.get('started_at') or '')[:10] or None,
+                            r.get('video_id'), r.get('task_id'), r.get('status'),
+                            None if r.get('item_id') is None else str(r['item_id']),
+                        ))
+                    offset += len(raw)
+
+            with self._conn:
+                self._conn.executemany(
+                    'INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('indexed_upto', ?)",
+                    (offset,)
+                )
+            return len(rows)
+
+    def query(self, platform=None, account_id=None, video_id=None, date_from=None,
+              date_to=None, status=None, limit=None):
+        """
+        按条件查询发布记录（按时间顺序）
+        :param date_from / date_to: 'YYYY-MM-DD'，包含两端
+        :param limit: 只取最近的 limit 条
+        :return: 原始记录列表
+        """
+        self.sync()
+
+        where, params = [], []
+        for column, value in (('platform', platform), ('account_id', account_id),
+                              ('video_id', video_id), ('status', status)):
+            if value is not None:
+                where.append(f'{column} = ?')
+                params.append(str(value))
+        if date_from:
+            where.append('date >= ?')
+            params.append(date_from)
+        if date_to:
+            where.append('date <= ?')
+            params.append(date_to)
+
+        sql = 'SELECT offset, length FROM records'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += ' ORDER BY offset DESC'
+        if limit:
+            sql += f' LIMIT {int(limit)}'
+
+        with self._lock:
+            positions = self._conn.execute(sql, params).fetchall()
+
+        records = []
+        if not positions:
+            return records
+        with open(self.history_file, 'rb') as f:
+            for row in reversed(positions):
+                f.seek(row['offset'])
+                records.append(json.loads(f.read(row['length']).decode('utf-8')))
+        return records
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """获取共享的历史索引"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = HistoryIndex()
+        return _index
+
+
+def query(platform=None, account_id=None, video_id=None, date_from=None, date_to=None,
+          status=None, limit=None, days=None):
+    """
+    查询发布记录，参数同 HistoryIndex.query
+    :param days: 最近 N 天（含今天），与 date_from 同时给出时以 date_from 为准
+    """
+    if days and not date_from:
+        date_from = (datetime.now() - timedelta(days=days - 1)).strftime('%Y-%m-%d')
+    return get_index().query(platform=platform, account_id=account_id, video_id=video_id,
+                             date_from=date_from, date_to=date_to, status=status, limit=limit)
@@ -7,34 +7,20 @@
 
 import sys
 import os
-import json
+import argparse
 from datetime import datetime
 
 # 确保项目根目录在路径中
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 import config
+import file_cache
+import task_state
+import task_store
 import videos
 import tasks
 
 
-def load_json(file_path):
-    """加载JSON文件"""
-    if not os.path.exists(file_path):
-        return None
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read().strip()
-        if not content:
-            return None
-        return json.loads(content)
-
-
-def save_json(file_path, data):
-    """保存JSON文件"""
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-
-
 # ==================== 发布功能 ====================
 
 def publish_douyin():
@@ -58,11 +44,15 @@ def publish_douyin():
         print("  !! 不能选择过去的日期")
         return
 
-    # 检查是否已有任务
-    existing = load_json(config.DOUYIN_TASKS_FILE)
-    if existing and existing.get('target_date') == date_str:
+    # 检查该日期是否已有任务
+    existing = task_store.load_partition('douyin', date_str)
+    if existing:
+        choice = input("\n  该日期已有任务，把新添加的视频排入剩余时间? (y/n): ").strip().lower()
+        if choice == 'y':
+            existing = tasks.generate_douyin_tasks(date_str, incremental=True)
+
         t = existing.get('tasks', [])
-        pending = [x for x in t if x['status'] in ['pending', 'failed']]
+        pending = [x for x in t if task_state.is_claimable(x)]
         done = [x for x in t if x['status'] in ['completed']]
 
         print(f"\n  发现已有任务:")
@@ -89,7 +79,7 @@ def publish_douyin():
 
     # 执行发布
     from publishers.douyin import execute_douyin_tasks
-    execute_douyin_tasks()
+    execute_douyin_tasks(_choose_dates('douyin', date_str))
 
 
 def publish_wechat():
@@ -113,11 +103,15 @@ def publish_wechat():
         print("  !! 不能选择过去的日期")
         return
 
-    # 检查是否已有任务
-    existing = load_json(config.WECHAT_TASKS_FILE)
-    if existing and existing.get('target_date') == date_str:
+    # 检查该日期是否已有任务
+    existing = task_store.load_partition('wechat', date_str)
+    if existing:
+        choice = input("\n  该日期已有任务，把新添加的视频排入剩余时间? (y/n): ").strip().lower()
+        if choice == 'y':
+            existing = tasks.generate_wechat_tasks(date_str, incremental=True)
+
         t = existing.get('tasks', [])
-        pending = [x for x in t if x['status'] in ['pending', 'failed']]
+        pending = [x for x in t if task_state.is_claimable(x)]
         done = [x for x in t if x['status'] in ['published', 'completed']]
 
         print(f"\n  发现已有任务:")
@@ -142,23 +136,50 @@ def publish_wechat():
             return
 
     # 执行发布
-    _execute_wechat_publish()
-
-
-def _execute_wechat_publish():
-    """执行视频号发布"""
+    _execute_wechat_publish(_choose_dates('wechat', date_str))
+
+
+def _choose_dates(platform, date_str):
+    """
+    其他日期也有未完成的任务时，询问是否一起执行
+    :return: 要执行的日期列表
+    """
+    others = [d for d in task_store.open_dates(platform) if d != date_str]
+    if not others:
+        return [date_str]
+    print(f"\n  其他日期还有未完成的任务: {', '.join(others)}")
+    choice = input("  一起执行? (y/n): ").strip().lower()
+    if choice == 'y':
+        return sorted(others + [date_str])
+    return [date_str]
+
+
+def _execute_wechat_publish(dates=None):
+    """
+    执行视频号发布
+    :param dates: 要执行的日期列表，默认所有仍有未完成任务的日期
+    """
     from publishers.wechat import WeChatPublisher
 
-    task_data = load_json(config.WECHAT_TASKS_FILE)
-    if not task_data:
+    # 以前日期没有执行的任务标记为过期，不再执行
+    task_store.expire_past('wechat')
+    if dates is None:
+        dates = task_store.open_dates('wechat')
+    state = task_store.PartitionedState('wechat', dates)
+    if not state.dates:
         print("  !! 没有任务数据")
         return
 
-    all_tasks = task_data.get('tasks', [])
-    pending = [t for t in all_tasks if t['status'] in ['pending', 'failed']]
+    # 上次运行中断留下的执行中任务恢复为待发布
+    recovered = state.recover_expired()
+    if recovered:
+        print(f"  >> 恢复中断的任务: {len(recovered)} 个")
+
+    pending = [t for t in state.tasks if t['status'] in task_state.CLAIMABLE_STATUSES]
 
     if not pending:
         print("  没有待发布的任务")
+        state.close()
         return
 
     all_videos = videos.load_videos()
@@ -174,41 +195,46 @@ def _execute_wechat_publish():
 
         if not video_data:
             print(f"\n  [{idx}/{len(pending)}] !! 视频不存在: {video_id}")
-            task['status'] = 'failed'
-            task['error'] = '视频数据不存在'
-            failed_count += 1
+            # 先领取再标记失败，其他进程正在发布或已发布的任务不动
+            if state.claim(task['task_id'], 'publishing') is not None:
+                state.release(task['task_id'], 'failed', error='视频数据不存在')
+                failed_count += 1
             continue
 
         print(f"\n  [{idx}/{len(pending)}] 处理任务")
         print(f"    时间: {task['scheduled_time']}")
         print(f"    标题: {video_data['title']}")
 
-        task['status'] = 'publishing'
-        save_json(config.WECHAT_TASKS_FILE, task_data)
-
-        result = publisher.upload_video(
-            video_path=video_data['video_path'],
-            title=video_data['title'],
-            description=video_data.get('description', ''),
-            topics=video_data.get('topics', []),
-            scheduled_time=task['scheduled_time']
-        )
+        # 领取任务，发布期间后台续约；进程中断时任务保持 publishing，租约过期后自动恢复
+        with state.lease(task['task_id'], 'publishing') as claimed:
+            if claimed is None:
+                print("    >> 任务已被其他进程领取或已完成，跳过")
+                continue
+            result = publisher.upload_video(
+                video_path=video_data['video_path'],
+                title=video_data['title'],
+                description=video_data.get('description', ''),
+                topics=video_data.get('topics', []),
+                scheduled_time=task['scheduled_time'],
+                task_id=task['task_id'],
+                video_id=video_id
+            )
 
         if result['success']:
-            task['status'] = 'published'
-            task['published_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            state.release(task['task_id'], 'published',
+                          published_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                          platform_item_id=result.get('item_id'))
             videos.mark_published(video_id, 'wechat')
             success_count += 1
             print(f"    >> 发布成功")
         else:
-            task['status'] = 'failed'
-            task['error'] = result.get('error_message', '')
+            state.release(task['task_id'], 'failed',
+                          error=result.get('error_message', ''))
             failed_count += 1
             print(f"    !! 发布失败: {result.get('error_message', '')}")
 
-        save_json(config.WECHAT_TASKS_FILE, task_data)
-
     # 清理
+    state.close()
     WeChatPublisher.cleanup()
 
     print(f"\n{'='*60}")
@@ -216,6 +242,7 @@ def _execute_wechat_publish():
     print(f"  成功: {success_count} 条")
     if failed_count > 0:
         print(f"  失败: {failed_count} 条")
+    print(f"  文件缓存: {file_cache.summary()}")
     print(f"{'='*60}")
 
 
@@ -225,20 +252,29 @@ def show_task_status():
     print("  任务状态")
     print(f"{'='*60}")
 
-    for name, filepath in [("抖音", config.DOUYIN_TASKS_FILE), ("视频号", config.WECHAT_TASKS_FILE)]:
-        data = load_json(filepath)
-        if not data:
+    today = datetime.now().strftime('%Y-%m-%d')
+    for name, platform in [("抖音", 'douyin'), ("视频号", 'wechat')]:
+        # 今天及以后的日期，加上以前仍有未完成任务的日期
+        open_dates = set(task_store.open_dates(platform, include_past=True))
+        dates = [d for d in task_store.all_dates(platform) if d >= today or d in open_dates]
+        if not dates:
             print(f"\n  [{name}] 无任务")
             continue
 
-        t = data.get('tasks', [])
-        pending = len([x for x in t if x['status'] == 'pending'])
-        done = len([x for x in t if x['status'] in ['completed', 'published']])
-        failed = len([x for x in t if x['status'] == 'failed'])
-        processing = len([x for x in t if x['status'] in ['processing', 'publishing']])
+        print(f"\n  [{name}]")
+        for date in dates:
+            data = task_store.load_partition(platform, date)
+            t = data.get('tasks', []) if data else []
+            pending = len([x for x in t if x['status'] == 'pending'])
+            done = len([x for x in t if x['status'] in task_state.DONE_STATUSES])
+            failed = len([x for x in t if x['status'] == 'failed'])
+            processing = len([x for x in t if x['status'] in task_state.RUNNING_STATUSES])
+            expired = len([x for x in t if x['status'] == task_state.EXPIRED_STATUS])
 
-        print(f"\n  [{name}] 日期: {data.get('target_date', '未知')}")
-        print(f"    总计: {len(t)} | 完成: {done} | 待发布: {pending} | 失败: {failed} | 进行中: {processing}")
+            line = f"    {date}  总计: {len(t)} | 完成: {done} | 待发布: {pending} | 失败: {failed} | 进行中: {processing}"
+            if expired:
+                line += f" | 过期: {expired}"
+            print(line)
 
 
 # ==================== 主菜单 ====================
@@ -330,5 +366,155 @@ def main():
             input("\n  按回车返回...")
 
 
+# ==================== 命令行 ====================
+
+def cmd_migrate_videos(args):
+    """把 videos.json 导入 SQLite 视频库"""
+    from video_store import migrate_json_to_sqlite
+
+    json_file = args.source or config.VIDEOS_FILE
+    db_file = args.target or config.VIDEOS_DB_FILE
+    if not os.path.exists(json_file):
+        print(f"  !! 文件不存在: {json_file}")
+        return 1
+
+    count = migrate_json_to_sqlite(json_file, db_file)
+    print(f"  >> 已导入 {count} 个视频")
+    print(f"     {json_file} -> {db_file}")
+    if config.VIDEO_STORE_BACKEND != 'sqlite':
+        print("     在 config.py 中设置 VIDEO_STORE_BACKEND = 'sqlite' 后生效")
+    return 0
+
+
+def cmd_import_videos(args):
+    """从目录或清单文件批量导入视频"""
+    source = args.source
+    topics = args.topics.split() if args.topics else []
+    if os.path.isdir(source):
+        items = videos.scan_video_dir(source, args.category or '', topics)
+    elif os.path.isfile(source):
+        items = videos.read_manifest(source)
+        for item in items:
+            if args.category and not item.get('category'):
+                item['category'] = args.category
+            if topics and not item.get('topics'):
+                item['topics'] = topics
+    else:
+        print(f"  !! 路径不存在: {source}")
+        return 1
+
+    print(f"  读取到 {len(items)} 个视频")
+    added, missing = videos.add_videos_bulk(
+        items, skip_missing=args.skip_missing, skip_existing=not args.allow_duplicates
+    )
+
+    print(f"  >> 已导入 {len(added)} 个视频")
+    if added:
+        print(f"     ID: {added[0]['id']} ~ {added[-1]['id']}")
+    skipped = len(items) - len(added) - (len(missing) if args.skip_missing else 0)
+    if skipped > 0:
+        print(f"     跳过已入库: {skipped} 个")
+    if missing:
+        action = "已跳过" if args.skip_missing else "已导入"
+        print(f"  !! 文件不存在 ({action}): {len(missing)} 个")
+        for path in missing[:5]:
+            print(f"     {path}")
+        if len(missing) > 5:
+            print(f"     ... 还有 {len(missing) - 5} 个")
+    return 0
+
+
+def cmd_browser_daemon(args):
+    """启动常驻浏览器"""
+    import browser_daemon
+    return browser_daemon.run_daemon(port=args.port, headless=args.headless)
+
+
+def cmd_history(args):
+    """查询发布历史"""
+    import history
+
+    records = history.query(
+        platform=args.platform, account_id=args.account, video_id=args.video,
+        date_from=getattr(args, 'from'), date_to=args.to, status=args.status,
+        limit=args.limit, days=args.days,
+    )
+    if not records:
+        print("  没有符合条件的发布记录")
+        return 0
+
+    for r in records:
+        mark = '✓' if r.get('status') == 'success' else '✗'
+        item = f" 作品ID {r['item_id']}" if r.get('item_id') else ''
+        error = f" - {r['error']}" if r.get('error') else ''
+        print(f"  {mark} {r.get('started_at', '')}  {r.get('platform', '')}/{r.get('account_id', '')}"
+              f"  {r.get('video_id', '')}  {r.get('duration', 0):.0f}秒{item}{error}")
+    success = sum(1 for r in records if r.get('status') == 'success')
+    print(f"\n  共 {len(records)} 条, 成功 {success} 条, 失败 {len(records) - success} 条")
+    return 0
+
+
+def cmd_plan(args):
+    """一次生成多天的任务"""
+    if args.start:
+        try:
+            datetime.strptime(args.start, '%Y-%m-%d')
+        except ValueError:
+            print("  !! 日期格式错误")
+            return 1
+    platforms = [args.platform] if args.platform else task_store.PLATFORMS
+    tasks.plan_tasks(start_date=args.start, days=args.days, platforms=platforms,
+                     incremental=args.incremental)
+    return 0
+
+
+def run_cli(argv):
+    """非交互命令入口"""
+    parser = argparse.ArgumentParser(prog='main.py', description='视频自动发布系统')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    p = subparsers.add_parser('migrate-videos', help='把 videos.json 导入 SQLite 视频库')
+    p.add_argument('--source', help='源 JSON 文件（默认 data/videos.json）')
+    p.add_argument('--target', help='目标数据库（默认 data/videos.db）')
+    p.set_defaults(func=cmd_migrate_videos)
+
+    p = subparsers.add_parser('import-videos', help='从目录或 CSV/JSONL 清单批量导入视频')
+    p.add_argument('source', help='视频目录，或 .csv / .jsonl 清单文件')
+    p.add_argument('--category', help='默认分类')
+    p.add_argument('--topics', help='默认话题，空格分隔')
+    p.add_argument('--skip-missing', action='store_true', help='跳过文件不存在的视频')
+    p.add_argument('--allow-duplicates', action='store_true', help='允许重复导入同一路径')
+    p.set_defaults(func=cmd_import_videos)
+
+    p = subparsers.add_parser('browser-daemon', help='启动常驻浏览器，供发布和账号操作复用')
+    p.add_argument('--port', type=int, help=f'CDP 端口（默认 {config.BROWSER_DAEMON_PORT}）')
+    p.add_argument('--headless', action='store_true', help='无界面运行（无法扫码登录）')
+    p.set_defaults(func=cmd_browser_daemon)
+
+    p = subparsers.add_parser('history', help='查询发布历史')
+    p.add_argument('--platform', choices=['douyin', 'wechat'], help='平台')
+    p.add_argument('--account', help='账号ID')
+    p.add_argument('--video', help='视频ID')
+    p.add_argument('--status', choices=['success', 'failed'], help='结果')
+    p.add_argument('--days', type=int, help='最近 N 天')
+    p.add_argument('--from', help='开始日期 YYYY-MM-DD')
+    p.add_argument('--to', help='结束日期 YYYY-MM-DD')
+    p.add_argument('--limit', type=int, default=50, help='最多显示条数（默认 50）')
+    p.set_defaults(func=cmd_history)
+
+    p = subparsers.add_parser('plan', help='一次生成多天的发布任务')
+    p.add_argument('--start', help='开始日期 YYYY-MM-DD（默认今天）')
+    p.add_argument('--days', type=int, help=f'天数（默认 {config.PLAN_HORIZON_DAYS}）')
+    p.add_argument('--platform', choices=['douyin', 'wechat'], help='只排一个平台')
+    p.add_argument('--incremental', action='store_true',
+                   help='已有任务表的日期也把新视频追加到剩余时间')
+    p.set_defaults(func=cmd_plan)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(run_cli(sys.argv[1:]))
     main()
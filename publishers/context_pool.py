@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+浏览器上下文池
+每个账号在一次运行中保持一个已登录的上下文和页面，任务之间复用，
+不再每个任务重新加载登录状态、冷启动创作者平台；
+任务失败或使用次数达到上限时关闭并在下次使用时重建。
+新建的上下文会启用资源过滤（见 resource_filter）
+"""
+
+import os
+import sys
+from contextlib import asynccontextmanager
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+from publishers.resource_filter import ResourceBlocker, context_options
+
+
+class _Entry:
+    def __init__(self, context, page, blocker):
+        self.context = context
+        self.page = page
+        self.blocker = blocker
+        self.uses = 0
+
+
+class ContextPool:
+    """
+    按账号复用浏览器上下文
+    用法:
+        pool = ContextPool(browser)
+        async with pool.page(account_id, state_file, saved) as page:
+            ...                       # 抛出异常时该账号的上下文会被回收
+        await pool.close()
+    """
+
+    def __init__(self, browser, max_uses=None, context_kwargs=None):
+        """
+        :param context_kwargs: 创建上下文的附加参数（如无界面模式的 UA）
+        """
+        self.browser = browser
+        self.max_uses = max_uses or config.DOUYIN_CONTEXT_MAX_USES
+        self.context_kwargs = context_kwargs or {}
+        self._entries = {}
+        self.created = 0
+        self.reused = 0
+        self.recycled = 0
+
+    async def _open(self, key, state_file):
+        options = context_options()
+        options.update(self.context_kwargs)
+        context = await self.browser.new_context(storage_state=state_file, **options)
+        blocker = ResourceBlocker()
+        try:
+            page = await context.new_page()
+            await blocker.install(context, page)
+        except Exception:
+            await context.close()
+            raise
+        entry = _Entry(context, page, blocker)
+        self._entries[key] = entry
+        self.created += 1
+        return entry
+
+    async def _discard(self, key):
+        """关闭并移除某个账号的上下文"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        try:
+            await entry.context.close()
+        except Exception:
+            pass  # 浏览器已断开时关闭会失败，忽略
+
+    @asynccontextmanager
+    async def page(self, key, state_file, saved=None):
+        """
+        借出账号的页面
+        :param key: 账号标识
+        :param state_file: 登录状态文件（仅在新建上下文时读取）
+        :param saved: 传入字典时，归还页面后写入本次借用期间的资源拦截统计
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry.page.is_closed():
+            await self._discard(key)
+            entry = None
+        if entry is None:
+            entry = await self._open(key, state_file)
+        else:
+            self.reused += 1
+        entry.uses += 1
+
+        entry.blocker.take()
+        ok = False
+        try:
+            yield entry.page
+            ok = True
+        finally:
+            if saved is not None:
+                saved.update(entry.blocker.take())
+            if not ok or entry.uses >= self.max_uses:
+                await self._discard(key)
+                self.recycled += 1
+
+    async def close(self):
+        """关闭所有上下文"""
+        for key in list(self._entries):
+            await self._discard(key)
+
+    def summary(self):
+        """一行统计文字"""
+        return f"新建 {self.created} 个, 复用 {self.reused} 次, 回收 {self.recycled} 次"
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量读取页面状态
+一次 page.evaluate 解析多个选择器并返回各元素的数量、可见、选中、禁用状态，
+发布流程根据一份快照做判断，代替逐个 count() / is_visible() 的多次往返；
+每个名称匹配到的第一个元素会打上标记，之后可以直接用 locator() 点击
+"""
+
+# 标记属性：快照时写到匹配的第一个元素上
+MARK_ATTR = 'data-pw-snap'
+
+_SNAPSHOT_SCRIPT = """
+([specs, markAttr]) => {
+    const result = {};
+    for (const [name, selector, text] of specs) {
+        document.querySelectorAll(`[${markAttr}="${name}"]`)
+            .forEach(el => el.removeAttribute(markAttr));
+
+        let items = Array.from(document.querySelectorAll(selector));
+        if (text) {
+            items = items.filter(el => (el.innerText || '').includes(text));
+        }
+        const el = items[0];
+        if (!el) {
+            result[name] = {count: 0, visible: false, checked: false,
+                            disabled: false, text: ''};
+            continue;
+        }
+        el.setAttribute(markAttr, name);
+
+        const rect = el.getBoundingClientRect();
+        const style = getComputedStyle(el);
+        const cls = el.className && el.className.baseVal !== undefined
+            ? el.className.baseVal : (el.className || '');
+        const input = el.matches('input') ? el : el.querySelector('input');
+        result[name] = {
+            count: items.length,
+            visible: rect.width > 0 && rect.height > 0
+                     && style.visibility !== 'hidden' && style.display !== 'none',
+            checked: /checked/.test(cls) || !!(input && input.checked),
+            disabled: !!el.disabled || el.getAttribute('aria-disabled') === 'true'
+                      || /disabled/.test(cls),
+            text: (el.innerText || el.value || '').trim().slice(0, 100),
+        };
+    }
+    return result;
+}
+"""
+
+
+def _normalize(specs):
+    rows = []
+    for name, spec in specs.items():
+        if isinstance(spec, (tuple, list)):
+            selector, text = spec
+        else:
+            selector, text = spec, None
+        rows.append([name, selector, text])
+    return rows
+
+
+async def snapshot(page, specs):
+    """
+    读取多个元素的状态（一次往返）
+    :param specs: {名称: CSS 选择器} 或 {名称: (CSS 选择器, 需包含的文字)}
+    :return: {名称: {'count', 'visible', 'checked', 'disabled', 'text'}}
+    """
+    return await page.evaluate(_SNAPSHOT_SCRIPT, [_normalize(specs), MARK_ATTR])
+
+
+def locator(page, name):
+    """最近一次快照中该名称匹配到的元素"""
+    return page.locator(f'[{MARK_ATTR}="{name}"]').first
+
+
+def ready(state):
+    """元素存在、可见且可用"""
+    return state['count'] > 0 and state['visible'] and not state['disabled']
@@ -6,115 +6,310 @@
 """
 
 import os
+import re
 import sys
-import json
 import time
+import asyncio
 import threading
 from pathlib import Path
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
+import file_cache
+import browser_daemon
+import history
+import task_state
+import task_store
+from publishers import waits, timeouts, dom_snapshot
+from publishers.context_pool import ContextPool
+from publishers.resource_filter import format_saved
+from publishers.publish_confirm import PublishWatcher, describe as describe_publish
+from publishers.upload_tracker import UploadTracker, format_stats
 
 # 抖音上传页面
 UPLOAD_URL = 'https://creator.douyin.com/creator-micro/content/upload'
 
+# 上传进度 / 完成 / 失败标识
+UPLOAD_PROGRESS_SELECTOR = '[class*="progress"]'
+UPLOAD_READY_SELECTOR = 'text=重新上传'
+UPLOAD_FAILED_SELECTOR = 'text=上传失败'
+# 视频分片上传请求
+UPLOAD_REQUEST_PATTERN = r'(vod|tos|upload)'
 
-def upload_video(page, video_path):
-    """上传视频文件"""
+# 简介编辑器 / 话题联想弹层
+EDITOR_SELECTOR = '.editor-kit-container'
+TOPIC_SUGGESTION_SELECTOR = '[class*="mention-suggest"], [class*="hashtag-suggest"], [class*="topic-suggest"]'
+
+# 定时发布时间输入框
+SCHEDULE_INPUT_SELECTOR = 'input[placeholder="日期和时间"]'
+
+# 全选快捷键（macOS 用 Meta，Linux / Windows 用 Control）
+SELECT_ALL_KEY = 'Meta+A' if sys.platform == 'darwin' else 'Control+A'
+
+# 发布按钮
+PUBLISH_BUTTON_SELECTOR = 'button.button-dhlUZE.primary-cECiOJ'
+
+
+async def check_session(page):
+    """
+    打开上传页并确认登录状态有效
+    无界面模式下没有人工扫码的机会，发布前先检查，失效时不再逐个任务等待超时
+    :return: 是否已登录
+    """
+    await page.goto(UPLOAD_URL, wait_until='domcontentloaded')
+    try:
+        await page.wait_for_function(
+            """() => !!document.querySelector('input[type="file"]')
+                  || /login|passport/.test(location.href)
+                  || (document.body && document.body.innerText.includes('扫码登录'))""",
+            timeout=waits.timeout_ms()
+        )
+    except Exception:
+        return False
+    return await page.locator('input[type="file"]').count() > 0
+
+
+async def upload_video(page, video_path):
+    """
+    选择视频文件并开始上传（不等待上传完成）
+    :return: UploadTracker，发布前调用 wait_ready() 等待上传完成
+    """
     print("\n    上传视频...")
     file_input = page.locator('input[type="file"]').first
-    if file_input.count() == 0:
+    try:
+        await waits.wait_attached(file_input)
+    except Exception:
         raise Exception("未找到文件上传输入框")
     video_path = str(Path(video_path).absolute())
-    file_input.set_input_files(video_path)
-    print(f"      视频已选择: {Path(video_path).name}")
-    time.sleep(3)
-
 
-def fill_title(page, title):
+    tracker = UploadTracker(
+        page, video_path,
+        ready_selector=UPLOAD_READY_SELECTOR,
+        failed_selector=UPLOAD_FAILED_SELECTOR,
+        progress_selector=UPLOAD_PROGRESS_SELECTOR,
+        request_pattern=UPLOAD_REQUEST_PATTERN,
+    )
+    try:
+        await file_input.set_input_files(video_path)
+        print(f"      视频已选择: {Path(video_path).name}")
+
+        # 选择文件后页面切换到发布表单
+        try:
+            await waits.wait_visible(page.locator('.semi-input').first)
+        except Exception:
+            raise Exception("上传后未出现发布表单")
+    except BaseException:
+        # 调用方拿不到 tracker，在这里移除监听并停止后台监视
+        tracker.close()
+        raise
+    return tracker
+
+
+async def wait_upload_ready(tracker, timeout_ms):
+    """等待上传和平台处理完成"""
+    print("    等待视频上传完成...")
+    stats = await tracker.wait_ready(timeout_ms)
+    print(f"      上传完成: {format_stats(stats)}")
+    return stats
+
+
+async def fill_title(page, title):
     """填写标题"""
     print("    填写标题...")
     title_input = page.locator('.semi-input').first
-    if title_input.count() == 0:
+    try:
+        await waits.wait_visible(title_input)
+    except Exception:
         raise Exception("未找到标题输入框")
-    title_input.click()
-    title_input.fill(title)
+    await title_input.click()
+    await title_input.fill(title)
     print(f"      标题: {title}")
-    time.sleep(1)
 
 
-def fill_description(page, description, topics):
-    """填写简介并添加话题"""
+async def _enter_text(page, text):
+    """
+    向当前焦点输入文字
+    DOUYIN_FAST_TEXT_INPUT 开启时整段插入（一次 insertText），否则逐个按键输入
+    """
+    if config.DOUYIN_FAST_TEXT_INPUT:
+        await page.keyboard.insert_text(text)
+    else:
+        await page.keyboard.type(text)
+
+
+async def _add_topic(page, topic):
+    """
+    输入话题并选中联想结果，使其变成话题标签
+    话题名整段插入，最后一个字用真实按键触发联想弹层
+    """
+    text = f'#{topic}'
+    await _enter_text(page, text[:-1])
+    await page.keyboard.type(text[-1])
+
+    suggestion = page.locator(TOPIC_SUGGESTION_SELECTOR).first
+    try:
+        await waits.wait_visible(suggestion, timeout=3000)
+        await waits.wait_dom_settled(page, TOPIC_SUGGESTION_SELECTOR, quiet_ms=150, timeout=2000)
+    except Exception:
+        # 识别不到弹层时退回到等待整页 DOM 稳定
+        await waits.wait_dom_settled(page, quiet_ms=200, timeout=3000)
+
+    await page.keyboard.press('Enter')
+    try:
+        await waits.wait_hidden(suggestion, timeout=2000)
+    except Exception:
+        await waits.wait_dom_settled(page, EDITOR_SELECTOR, quiet_ms=150, timeout=2000)
+
+
+async def fill_description(page, description, topics):
+    """
+    填写简介并添加话题
+    :return: {'chars', 'seconds', 'chars_per_sec'}，话题输入也计入
+    """
     print("    填写简介...")
-    editor = page.locator('.editor-kit-container').first
-    if editor.count() == 0:
+    editor = page.locator(EDITOR_SELECTOR).first
+    try:
+        await waits.wait_visible(editor)
+    except Exception:
         raise Exception("未找到简介编辑器")
 
-    editor.click()
-    time.sleep(0.5)
-    page.keyboard.type(description)
-    time.sleep(1)
+    await editor.click()
+    started = time.monotonic()
+    await _enter_text(page, description)
 
+    chars = len(description)
     if topics:
         print("    添加话题...")
         for topic in topics:
-            page.keyboard.type(f'#{topic}')
-            time.sleep(0.5)
-            page.keyboard.press('Enter')
+            await _add_topic(page, topic)
+            chars += len(topic) + 1
             print(f"      话题: #{topic}")
-            time.sleep(0.5)
+
+    seconds = max(time.monotonic() - started, 1e-6)
+    stats = {'chars': chars, 'seconds': round(seconds, 2),
+             'chars_per_sec': round(chars / seconds, 1)}
+    mode = "整段插入" if config.DOUYIN_FAST_TEXT_INPUT else "逐字输入"
+    print(f"      输入 {chars} 字, 用时 {seconds:.1f} 秒, {stats['chars_per_sec']} 字/秒 ({mode})")
+    return stats
+
+
+def _normalize_schedule(text):
+    """把输入框显示的时间统一成 'YYYY-MM-DD HH:MM'，无法识别时原样返回"""
+    match = re.search(r'(\d{4})\D+(\d{1,2})\D+(\d{1,2})\D+(\d{1,2}):(\d{2})', text or '')
+    if not match:
+        return (text or '').strip()
+    y, m, d, hh, mm = (int(x) for x in match.groups())
+    return f"{y:04d}-{m:02d}-{d:02d} {hh:02d}:{mm:02d}"
 
 
-def set_schedule(page, scheduled_time):
-    """设置定时发布"""
+async def _enter_schedule(page, time_input, scheduled_time, attempt):
+    """
+    清空并输入定时时间
+    第一次用 fill 直接替换输入框内容，重试时改用全选 + 删除 + 逐字输入
+    """
+    await time_input.click()
+    if attempt == 1:
+        await time_input.fill(scheduled_time)
+    else:
+        await page.keyboard.press(SELECT_ALL_KEY)
+        await page.keyboard.press('Backspace')
+        await page.keyboard.type(scheduled_time)
+    await page.keyboard.press('Enter')
+    await waits.wait_dom_settled(page, quiet_ms=200, timeout=3000)
+
+
+async def set_schedule(page, scheduled_time):
+    """
+    设置定时发布，并读回输入框确认平台接受的时间
+    读回不一致时只重试这一步，仍不一致抛出异常
+    :param scheduled_time: 'YYYY-MM-DD HH:MM'
+    """
     print(f"    设置定时发布: {scheduled_time}")
 
     schedule_label = page.locator('label:has-text("定时发布")').first
-    if schedule_label.count() == 0:
+    try:
+        await waits.wait_visible(schedule_label)
+    except Exception:
         raise Exception("未找到定时发布选项")
 
-    schedule_label.click()
-    time.sleep(1)
+    await schedule_label.click()
 
-    time_input = page.locator('input[placeholder="日期和时间"]').first
-    if time_input.count() == 0:
+    time_input = page.locator(SCHEDULE_INPUT_SELECTOR).first
+    try:
+        await waits.wait_visible(time_input)
+    except Exception:
         raise Exception("未找到时间输入框")
 
-    time_input.click()
-    time.sleep(0.5)
-    page.keyboard.press('Meta+A')
-    time.sleep(0.3)
-    page.keyboard.type(scheduled_time)
-    time.sleep(0.5)
-    page.keyboard.press('Enter')
-    time.sleep(0.5)
+    shown = None
+    for attempt in range(1, config.DOUYIN_SCHEDULE_ATTEMPTS + 1):
+        await _enter_schedule(page, time_input, scheduled_time, attempt)
+        shown = _normalize_schedule(await time_input.input_value())
+        if shown == scheduled_time:
+            print(f"      >> 定时时间: {shown}")
+            return
+        print(f"      !! 定时时间校验不一致 (第{attempt}次): 页面 {shown}，目标 {scheduled_time}")
+    raise Exception(f"定时时间校验失败: 页面 {shown}，目标 {scheduled_time}")
 
 
-def click_publish(page):
-    """点击发布按钮"""
+async def click_publish(page):
+    """
+    点击发布按钮，并以发布接口响应或成功跳转确认结果
+    :return: {'confirmed_by', 'item_id', 'elapsed'}
+    """
     print("    点击发布...")
-    publish_btn = page.locator('button.button-dhlUZE.primary-cECiOJ').first
-    if publish_btn.count() == 0:
-        publish_btn = page.locator('button:has-text("发布")').first
-    if publish_btn.count() == 0:
-        raise Exception("未找到发布按钮")
-
-    publish_btn.click()
-    time.sleep(2)
-    print("      等待发布处理...")
-    time.sleep(3)
-    print("      >> 发布成功")
+    state = await dom_snapshot.snapshot(page, {
+        'primary': PUBLISH_BUTTON_SELECTOR,
+        'fallback': ('button', '发布'),
+    })
+    name = 'primary' if state['primary']['count'] > 0 else 'fallback'
+    if dom_snapshot.ready(state[name]):
+        publish_btn = dom_snapshot.locator(page, name)
+    else:
+        # 按钮还没出现或不可用时再等待
+        if name == 'primary':
+            publish_btn = page.locator(PUBLISH_BUTTON_SELECTOR).first
+        else:
+            publish_btn = page.locator('button:has-text("发布")').first
+        try:
+            await waits.wait_enabled(publish_btn)
+        except Exception:
+            raise Exception("未找到发布按钮")
+
+    # 点击前开始监听发布接口响应和页面跳转
+    watcher = PublishWatcher(
+        page, config.DOUYIN_PUBLISH_API_PATTERN,
+        config.DOUYIN_PUBLISH_SUCCESS_URL, config.DOUYIN_PUBLISH_ID_KEYS
+    )
+    try:
+        await publish_btn.click()
+    except Exception:
+        watcher.close()
+        raise
+    print("      等待发布结果...")
+    result = await watcher.wait()
+    print(f"      >> 发布成功 ({describe_publish(result)})")
+    return result
 
 
-def publish_single_task(browser, task, video_data, account_state_file):
+async def publish_single_task(pool, task, video_data, account_state_file):
     """
     发布单个任务
-    :param browser: 浏览器对象
+    :param pool: ContextPool，同一账号的任务复用浏览器上下文
     :param task: 任务字典
     :param video_data: 视频数据（来自videos.json）
     :param account_state_file: 账号状态文件路径
-    :return: 是否成功
+    :return: {'success': True/False, 'item_id': 平台作品ID, 'error_message': '...'}
     """
+    timer = history.StepTimer()
+    video_path = video_data['video_path']
+    file_size = os.path.getsize(video_path) if os.path.exists(video_path) else 0
+    upload_stats = None
+    text_stats = None
+    publish_result = {}
+    saved = {}
+    error = None
+    tracker = None
+
     try:
         print(f"\n{'='*60}")
         print(f"  发布任务: {task['task_id']}")
@@ -122,149 +317,261 @@ def publish_single_task(browser, task, video_data, account_state_file):
         print(f"  定时: {task['scheduled_time']}")
         print(f"{'='*60}")
 
-        # 创建上下文并加载登录状态
-        context = browser.new_context(storage_state=account_state_file)
-        page = context.new_page()
-
-        # 跳转到上传页面
-        print("\n    打开上传页面...")
-        page.goto(UPLOAD_URL)
-        time.sleep(3)
+        # 按文件大小和历史耗时计算本任务的超时
+        t = timeouts.compute_timeouts('douyin', task['account_id'], file_size,
+                                      config.DOUYIN_TIMEOUT)
+        print(f"  超时: {timeouts.describe(t)}")
+
+        # 借出该账号已登录的页面（失败或达到使用次数上限时由上下文池回收）
+        async with pool.page(task['account_id'], account_state_file, saved) as page:
+            page.set_default_timeout(waits.timeout_ms(t['element_wait']))
+            page.set_default_navigation_timeout(t['page_load'])
+
+            # 跳转到上传页面（复用的页面也重新打开，清空上一个任务的表单）
+            print("\n    打开上传页面...")
+            with timer.step('page_load'):
+                await page.goto(UPLOAD_URL, wait_until='domcontentloaded')
+
+            # 上传视频（后台上传，同时填写表单）
+            with timer.step('form_ready'):
+                tracker = await upload_video(page, video_path)
+
+            with timer.step('fill'):
+                # 标题
+                title = video_data['title']
+                if len(title) > 30:
+                    title = title[:30]
+                await fill_title(page, title)
+
+                # 简介 + 话题
+                description = video_data.get('description', video_data['title'])
+                topics = video_data.get('topics', [])
+                text_stats = await fill_description(page, description, topics)
+
+                # 定时发布
+                scheduled_time = task['scheduled_time'][:16]  # 去掉秒
+                await set_schedule(page, scheduled_time)
+
+            # 发布前确认上传完成
+            with timer.step('upload_wait'):
+                upload_stats = await wait_upload_ready(tracker, t['upload'])
+
+            # 发布
+            with timer.step('publish'):
+                publish_result = await click_publish(page)
 
-        # 上传视频
-        upload_video(page, video_data['video_path'])
+        print("\n  >> 任务发布成功!")
+        print(f"     资源过滤: {format_saved(saved)}")
+        return {'success': True, 'item_id': publish_result.get('item_id')}
 
-        # 标题
-        title = video_data['title']
-        if len(title) > 30:
-            title = title[:30]
-        fill_title(page, title)
+    except Exception as e:
+        error = str(e)
+        print(f"\n  !! 任务发布失败: {e}")
+        return {'success': False, 'error_message': error}
+
+    finally:
+        if tracker is not None:
+            tracker.close()
+        history.record_attempt(
+            'douyin', task['account_id'], task['task_id'], task['video_id'],
+            error is None, timer, file_size=file_size, error=error,
+            upload_seconds=upload_stats['time_to_ready'] if upload_stats else None,
+            blocked_requests=saved.get('blocked', 0),
+            bytes_saved=saved.get('bytes_saved', 0),
+            text_chars_per_sec=text_stats['chars_per_sec'] if text_stats else None,
+            fast_text_input=config.DOUYIN_FAST_TEXT_INPUT,
+            item_id=publish_result.get('item_id'),
+            confirmed_by=publish_result.get('confirmed_by'),
+            scheduled_time=task.get('scheduled_time'),
+        )
+
+
+async def _run_account_queue(pool, account, account_tasks, video_dict, state):
+    """
+    按顺序执行一个账号的任务（同一账号的任务复用一个浏览器上下文）
+    :return: {'account_name', 'success', 'failed'}
+    """
+    import videos
 
-        # 简介 + 话题
-        description = video_data.get('description', video_data['title'])
-        topics = video_data.get('topics', [])
-        fill_description(page, description, topics)
+    account_name = account['account_name']
+    state_file = os.path.join(config.BROWSER_STATE_DIR, account['state_file'])
+    result = {'account_name': account_name, 'success': 0, 'failed': 0}
 
-        # 定时发布
-        scheduled_time = task['scheduled_time'][:16]  # 去掉秒
-        set_schedule(page, scheduled_time)
+    print(f"\n\n{'='*60}")
+    print(f"  账号: {account_name}")
+    print(f"  任务数: {len(account_tasks)}")
+    print(f"{'='*60}")
 
-        # 发布
-        click_publish(page)
+    async with pool.page(account['account_id'], state_file) as page:
+        logged_in = await check_session(page)
+    if not logged_in:
+        print(f"\n  !! [{account_name}] 登录状态失效，请通过菜单 6 重新扫码登录")
+        for task in account_tasks:
+            if _fail_task(state, task['task_id'], '登录状态失效'):
+                result['failed'] += 1
+        return result
+
+    for idx, task in enumerate(account_tasks, 1):
+        print(f"\n  [{account_name}] 进度: {idx}/{len(account_tasks)}")
+
+        video_data = video_dict.get(task['video_id'])
+        if not video_data:
+            print(f"  !! 未找到视频: {task['video_id']}")
+            if _fail_task(state, task['task_id'], '视频数据不存在'):
+                result['failed'] += 1
+            continue
+
+        # 领取任务，发布期间后台续约；进程中断时任务保持 processing，租约过期后自动恢复
+        with state.lease(task['task_id'], 'processing',
+                         last_updated=time.strftime('%Y-%m-%d %H:%M:%S')) as claimed:
+            if claimed is None:
+                print(f"  >> 任务已被其他进程领取或已完成，跳过: {task['task_id']}")
+                continue
+            outcome = await publish_single_task(pool, task, video_data, state_file)
 
-        print("\n  >> 任务发布成功!")
+        if outcome['success']:
+            _update_task_status(state, task['task_id'], 'completed',
+                                platform_item_id=outcome.get('item_id'))
+            videos.mark_published(task['video_id'], 'douyin')
+            result['success'] += 1
+        else:
+            _update_task_status(state, task['task_id'], 'failed',
+                                outcome.get('error_message') or '发布失败')
+            result['failed'] += 1
 
-        page.close()
-        context.close()
-        return True
+        if idx < len(account_tasks) and config.DOUYIN_TASK_INTERVAL > 0:
+            print(f"\n  [{account_name}] 等待{config.DOUYIN_TASK_INTERVAL}秒后继续...")
+            await asyncio.sleep(config.DOUYIN_TASK_INTERVAL)
 
-    except Exception as e:
-        print(f"\n  !! 任务发布失败: {e}")
-        return False
+    return result
 
 
-def _execute_tasks_internal():
-    """内部执行函数：执行所有待发布的抖音任务"""
-    from playwright.sync_api import sync_playwright
+async def run_douyin_tasks(dates=None):
+    """
+    执行待发布的抖音任务（asyncio 版本）
+    :param dates: 要执行的日期列表，默认所有仍有未完成任务的日期
+    """
+    from playwright.async_api import async_playwright
 
     print(f"\n{'='*60}")
     print("  开始执行抖音发布任务")
     print(f"{'='*60}")
 
-    # 加载任务表
-    if not os.path.exists(config.DOUYIN_TASKS_FILE):
-        print("\n  !! 任务表不存在，请先生成任务")
+    # 以前日期没有执行的任务标记为过期，不再执行；只加载要执行的日期分区
+    task_store.expire_past('douyin')
+    if dates is None:
+        dates = task_store.open_dates('douyin')
+    state = task_store.PartitionedState('douyin', dates)
+    if not state.dates:
+        print("\n  !! 没有任务表，请先生成任务")
         return
+    print(f"\n  任务日期: {', '.join(state.dates)}")
 
-    with open(config.DOUYIN_TASKS_FILE, 'r', encoding='utf-8') as f:
-        task_table = json.load(f)
+    # 上次运行中断留下的执行中任务恢复为待发布
+    recovered = state.recover_expired()
+    if recovered:
+        print(f"\n  >> 恢复中断的任务: {len(recovered)} 个")
 
-    tasks = task_table['tasks']
-    pending_tasks = [t for t in tasks if t['status'] in ['pending', 'failed']]
+    pending_tasks = [t for t in state.tasks if t['status'] in task_state.CLAIMABLE_STATUSES]
 
     if not pending_tasks:
         print("\n  没有待发布的任务")
+        state.close()
         return
 
+    # 按账号分组，每个账号内部保持原有顺序（多个日期时按日期先后）
+    queues = []
+    for account in state.accounts:
+        account_tasks = [t for t in pending_tasks if t['account_id'] == account['account_id']]
+        if account_tasks:
+            queues.append((account, account_tasks))
+
+    workers = max(1, min(config.DOUYIN_MAX_WORKERS, len(queues)))
     print(f"\n  待处理任务: {len(pending_tasks)} 个")
+    print(f"  账号数: {len(queues)} 个，并发: {workers}")
 
     # 加载视频数据
     import videos
     all_videos = videos.load_videos()
     video_dict = {v['id']: v for v in all_videos}
 
-    # 启动浏览器
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False)
-
-        accounts = task_table['accounts']
-        for account in accounts:
-            account_id = account['account_id']
-            account_name = account['account_name']
-            state_file = os.path.join(config.BROWSER_STATE_DIR, account['state_file'])
-
-            account_tasks = [t for t in pending_tasks if t['account_id'] == account_id]
-            if not account_tasks:
-                continue
-
-            print(f"\n\n{'='*60}")
-            print(f"  账号: {account_name}")
-            print(f"  任务数: {len(account_tasks)}")
-            print(f"{'='*60}")
-
-            for idx, task in enumerate(account_tasks, 1):
-                print(f"\n  进度: {idx}/{len(account_tasks)}")
-
-                # 更新状态
-                _update_task_status(task['task_id'], 'processing')
-
-                video_data = video_dict.get(task['video_id'])
-                if not video_data:
-                    print(f"  !! 未找到视频: {task['video_id']}")
-                    _update_task_status(task['task_id'], 'failed', '视频数据不存在')
-                    continue
-
-                success = publish_single_task(browser, task, video_data, state_file)
-
-                if success:
-                    _update_task_status(task['task_id'], 'completed')
-                    videos.mark_published(task['video_id'], 'douyin')
-                else:
-                    _update_task_status(task['task_id'], 'failed', '发布失败')
-
-                if idx < len(account_tasks):
-                    print("\n  等待5秒后继续...")
-                    time.sleep(5)
-
-        browser.close()
+    # 一个浏览器、一个事件循环，最多 workers 个账号同时发布
+    semaphore = asyncio.Semaphore(workers)
+
+    async def run_queue(pool, account, account_tasks):
+        async with semaphore:
+            try:
+                return await _run_account_queue(pool, account, account_tasks, video_dict, state)
+            except Exception as e:
+                print(f"\n  !! 账号 {account['account_name']} 执行异常: {e}")
+                return {'account_name': account['account_name'], 'success': 0,
+                        'failed': 0, 'error': str(e)}
+
+    async with async_playwright() as p:
+        headless = config.DOUYIN_HEADLESS
+        browser = await browser_daemon.launch_or_connect_async(p, headless=headless)
+        pool = ContextPool(
+            browser, context_kwargs=browser_daemon.headless_context_options(browser, headless)
+        )
+        try:
+            results = await asyncio.gather(*(
+                run_queue(pool, account, account_tasks) for account, account_tasks in queues
+            ))
+        finally:
+            await pool.close()
+            await browser.close()
+
+    state.close()
+
+    total_success = sum(r['success'] for r in results)
+    total_failed = sum(r['failed'] for r in results)
 
     print(f"\n{'='*60}")
     print("  >> 所有任务执行完成")
+    for r in results:
+        line = f"     {r['account_name']}: 成功 {r['success']} | 失败 {r['failed']}"
+        if r.get('error'):
+            line += f" | 异常: {r['error']}"
+        print(line)
+    print(f"  总计: 成功 {total_success} 条，失败 {total_failed} 条")
+    print(f"  浏览器上下文: {pool.summary()}")
+    print(f"  文件缓存: {file_cache.summary()}")
     print(f"{'='*60}")
 
 
-def _update_task_status(task_id, status, error_message=None):
-    """更新任务状态"""
-    if not os.path.exists(config.DOUYIN_TASKS_FILE):
-        return
+def _fail_task(state, task_id, error_message):
+    """
+    不执行就把任务标记为失败：先领取，已被其他进程领取或已完成的任务不动
+    :return: 是否标记了
+    """
+    if state.claim(task_id, 'processing') is None:
+        return False
+    _update_task_status(state, task_id, 'failed', error_message)
+    return True
+
 
-    with open(config.DOUYIN_TASKS_FILE, 'r', encoding='utf-8') as f:
-        task_table = json.load(f)
+def _update_task_status(state, task_id, status, error_message=None, **extra):
+    """写入任务最终状态并清除租约（extra 中值为 None 的字段不写入）"""
+    fields = {
+        'status': status,
+        'last_updated': time.strftime('%Y-%m-%d %H:%M:%S')
+    }
+    if error_message:
+        fields['error'] = error_message
+    fields.update({k: v for k, v in extra.items() if v is not None})
+    state.release(task_id, **fields)
 
-    for task in task_table['tasks']:
-        if task['task_id'] == task_id:
-            task['status'] = status
-            task['last_updated'] = time.strftime('%Y-%m-%d %H:%M:%S')
-            if error_message:
-                task['error'] = error_message
-            break
 
-    with open(config.DOUYIN_TASKS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(task_table, f, ensure_ascii=False, indent=2)
+def _execute_tasks_internal(dates=None):
+    """内部执行函数：在独立事件循环中执行待发布的抖音任务"""
+    asyncio.run(run_douyin_tasks(dates))
 
 
-def execute_douyin_tasks():
-    """执行抖音发布任务（外部接口）"""
-    thread = threading.Thread(target=_execute_tasks_internal)
+def execute_douyin_tasks(dates=None):
+    """
+    执行抖音发布任务（外部接口）
+    :param dates: 要执行的日期列表，默认所有仍有未完成任务的日期
+    """
+    thread = threading.Thread(target=_execute_tasks_internal, args=(dates,))
     thread.start()
     thread.join()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+发布结果确认
+点击发布前开始监听平台的发布接口响应和发布后的页面跳转，
+以接口返回（含平台作品ID）或确定的跳转作为发布成功的依据
+"""
+
+import os
+import re
+import sys
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+# 接口返回中表示结果的字段，存在时必须为 0
+_CODE_KEYS = ('status_code', 'errCode', 'err_code', 'ret', 'code')
+_MESSAGE_KEYS = ('status_msg', 'errMsg', 'err_msg', 'msg', 'message')
+
+# 跳转后等待接口响应的时间（秒），接口先到可以拿到作品ID
+_NAVIGATION_GRACE = 1.0
+
+
+def _find_key(data, keys):
+    """在嵌套的 dict/list 中查找第一个出现的字段值"""
+    if isinstance(data, dict):
+        for key in keys:
+            if data.get(key) not in (None, ''):
+                return data[key]
+        values = data.values()
+    elif isinstance(data, list):
+        values = data
+    else:
+        return None
+    for value in values:
+        found = _find_key(value, keys)
+        if found not in (None, ''):
+            return found
+    return None
+
+
+class PublishWatcher:
+    """
+    用法:
+        watcher = PublishWatcher(page, api_pattern, success_url_pattern, id_keys)
+        await publish_btn.click()
+        result = await watcher.wait()    # {'confirmed_by', 'item_id', 'elapsed'}
+    """
+
+    def __init__(self, page, api_pattern, success_url_pattern=None, id_keys=()):
+        self.page = page
+        self.api_pattern = re.compile(api_pattern)
+        self.success_url = re.compile(success_url_pattern) if success_url_pattern else None
+        self.id_keys = tuple(id_keys)
+        self.loop = asyncio.get_running_loop()
+        self.started_at = self.loop.time()
+        self._future = self.loop.create_future()
+        self._nav_timer = None
+
+        page.on('response', self._on_response)
+        page.on('framenavigated', self._on_navigated)
+
+    def _resolve(self, confirmed_by, item_id=None):
+        if self._future.done():
+            return
+        if self._nav_timer is not None:
+            self._nav_timer.cancel()
+        self._future.set_result({
+            'confirmed_by': confirmed_by,
+            'item_id': str(item_id) if item_id not in (None, '') else None,
+            'elapsed': round(self.loop.time() - self.started_at, 2),
+        })
+
+    def _fail(self, message):
+        if not self._future.done():
+            self._future.set_exception(Exception(message))
+
+    async def _on_response(self, response):
+        if self._future.done() or not self.api_pattern.search(response.url):
+            return
+        if response.request.method != 'POST':
+            return
+        if response.status >= 400:
+            self._fail(f"发布接口返回 HTTP {response.status}")
+            return
+        try:
+            body = await response.json()
+        except Exception:
+            body = None
+
+        if isinstance(body, dict):
+            # 结果码只看顶层字段，避免误用业务数据里同名的字段
+            code = next((body[k] for k in _CODE_KEYS if k in body), None)
+            if code not in (None, 0, '0'):
+                message = next((body[k] for k in _MESSAGE_KEYS if body.get(k)), '')
+                self._fail(f"发布接口返回错误 {code}: {message}".strip())
+                return
+        self._resolve('response', _find_key(body, self.id_keys) if body else None)
+
+    def _on_navigated(self, frame):
+        if self._future.done() or self.success_url is None:
+            return
+        if frame != self.page.main_frame or not self.success_url.search(frame.url):
+            return
+        # 跳转通常紧跟在接口返回之后，稍等一下以便拿到作品ID
+        if self._nav_timer is None:
+            self._nav_timer = self.loop.call_later(
+                _NAVIGATION_GRACE, self._resolve, 'navigation'
+            )
+
+    def close(self):
+        """移除事件监听"""
+        if self._nav_timer is not None:
+            self._nav_timer.cancel()
+        self.page.remove_listener('response', self._on_response)
+        self.page.remove_listener('framenavigated', self._on_navigated)
+
+    async def wait(self, timeout_ms=None):
+        """
+        等待发布结果
+        :return: {'confirmed_by': 'response' / 'navigation', 'item_id', 'elapsed'}
+        """
+        timeout_ms = timeout_ms or config.PUBLISH_CONFIRM_TIMEOUT
+        try:
+            return await asyncio.wait_for(asyncio.shield(self._future), timeout_ms / 1000)
+        except asyncio.TimeoutError:
+            raise Exception(f"未收到发布结果 ({timeout_ms / 1000:.0f}秒)")
+        finally:
+            self.close()
+
+
+def describe(result):
+    """一行说明文字"""
+    source = '接口返回' if result['confirmed_by'] == 'response' else '页面跳转'
+    item = f", 作品ID {result['item_id']}" if result.get('item_id') else ''
+    return f"{source}确认, 用时 {result['elapsed']:.1f} 秒{item}"
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+发布页面资源过滤
+发布只操作少量表单元素，图片、字体、统计上报等资源在发布用的浏览器上下文中直接拦截，
+同时关闭页面动画，减少页面加载时间和多账号并发时的带宽
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+# 关闭 CSS 动画和过渡，元素出现后立即处于最终状态
+_NO_ANIMATION_SCRIPT = """
+(() => {
+    const css = '*, *::before, *::after { animation: none !important; '
+              + 'transition: none !important; caret-color: auto !important; }';
+    const apply = () => {
+        const style = document.createElement('style');
+        style.textContent = css;
+        (document.head || document.documentElement).appendChild(style);
+    };
+    if (document.documentElement) apply();
+    else document.addEventListener('DOMContentLoaded', apply);
+})();
+"""
+
+
+def context_options():
+    """创建发布上下文时的附加参数"""
+    if not config.LEAN_BROWSER_ENABLED:
+        return {}
+    return {'reduced_motion': 'reduce'}
+
+
+class ResourceBlocker:
+    """
+    拦截非必要请求并统计
+    通过 CDP 的 Network.setBlockedURLs 在浏览器内按 URL 拦截，不使用 context.route：
+    route 会让 Playwright 关闭整个上下文的 HTTP 缓存，并且每个请求都要经过 Python 事件循环
+    用法:
+        blocker = ResourceBlocker()
+        await blocker.install(context, page)
+        ...
+        saved = blocker.take()      # 取出并清零本任务的统计
+    """
+
+    def __init__(self):
+        self.urls = list(config.LEAN_BLOCK_URL_PATTERNS)
+        for kind in config.LEAN_BLOCK_RESOURCE_TYPES:
+            for ext in config.LEAN_BLOCK_EXTENSIONS.get(kind, ()):
+                self.urls += [f'*.{ext}', f'*.{ext}?*']
+        self.session = None
+        self._animations_disabled = set()
+        self._reset()
+
+    def _reset(self):
+        self.blocked = 0
+        self.bytes_saved = 0
+        self.by_type = {}
+
+    async def install(self, context, page):
+        """在页面上启用拦截（未启用精简模式时不做任何事）"""
+        if not config.LEAN_BROWSER_ENABLED:
+            return
+        if config.LEAN_DISABLE_ANIMATIONS and id(context) not in self._animations_disabled:
+            await context.add_init_script(_NO_ANIMATION_SCRIPT)
+            self._animations_disabled.add(id(context))
+        if self.session is None:
+            self.session = await context.new_cdp_session(page)
+            self.session.on('Network.loadingFailed', self._on_failed)
+            await self.session.send('Network.enable')
+        await self.session.send('Network.setBlockedURLs', {'urls': self.urls})
+
+    async def uninstall(self):
+        """停止拦截（需要显示二维码等完整页面时使用）"""
+        if self.session is not None:
+            await self.session.send('Network.setBlockedURLs', {'urls': []})
+
+    def _on_failed(self, event):
+        # 被 setBlockedURLs 拦截的请求以 blockedReason='inspector' 失败
+        if event.get('blockedReason') != 'inspector':
+            return
+        kind = (event.get('type') or 'other').lower()
+        estimated = config.LEAN_ESTIMATED_BYTES
+        self.blocked += 1
+        self.bytes_saved += estimated.get(kind, estimated['other'])
+        self.by_type[kind] = self.by_type.get(kind, 0) + 1
+
+    def take(self):
+        """
+        取出自上次调用以来的统计并清零
+        :return: {'blocked', 'bytes_saved', 'by_type'}
+        """
+        stats = {'blocked': self.blocked, 'bytes_saved': self.bytes_saved,
+                 'by_type': dict(self.by_type)}
+        self._reset()
+        return stats
+
+
+def format_saved(stats):
+    """一行统计文字"""
+    if not stats.get('blocked'):
+        return "未拦截请求"
+    kinds = ', '.join(f"{k} {n}" for k, n in sorted(stats['by_type'].items()))
+    return (f"拦截 {stats['blocked']} 个请求 ({kinds}), "
+            f"约节省 {stats['bytes_saved'] / 1024 / 1024:.1f} MB")
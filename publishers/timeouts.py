@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+自适应超时
+根据文件大小和发布历史中各步骤的实际耗时，为每个任务计算
+上传、页面加载、元素等待的超时时间（毫秒）
+"""
+
+import os
+import sys
+import math
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+import history
+
+
+def percentile(values, pct):
+    """最近秩法百分位数"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def _clamp(name, value):
+    low, high = config.ADAPTIVE_TIMEOUT_LIMITS[name]
+    return int(min(max(value, low), high))
+
+
+def _step_timeout(name, step, samples, default):
+    """某个步骤的 p95 耗时 × 余量（样本不足时用默认值）"""
+    durations = [r['steps'][step] for r in samples if step in r.get('steps', {})]
+    if len(durations) < config.ADAPTIVE_TIMEOUT_MIN_SAMPLES:
+        return default
+    p = percentile(durations, config.ADAPTIVE_TIMEOUT_PERCENTILE)
+    return _clamp(name, p * config.ADAPTIVE_TIMEOUT_MARGIN * 1000)
+
+
+def _upload_timeout(file_size, samples, default):
+    """
+    按每字节耗时的 p95 估算本文件的上传超时
+    样本不足时取默认超时和按最低速度估算的较大者
+    """
+    per_byte = [
+        r['upload_seconds'] / r['file_size'] for r in samples
+        if r.get('upload_seconds') and r.get('file_size')
+    ]
+    if len(per_byte) < config.ADAPTIVE_TIMEOUT_MIN_SAMPLES:
+        estimate = file_size / config.ADAPTIVE_UPLOAD_MIN_SPEED * config.ADAPTIVE_TIMEOUT_MARGIN * 1000
+        return _clamp('upload', max(default, estimate))
+    seconds = file_size * percentile(per_byte, config.ADAPTIVE_TIMEOUT_PERCENTILE)
+    return _clamp('upload', seconds * config.ADAPTIVE_TIMEOUT_MARGIN * 1000)
+
+
+def compute_timeouts(platform, account_id, file_size, default_timeouts):
+    """
+    计算本任务的超时时间
+    :param default_timeouts: {'upload', 'page_load', 'element_wait'}，未启用或样本不足时使用
+    :return: {'upload': ms, 'page_load': ms, 'element_wait': ms}
+    """
+    if not config.ADAPTIVE_TIMEOUT_ENABLED:
+        return dict(default_timeouts)
+
+    # 只用成功的记录：超时失败的步骤耗时接近当时的超时，计入后超时只会越调越大
+    records = [r for r in history.recent_records(config.ADAPTIVE_TIMEOUT_WINDOW, platform=platform)
+               if r.get('status') == 'success']
+    account_records = [r for r in records if r.get('account_id') == account_id]
+    samples = (account_records
+               if len(account_records) >= config.ADAPTIVE_TIMEOUT_MIN_SAMPLES else records)
+
+    return {
+        'upload': _upload_timeout(file_size, samples, default_timeouts['upload']),
+        'page_load': _step_timeout('page_load', 'page_load', samples,
+                                   default_timeouts['page_load']),
+        'element_wait': _step_timeout('element_wait', 'form_ready', samples,
+                                      default_timeouts['element_wait']),
+    }
+
+
+def describe(timeouts):
+    """一行说明文字"""
+    return (f"上传 {timeouts['upload'] / 1000:.0f}s, 页面 {timeouts['page_load'] / 1000:.0f}s, "
+            f"元素 {timeouts['element_wait'] / 1000:.0f}s")
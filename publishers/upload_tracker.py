@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+上传进度跟踪
+选择文件后在后台统计上传请求的字节数，并在后台等待页面上的完成标识，
+出现时即记录完成时间；调用方可以先填写表单，发布前再等待上传完成
+"""
+
+import os
+import re
+import time
+import asyncio
+
+
+class UploadTracker:
+    """
+    用法:
+        tracker = UploadTracker(page, video_path, ready_selector=..., ...)   # 开始后台监视
+        await file_input.set_input_files(video_path)
+        ...                                  # 上传期间填写表单
+        stats = await tracker.wait_ready(timeout_ms)
+    """
+
+    def __init__(self, page, video_path, ready_selector, failed_selector=None,
+                 progress_selector=None, request_pattern=None, poll_interval=0.5):
+        self.page = page
+        self.video_path = video_path
+        self.file_size = os.path.getsize(video_path) if os.path.exists(video_path) else 0
+        self.ready_selector = ready_selector
+        self.failed_selector = failed_selector
+        self.progress_selector = progress_selector
+        self.pattern = re.compile(request_pattern) if request_pattern else None
+
+        self.started_at = time.monotonic()
+        self.ready_at = None
+        self.bytes_sent = 0
+        self.requests = 0
+        self.last_percent = None
+
+        page.on('requestfinished', self._on_request_finished)
+        self._watcher = asyncio.ensure_future(self._watch(poll_interval))
+
+    async def _on_request_finished(self, request):
+        if self.pattern is None or not self.pattern.search(request.url):
+            return
+        if request.method not in ('POST', 'PUT'):
+            return
+        self.requests += 1
+        try:
+            sizes = await request.sizes()
+            self.bytes_sent += sizes.get('requestBodySize', 0)
+        except Exception:
+            pass
+
+    def close(self):
+        """移除事件监听并停止后台监视"""
+        self.page.remove_listener('requestfinished', self._on_request_finished)
+        if not self._watcher.done():
+            self._watcher.cancel()
+        elif not self._watcher.cancelled():
+            self._watcher.exception()   # 已取走异常，避免事件循环报告未处理的异常
+
+    async def _read_percent(self):
+        """读取页面进度条上的百分比，读不到返回 None"""
+        if not self.progress_selector:
+            return None
+        try:
+            locator = self.page.locator(self.progress_selector).first
+            if await locator.count() == 0:
+                return None
+            match = re.search(r'(\d{1,3})\s*%', await locator.inner_text())
+            return int(match.group(1)) if match else None
+        except Exception:
+            return None
+
+    async def _report_progress(self, poll_interval):
+        while True:
+            percent = await self._read_percent()
+            if percent is not None and percent != self.last_percent:
+                self.last_percent = percent
+                print(f"      上传进度: {percent}%")
+            await asyncio.sleep(poll_interval)
+
+    async def _watch(self, poll_interval):
+        """
+        后台等待完成/失败标识出现，完成时立即记录 ready_at
+        （调用方此时可能还在填写表单，统计不包含填表时间）
+        """
+        ready = asyncio.ensure_future(
+            self.page.locator(self.ready_selector).first.wait_for(state='visible', timeout=0)
+        )
+        watchers = [ready]
+        if self.failed_selector:
+            watchers.append(asyncio.ensure_future(
+                self.page.locator(self.failed_selector).first.wait_for(state='visible', timeout=0)
+            ))
+        progress = asyncio.ensure_future(self._report_progress(poll_interval))
+        try:
+            done, _ = await asyncio.wait(watchers, return_when=asyncio.FIRST_COMPLETED)
+            if ready in done:
+                ready.result()
+                self.ready_at = time.monotonic()
+                return
+            error = watchers[1].exception()
+            raise error or Exception("平台提示上传失败")
+        finally:
+            for task in watchers + [progress]:
+                if not task.done():
+                    task.cancel()
+
+    async def wait_ready(self, timeout_ms):
+        """
+        等待平台显示上传/处理完成（超时从选择文件时起算）
+        :return: stats() 统计信息
+        """
+        remaining = self.started_at + timeout_ms / 1000 - time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._watcher), max(remaining, 0))
+            return self.stats()
+        except asyncio.TimeoutError:
+            raise Exception(f"上传超时 ({timeout_ms / 1000:.0f}秒)")
+        finally:
+            self.close()
+
+    def stats(self):
+        """
+        上传统计
+        :return: {'file_size', 'bytes_sent', 'time_to_ready', 'bytes_per_sec'}
+        """
+        end = self.ready_at or time.monotonic()
+        elapsed = max(end - self.started_at, 1e-6)
+        size = self.bytes_sent or self.file_size
+        return {
+            'file_size': self.file_size,
+            'bytes_sent': self.bytes_sent,
+            'time_to_ready': round(elapsed, 2),
+            'bytes_per_sec': round(size / elapsed),
+        }
+
+
+def format_stats(stats):
+    """一行统计文字"""
+    mb = stats['file_size'] / 1024 / 1024
+    speed = stats['bytes_per_sec'] / 1024 / 1024
+    return f"{mb:.1f} MB, 用时 {stats['time_to_ready']:.1f} 秒, {speed:.2f} MB/s"
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+页面等待工具
+发布流程的每一步都等待具体条件（元素可见/可用、相关请求结束、DOM 稳定），
+不再使用固定 sleep；所有等待都受 config.WAIT_TIMEOUT_CEILING 上限约束。
+元素等待不传 timeout 时使用页面默认超时（发布器按任务设置 page.set_default_timeout）
+"""
+
+import os
+import sys
+import asyncio
+import re
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import config
+
+
+def timeout_ms(timeout=None):
+    """取等待超时（毫秒），不超过全局上限"""
+    ceiling = config.WAIT_TIMEOUT_CEILING
+    if timeout is None:
+        return ceiling
+    return min(timeout, ceiling)
+
+
+def _element_timeout(timeout):
+    """元素等待超时：未指定时交给页面默认超时"""
+    return None if timeout is None else timeout_ms(timeout)
+
+
+async def wait_visible(locator, timeout=None):
+    """等待元素可见"""
+    await locator.wait_for(state='visible', timeout=_element_timeout(timeout))
+    return locator
+
+
+async def wait_attached(locator, timeout=None):
+    """等待元素出现在 DOM 中（文件输入框等隐藏元素）"""
+    await locator.wait_for(state='attached', timeout=_element_timeout(timeout))
+    return locator
+
+
+async def wait_hidden(locator, timeout=None):
+    """等待元素隐藏或移除"""
+    await locator.wait_for(state='hidden', timeout=_element_timeout(timeout))
+    return locator
+
+
+async def wait_enabled(locator, timeout=None, disabled_class=None):
+    """
+    等待元素可见且可用
+    :param disabled_class: 站点用 class 表示禁用状态时传入，如 'weui-desktop-btn_disabled'
+    """
+    await wait_visible(locator, timeout)
+    handle = await locator.element_handle(timeout=_element_timeout(timeout))
+    await locator.page.wait_for_function(
+        """([el, cls]) => !el.disabled
+              && el.getAttribute('aria-disabled') !== 'true'
+              && !(cls && el.classList.contains(cls))""",
+        arg=[handle, disabled_class],
+        timeout=_element_timeout(timeout)
+    )
+    return locator
+
+
+async def wait_text_change(locator, old_text, timeout=None):
+    """等待元素文字变化（如日期面板翻页后的年月标签）"""
+    handle = await locator.element_handle(timeout=_element_timeout(timeout))
+    await locator.page.wait_for_function(
+        "([el, old]) => el.isConnected && el.innerText.trim() !== old",
+        arg=[handle, old_text],
+        timeout=_element_timeout(timeout)
+    )
+
+
+async def wait_dom_settled(page, selector='body', quiet_ms=300, timeout=None):
+    """
+    等待指定区域的 DOM 在 quiet_ms 内不再变化
+    用于输入话题、选择选项后等待页面框架完成渲染
+    """
+    await page.evaluate(
+        """([selector, quietMs, timeoutMs]) => new Promise((resolve) => {
+            const root = document.querySelector(selector) || document.body;
+            let timer = setTimeout(done, quietMs);
+            const deadline = setTimeout(done, timeoutMs);
+            const observer = new MutationObserver(() => {
+                clearTimeout(timer);
+                timer = setTimeout(done, quietMs);
+            });
+            function done() {
+                observer.disconnect();
+                clearTimeout(timer);
+                clearTimeout(deadline);
+                resolve();
+            }
+            observer.observe(root, {subtree: true, childList: true,
+                                    attributes: true, characterData: true});
+        })""",
+        [selector, quiet_ms, timeout_ms(timeout)]
+    )
+
+
+class RequestTracker:
+    """
+    跟踪页面中匹配 URL 模式的进行中请求
+    需要在触发请求的操作之前创建
+    """
+
+    def __init__(self, page, url_pattern=None):
+        self.page = page
+        self.pattern = re.compile(url_pattern) if url_pattern else None
+        self.inflight = set()
+        self.last_activity = time.monotonic()
+        self.seen = 0
+        page.on('request', self._on_request)
+        page.on('requestfinished', self._on_done)
+        page.on('requestfailed', self._on_done)
+
+    def _match(self, request):
+        return self.pattern is None or self.pattern.search(request.url)
+
+    def _on_request(self, request):
+        if self._match(request):
+            self.inflight.add(request)
+            self.seen += 1
+            self.last_activity = time.monotonic()
+
+    def _on_done(self, request):
+        if request in self.inflight:
+            self.inflight.discard(request)
+            self.last_activity = time.monotonic()
+
+    def close(self):
+        """移除事件监听"""
+        self.page.remove_listener('request', self._on_request)
+        self.page.remove_listener('requestfinished', self._on_done)
+        self.page.remove_listener('requestfailed', self._on_done)
+
+    async def wait_idle(self, quiet_ms=500, timeout=None, require_request=False):
+        """
+        等待匹配的请求全部结束并保持 quiet_ms 无新请求
+        :param require_request: 为 True 时至少要出现过一个匹配请求
+        :return: 是否在超时前达到空闲
+        """
+        deadline = time.monotonic() + timeout_ms(timeout) / 1000
+        quiet = quiet_ms / 1000
+        while time.monotonic() < deadline:
+            idle_for = time.monotonic() - self.last_activity
+            if not self.inflight and idle_for >= quiet and (self.seen or not require_request):
+                return True
+            await asyncio.sleep(0.05)
+        return False
+
+
+async def wait_network_idle(page, url_pattern=None, quiet_ms=500, timeout=None):
+    """
+    等待匹配请求空闲（只跟踪调用之后发起的请求）
+    :return: 是否在超时前达到空闲
+    """
+    tracker = RequestTracker(page, url_pattern)
+    try:
+        return await tracker.wait_idle(quiet_ms=quiet_ms, timeout=timeout)
+    finally:
+        tracker.close()
@@ -8,24 +8,73 @@
 import os
 import sys
 import time
+import re
 import json
+import asyncio
 from pathlib import Path
 from datetime import datetime
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import config
+import history
+import browser_daemon
 from publishers import wechat_config as wc
+from publishers import waits, timeouts, dom_snapshot
+from publishers.resource_filter import ResourceBlocker, context_options, format_saved
+from publishers.publish_confirm import PublishWatcher, describe as describe_publish
+
+# 定时发布日期 / 时间输入框
+SCHEDULE_DATE_INPUT = '.weui-desktop-picker__date-time input.weui-desktop-form__input'
+SCHEDULE_TIME_INPUT = '.weui-desktop-picker__time input.weui-desktop-form__input'
+
+# 视频号只有一个登录账号，发布历史中使用固定账号标识
+ACCOUNT_ID = 'default'
+
+
+async def _ainput(prompt):
+    """在线程中等待命令行输入，不阻塞事件循环"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, input, prompt)
 
 
 class WeChatPublisher:
-    """视频号发布器（单例模式，复用浏览器）"""
+    """
+    视频号发布器（单例模式，复用浏览器）
+    内部基于 asyncio 版 Playwright；同步方法在类级别的事件循环上运行对应的 async 方法
+    """
 
+    _loop = None
+    _playwright = None
     _browser = None
     _context = None
     _page = None
+    _blocker = None
     _uploaded_count = 0
 
-    def upload_video(self, video_path, title, description, topics=None, scheduled_time=None):
+    def __init__(self):
+        # 当前任务的超时（毫秒），upload_video_async 开始时按文件大小和历史重新计算
+        self._timeouts = dict(wc.TIMEOUT)
+        self._upload_started = None
+        self._upload_ready_at = None
+        self._ready_watch = None
+
+    @classmethod
+    def _run(cls, coro):
+        """在类级别的事件循环上运行协程（浏览器对象绑定在该循环上）"""
+        if cls._loop is None or cls._loop.is_closed():
+            cls._loop = asyncio.new_event_loop()
+        return cls._loop.run_until_complete(coro)
+
+    def upload_video(self, video_path, title, description, topics=None, scheduled_time=None,
+                     task_id=None, video_id=None):
+        """上传视频到视频号（同步接口，参数同 upload_video_async）"""
+        return self._run(self.upload_video_async(
+            video_path, title, description, topics=topics, scheduled_time=scheduled_time,
+            task_id=task_id, video_id=video_id
+        ))
+
+    async def upload_video_async(self, video_path, title, description, topics=None,
+                                 scheduled_time=None, task_id=None, video_id=None):
         """
         上传视频到视频号
         :param video_path: 视频文件路径
@@ -33,8 +82,17 @@ class WeChatPublisher:
         :param description: 描述
         :param topics: 话题列表
         :param scheduled_time: 定时时间 'YYYY-MM-DD HH:MM:SS'
-        :return: {'success': True/False, 'error_message': '...'}
+        :param task_id: 任务ID（写入发布历史）
+        :param video_id: 视频ID（写入发布历史）
+        :return: {'success': True/False, 'item_id': 平台作品ID, 'error_message': '...'}
         """
+        timer = history.StepTimer()
+        file_size = os.path.getsize(video_path) if os.path.exists(video_path) else 0
+        upload_seconds = None
+        publish_result = {}
+        saved = {}
+        error = None
+
         try:
             print(f"\n{'='*60}")
             print(f"  上传视频到视频号")
@@ -44,148 +102,222 @@ class WeChatPublisher:
             if scheduled_time:
                 print(f"  定时: {scheduled_time}")
 
+            # 按文件大小和历史耗时计算本任务的超时
+            self._timeouts = timeouts.compute_timeouts('wechat', ACCOUNT_ID, file_size,
+                                                       wc.TIMEOUT)
+            print(f"  超时: {timeouts.describe(self._timeouts)}")
+
             # 1. 确保已登录
-            if not self._ensure_login():
-                return {'success': False, 'error_message': '登录失败'}
+            if not await self._ensure_login():
+                error = '登录失败'
+                return {'success': False, 'error_message': error}
 
             page = WeChatPublisher._page
+            WeChatPublisher._blocker.take()
+            page.set_default_timeout(waits.timeout_ms(self._timeouts['element_wait']))
+            page.set_default_navigation_timeout(self._timeouts['page_load'])
 
             # 2. 非首次上传需要重新打开页面
             if WeChatPublisher._uploaded_count > 0:
                 print("\n  重新打开创建页面...")
                 try:
-                    page.goto("https://channels.weixin.qq.com/platform/post",
-                              wait_until='domcontentloaded')
-                    time.sleep(1)
-                    page.goto(config.WECHAT_TARGET_URL, wait_until='domcontentloaded')
-                    time.sleep(wc.WAIT_TIME['after_page_load'])
+                    with timer.step('page_load'):
+                        await page.goto("https://channels.weixin.qq.com/platform/post",
+                                        wait_until='domcontentloaded')
+                        await page.goto(config.WECHAT_TARGET_URL, wait_until='domcontentloaded')
 
                     upload_area = page.locator(wc.SELECTORS['upload_area']).first
-                    upload_area.wait_for(state='visible', timeout=10000)
+                    await waits.wait_visible(upload_area, self._timeouts['element_wait'])
                 except Exception as e:
                     raise Exception(f"页面刷新失败: {e}")
 
             # 3. 上传视频文件
             print("\n  [1/6] 上传视频...")
-            self._upload_file(page, video_path)
-
-            # 4. 填写标题
-            print("  [2/6] 填写标题...")
-            self._fill_title(page, title)
-
-            # 5. 填写描述 + 话题
-            print("  [3/6] 填写描述...")
-            desc_with_topics = description
-            if topics:
-                desc_with_topics += ' ' + ' '.join(f'#{t}' for t in topics)
-            self._fill_description(page, desc_with_topics)
-
-            # 6. 设置定时发布
+            with timer.step('form_ready'):
+                await self._upload_file(page, video_path)
+
+            with timer.step('fill'):
+                # 4. 填写标题
+                print("  [2/6] 填写标题...")
+                await self._fill_title(page, title)
+
+                # 5. 填写描述 + 话题
+                print("  [3/6] 填写描述...")
+                desc_with_topics = description
+                if topics:
+                    desc_with_topics += ' ' + ' '.join(f'#{t}' for t in topics)
+                await self._fill_description(page, desc_with_topics)
+
+            # 6. 设置定时发布（失败时本任务失败，不等待人工操作）
             if scheduled_time and config.WECHAT_ENABLE_SCHEDULE:
                 print("  [4/6] 设置定时发布...")
-                try:
-                    self._set_schedule(page, scheduled_time)
-                except Exception as e:
-                    print(f"    !! 自动设置失败: {e}")
-                    print(f"    目标时间: {scheduled_time}")
-                    print("    请在浏览器中手动设置")
-                    while True:
-                        user_input = input("\n    手动设置完成了吗? (y=继续/n=取消): ").strip().lower()
-                        if user_input == 'y':
-                            break
-                        elif user_input == 'n':
-                            raise Exception("用户取消发布")
+                with timer.step('schedule'):
+                    try:
+                        await self._set_schedule(page, scheduled_time)
+                    except Exception as e:
+                        raise Exception(f"定时发布设置失败: {e}")
             else:
                 print("  [4/6] 跳过定时发布")
 
-            # 7. 设置位置
-            print("  [5/6] 设置位置...")
-            self._set_location(page)
+            with timer.step('options'):
+                # 7. 设置位置
+                print("  [5/6] 设置位置...")
+                await self._set_location(page)
 
-            # 8. 声明原创
-            if config.WECHAT_DECLARE_ORIGINAL:
-                print("  [5.5/6] 声明原创...")
-                self._declare_original(page)
+                # 8. 声明原创
+                if config.WECHAT_DECLARE_ORIGINAL:
+                    print("  [5.5/6] 声明原创...")
+                    await self._declare_original(page)
 
             # 9. 等待上传完成
             print("  [6/6] 等待视频处理...")
-            self._wait_for_upload_ready(page)
+            with timer.step('upload_wait'):
+                upload_seconds = await self._wait_for_upload_ready(page)
 
             # 10. 点击发布
             print("  发布中...")
-            self._click_publish(page)
-            time.sleep(3)
+            with timer.step('publish'):
+                publish_result = await self._click_publish(page)
 
-            print("  >> 发布成功!\n")
+            print(f"  >> 发布成功! ({describe_publish(publish_result)})")
+            saved = WeChatPublisher._blocker.take()
+            print(f"     资源过滤: {format_saved(saved)}\n")
             WeChatPublisher._uploaded_count += 1
-            return {'success': True}
+            return {'success': True, 'item_id': publish_result.get('item_id')}
 
         except Exception as e:
-            error_msg = f"上传失败: {str(e)}"
+            error = str(e)
+            error_msg = f"上传失败: {error}"
             print(f"  !! {error_msg}\n")
             return {'success': False, 'error_message': error_msg}
 
-    def _ensure_login(self):
-        """确保已登录"""
+        finally:
+            self._stop_ready_watch()
+            history.record_attempt(
+                'wechat', ACCOUNT_ID, task_id, video_id, error is None, timer,
+                file_size=file_size, error=error, upload_seconds=upload_seconds,
+                blocked_requests=saved.get('blocked', 0),
+                bytes_saved=saved.get('bytes_saved', 0),
+                item_id=publish_result.get('item_id'),
+                confirmed_by=publish_result.get('confirmed_by'),
+            )
+
+    async def _ensure_login(self):
+        """
+        确保已登录
+        无界面模式下需要扫码时，临时打开浏览器窗口扫码，保存状态后回到无界面模式
+        """
         if WeChatPublisher._browser is not None:
             return True
 
-        from playwright.sync_api import sync_playwright
+        from playwright.async_api import async_playwright
 
         # 加载保存的登录状态
         storage_state = self._load_state()
+        headless = config.WECHAT_HEADLESS
 
-        playwright = sync_playwright().start()
-        browser = playwright.chromium.launch(
-            headless=config.WECHAT_HEADLESS,
+        playwright = await async_playwright().start()
+        browser = await browser_daemon.launch_or_connect_async(
+            playwright,
+            headless=headless,
             channel="chrome"
         )
-
-        if storage_state:
-            context = browser.new_context(storage_state=storage_state)
-            print("  使用保存的登录状态")
-        else:
-            context = browser.new_context()
-            print("  !! 未找到登录状态，需要扫码登录")
-
-        page = context.new_page()
-        page.goto(config.WECHAT_TARGET_URL, timeout=wc.TIMEOUT['page_load'])
-        time.sleep(2)
+        context, page, blocker = await self._open_session(browser, storage_state, headless)
 
         # 检查登录状态
-        login_ok = self._check_login(page)
-
-        if not login_ok:
-            print("\n  需要扫码登录...")
-            print("  请使用微信扫描浏览器中的二维码")
-
-            while True:
-                user_input = input("\n  扫码完成了吗? (y/n): ").strip().lower()
-                if user_input == 'y':
-                    time.sleep(3)
-                    if self._check_login(page):
-                        self._save_state(context)
-                        login_ok = True
-                        break
-                    else:
-                        print("  !! 验证失败，请重试")
-                elif user_input == 'n':
-                    browser.close()
-                    return False
+        login_ok = await self._check_login(page)
+
+        if not login_ok and headless:
+            await browser.close()
+            print("\n  !! 无界面模式下需要扫码，临时打开浏览器窗口")
+            login_browser = await playwright.chromium.launch(headless=False, channel="chrome")
+            login_context, login_page, _ = await self._open_session(login_browser, None, False)
+            scanned = await self._scan_qr_login(login_page, login_context)
+            await login_browser.close()
+
+            if scanned:
+                # 用新的登录状态重新打开无界面浏览器，并确认状态被接受
+                browser = await browser_daemon.launch_or_connect_async(
+                    playwright,
+                    headless=headless,
+                    channel="chrome"
+                )
+                context, page, blocker = await self._open_session(
+                    browser, self._load_state(), headless
+                )
+                login_ok = await self._check_login(page)
+                if not login_ok:
+                    print("  !! 无界面模式未能使用新的登录状态")
+            else:
+                await playwright.stop()
+                return False
+
+        elif not login_ok:
+            # 恢复完整页面以显示二维码
+            await blocker.uninstall()
+            await page.reload(wait_until='domcontentloaded')
+            login_ok = await self._scan_qr_login(page, context)
+            if login_ok:
+                await blocker.install(context, page)
 
         if login_ok:
+            WeChatPublisher._playwright = playwright
             WeChatPublisher._browser = browser
             WeChatPublisher._context = context
             WeChatPublisher._page = page
+            WeChatPublisher._blocker = blocker
             return True
 
-        browser.close()
+        await browser.close()
+        await playwright.stop()
         return False
 
-    def _check_login(self, page):
+    async def _open_session(self, browser, storage_state, headless):
+        """
+        创建上下文并打开视频号后台
+        :return: (context, page, blocker)
+        """
+        options = context_options()
+        options.update(browser_daemon.headless_context_options(browser, headless))
+
+        blocker = ResourceBlocker()
+        if storage_state:
+            context = await browser.new_context(storage_state=storage_state, **options)
+            page = await context.new_page()
+            # 已有登录状态时才拦截图片等资源，扫码登录需要完整页面
+            await blocker.install(context, page)
+            print("  使用保存的登录状态")
+        else:
+            context = await browser.new_context(**options)
+            page = await context.new_page()
+            print("  !! 未找到登录状态，需要扫码登录")
+
+        await page.goto(config.WECHAT_TARGET_URL, wait_until='domcontentloaded',
+                        timeout=wc.TIMEOUT['page_load'])
+        return context, page, blocker
+
+    async def _scan_qr_login(self, page, context):
+        """
+        等待用户扫码登录，成功后保存登录状态
+        :return: 是否登录成功（用户取消返回 False）
+        """
+        print("\n  需要扫码登录...")
+        print("  请使用微信扫描浏览器中的二维码")
+
+        while True:
+            user_input = (await _ainput("\n  扫码完成了吗? (y/n): ")).strip().lower()
+            if user_input == 'y':
+                if await self._check_login(page):
+                    await self._save_state(context)
+                    return True
+                print("  !! 验证失败，请重试")
+            elif user_input == 'n':
+                return False
+
+    async def _check_login(self, page):
         """检查是否已登录"""
         try:
-            page.wait_for_selector('input[type="file"]', timeout=5000)
+            await page.wait_for_selector('input[type="file"]', timeout=5000)
             return True
         except:
             pass
@@ -221,12 +353,12 @@ class WeChatPublisher:
             print(f"  !! 加载状态失败: {e}")
             return None
 
-    def _save_state(self, context):
+    async def _save_state(self, context):
         """保存登录状态"""
         try:
             state_data = {
-                'cookies': context.cookies(),
-                'storage_state': context.storage_state(),
+                'cookies': await context.cookies(),
+                'storage_state': await context.storage_state(),
                 'timestamp': time.time()
             }
             with open(config.WECHAT_STATE_FILE, 'w', encoding='utf-8') as f:
@@ -235,142 +367,155 @@ class WeChatPublisher:
         except Exception as e:
             print(f"  !! 保存状态失败: {e}")
 
-    def _upload_file(self, page, video_path):
+    async def _upload_file(self, page, video_path):
         """上传视频文件"""
         video_path = str(Path(video_path).absolute())
-        file_input = page.locator('input[type="file"]').first
-        if file_input.count() == 0:
+        file_input = page.locator(wc.SELECTORS['file_input']).first
+        try:
+            await waits.wait_attached(file_input, self._timeouts['element_wait'])
+        except Exception:
             raise Exception("未找到文件上传输入框")
-        file_input.set_input_files(video_path)
-        time.sleep(wc.WAIT_TIME['after_upload'])
+        await file_input.set_input_files(video_path)
+        self._upload_started = time.monotonic()
+        self._upload_ready_at = None
+        self._ready_watch = asyncio.ensure_future(self._watch_upload_ready(page))
 
-    def _fill_title(self, page, title):
+        # 选择文件后出现发表表单
+        try:
+            await waits.wait_visible(page.locator(wc.SELECTORS['title_input']).first,
+                                     self._timeouts['element_wait'])
+        except Exception:
+            raise Exception("上传后未出现发表表单")
+
+    async def _fill_title(self, page, title):
         """填写标题"""
         title_input = page.locator(wc.SELECTORS['title_input']).first
-        if title_input.count() == 0:
+        if await title_input.count() == 0:
             raise Exception("未找到标题输入框")
-        title_input.click()
-        title_input.fill(title)
-        time.sleep(wc.WAIT_TIME['after_fill'])
+        await title_input.click()
+        await title_input.fill(title)
 
-    def _fill_description(self, page, description):
+    async def _fill_description(self, page, description):
         """填写描述"""
         editor = page.locator(wc.SELECTORS['description_editor']).first
-        if editor.count() == 0:
+        if await editor.count() == 0:
             raise Exception("未找到描述编辑器")
-        editor.click()
-        editor.fill(description)
-        time.sleep(wc.WAIT_TIME['after_fill'])
+        await editor.click()
+        await editor.fill(description)
 
-    def _set_schedule(self, page, scheduled_time):
-        """设置定时发布"""
+    async def _set_schedule(self, page, scheduled_time):
+        """
+        设置定时发布
+        通过日期面板一次算好翻页次数完成选择，设置后读回页面显示值校验；
+        不一致时重试，仍不一致抛出异常（不等待人工操作）
+        """
         try:
             dt = datetime.strptime(scheduled_time, '%Y-%m-%d %H:%M:%S')
         except ValueError:
             dt = datetime.strptime(scheduled_time, '%Y-%m-%d %H:%M')
-
-        # 1. 点击定时发布开关
-        toggle_locator = page.locator('.weui-desktop-form__check-label')
-        toggle_count = toggle_locator.count()
+        target = dt.strftime('%Y-%m-%d %H:%M')
+
+        await self._enable_schedule(page)
+
+        shown = None
+        for attempt in range(1, config.WECHAT_SCHEDULE_ATTEMPTS + 1):
+            await self._pick_schedule(page, dt)
+            shown = await self._read_schedule(page)
+            if shown == target:
+                print(f"    >> 定时时间: {shown}")
+                return
+            print(f"    !! 定时时间校验不一致 (第{attempt}次): 页面 {shown}，目标 {target}")
+        raise Exception(f"定时时间校验失败: 页面 {shown}，目标 {target}")
+
+    async def _enable_schedule(self, page):
+        """打开定时发布开关"""
+        toggle_locator = page.locator(wc.SELECTORS['schedule_toggle'])
+        toggle_count = await toggle_locator.count()
         if toggle_count == 0:
             raise Exception("未找到定时发布选项")
 
         confirm_label = page.locator('.label').filter(has_text='发表时间')
+        if await confirm_label.count() > 0 and await confirm_label.first.is_visible():
+            return
 
-        if not (confirm_label.count() > 0 and confirm_label.first.is_visible()):
-            success = False
-            for idx in range(toggle_count):
-                toggle = toggle_locator.nth(idx)
-                try:
-                    toggle.wait_for(state='visible', timeout=5000)
-                except:
-                    continue
-                toggle.click()
-                page.wait_for_timeout(300)
-                if confirm_label.count() > 0:
-                    try:
-                        if confirm_label.first.is_visible():
-                            success = True
-                            break
-                    except:
-                        pass
-            if not success:
-                raise Exception("无法开启定时发布")
-
-        # 2. 打开日期选择面板
-        date_input = page.locator(
-            '.weui-desktop-picker__date-time input.weui-desktop-form__input'
-        ).first
-        if date_input.count() == 0:
+        for idx in range(toggle_count):
+            toggle = toggle_locator.nth(idx)
+            try:
+                await toggle.wait_for(state='visible', timeout=5000)
+            except:
+                continue
+            await toggle.click()
+            try:
+                await waits.wait_visible(confirm_label.first, 1000)
+                return
+            except Exception:
+                pass
+        raise Exception("无法开启定时发布")
+
+    async def _pick_schedule(self, page, dt):
+        """在日期面板中选择日期和时间"""
+        # 1. 打开日期选择面板
+        date_input = page.locator(SCHEDULE_DATE_INPUT).first
+        if await date_input.count() == 0:
             raise Exception("未找到日期输入框")
-        date_input.click()
-        time.sleep(0.5)
+        await date_input.click()
 
-        # 3. 等待日期面板
         day_panel = page.locator('.weui-desktop-picker__panel_day:visible').first
         try:
-            day_panel.wait_for(state='visible', timeout=5000)
+            await day_panel.wait_for(state='visible', timeout=5000)
         except:
             raise Exception("日期选择面板未打开")
 
-        # 4. 导航到目标月份
-        def get_current_ym():
-            labels = day_panel.locator('.weui-desktop-picker__panel__label')
-            year_text = labels.nth(0).inner_text().strip().rstrip('年')
-            month_text = labels.nth(1).inner_text().strip().rstrip('月')
-            return int(year_text), int(month_text)
+        # 2. 读一次当前年月，算出翻页方向和次数后连续点击
+        labels = day_panel.locator('.weui-desktop-picker__panel__label')
+
+        async def current_serial():
+            year_text, month_text = (await labels.all_inner_texts())[:2]
+            return int(year_text.strip().rstrip('年')) * 12 + int(month_text.strip().rstrip('月'))
 
         target_serial = dt.year * 12 + dt.month
-        for _ in range(36):
-            cy, cm = get_current_ym()
-            current_serial = cy * 12 + cm
-            if current_serial == target_serial:
-                break
-            elif current_serial < target_serial:
-                btn = day_panel.locator(
-                    '.weui-desktop-picker__panel__action.weui-desktop-picker__panel__action_next'
-                )
-                if btn.count() > 0:
-                    btn.click()
-                    time.sleep(0.3)
-            else:
-                btn = day_panel.locator(
-                    '.weui-desktop-picker__panel__action.weui-desktop-picker__panel__action_prev'
-                )
-                if btn.count() > 0:
-                    btn.click()
-                    time.sleep(0.3)
-
-        # 5. 选择日期
-        day_text = str(dt.day)
-        day_candidates = day_panel.locator(f'a:has-text("{day_text}")')
-        found = False
-        for idx in range(day_candidates.count()):
-            candidate = day_candidates.nth(idx)
-            classes = (candidate.get_attribute('class') or '')
-            if 'disabled' in classes:
-                continue
-            candidate.click()
-            page.wait_for_timeout(200)
-            found = True
-            break
-        if not found:
+        delta = target_serial - await current_serial()
+        if abs(delta) > 36:
+            raise Exception(f"目标月份超出范围: {dt.year}-{dt.month:02d}")
+        if delta:
+            action = 'next' if delta > 0 else 'prev'
+            btn = day_panel.locator(
+                f'.weui-desktop-picker__panel__action.weui-desktop-picker__panel__action_{action}'
+            ).first
+            for _ in range(abs(delta)):
+                await btn.click()
+            await page.wait_for_function(
+                """([target]) => {
+                    const panel = Array.from(document.querySelectorAll('.weui-desktop-picker__panel_day'))
+                        .find(el => el.offsetParent !== null);
+                    if (!panel) return false;
+                    const [y, m] = Array.from(panel.querySelectorAll('.weui-desktop-picker__panel__label'))
+                        .map(el => parseInt(el.innerText));
+                    return y * 12 + m === target;
+                }""",
+                arg=[target_serial],
+                timeout=waits.timeout_ms(2000)
+            )
+
+        # 3. 选择日期（文字完全等于日期且未禁用的格子）
+        day_cell = day_panel.locator('a:not([class*="disabled"])').filter(
+            has_text=re.compile(rf'^\s*{dt.day}\s*$')
+        ).first
+        if await day_cell.count() == 0:
             raise Exception(f"未找到日期: {dt.day}日")
+        await day_cell.click()
 
-        # 6. 设置时间
-        time_input = day_panel.locator(
-            '.weui-desktop-picker__time input.weui-desktop-form__input'
-        ).first
+        # 4. 设置时间
+        time_input = day_panel.locator(SCHEDULE_TIME_INPUT).first
         try:
-            time_input.wait_for(state='visible', timeout=2000)
-            time_input.click()
-            page.wait_for_timeout(200)
+            await waits.wait_visible(time_input, 2000)
+            await time_input.click()
         except:
             raise Exception("未找到时间输入框")
 
         time_panel = day_panel.locator('.weui-desktop-picker__dd__time:visible').first
         try:
-            time_panel.wait_for(state='visible', timeout=2000)
+            await time_panel.wait_for(state='visible', timeout=2000)
         except:
             raise Exception("时间面板未展开")
 
@@ -379,114 +524,222 @@ class WeChatPublisher:
         hour_option = time_panel.locator(
             '.weui-desktop-picker__time__hour li'
         ).filter(has_text=hour_text)
-        if hour_option.count() == 0:
+        if await hour_option.count() == 0:
             raise Exception(f"未找到小时: {hour_text}")
-        hour_option.first.click()
-        page.wait_for_timeout(200)
+        await hour_option.first.click()
+        await waits.wait_dom_settled(page, '.weui-desktop-picker__dd__time', 100, 1000)
 
         # 分钟
         minute_text = f"{dt.minute:02d}"
         minute_option = time_panel.locator(
             '.weui-desktop-picker__time__minute li'
         ).filter(has_text=minute_text)
-        if minute_option.count() == 0:
+        if await minute_option.count() == 0:
             raise Exception(f"未找到分钟: {minute_text}")
-        minute_option.first.click()
-        page.wait_for_timeout(200)
+        await minute_option.first.click()
+        await waits.wait_dom_settled(page, '.weui-desktop-picker__dd__time', 100, 1000)
 
         # 确认
         time_icon = day_panel.locator(
             '.weui-desktop-picker__time i.weui-desktop-icon__time'
         ).first
         try:
-            if time_icon.is_visible():
-                time_icon.click()
-                page.wait_for_timeout(200)
+            if await time_icon.is_visible():
+                await time_icon.click()
+                await waits.wait_hidden(time_panel, 1000)
         except:
             pass
 
-    def _set_location(self, page):
+    async def _read_schedule(self, page):
+        """
+        读回页面上的定时时间
+        :return: 'YYYY-MM-DD HH:MM'，读不到返回页面原始文字
+        """
+        date_text, time_text = await page.evaluate(
+            """([dateSel, timeSel]) => [dateSel, timeSel].map(sel => {
+                const el = document.querySelector(sel);
+                return el ? el.value : '';
+            })""",
+            [SCHEDULE_DATE_INPUT, SCHEDULE_TIME_INPUT]
+        )
+        raw = f"{date_text} {time_text}".strip()
+        date_match = re.search(r'(\d{4})\D+(\d{1,2})\D+(\d{1,2})', date_text)
+        time_match = re.search(r'(\d{1,2}):(\d{2})', time_text) or \
+            re.search(r'(\d{1,2}):(\d{2})', date_text)
+        if not date_match or not time_match:
+            return raw
+        y, m, d = (int(x) for x in date_match.groups())
+        hh, mm = (int(x) for x in time_match.groups())
+        return f"{y:04d}-{m:02d}-{d:02d} {hh:02d}:{mm:02d}"
+
+    async def _set_location(self, page):
         """设置位置（隐藏）"""
         if config.WECHAT_SHOW_LOCATION:
             return
         try:
-            dropdown = page.locator(wc.SELECTORS['position_dropdown']).first
-            if dropdown.count() > 0:
-                dropdown.click()
-                time.sleep(wc.WAIT_TIME['after_click'])
-                option = page.locator(wc.SELECTORS['position_option']).filter(
-                    has_text=config.WECHAT_LOCATION_TEXT
-                ).first
-                if option.count() > 0:
-                    option.click()
-                    time.sleep(wc.WAIT_TIME['after_click'])
+            state = await dom_snapshot.snapshot(page, {
+                'dropdown': wc.SELECTORS['position_dropdown'],
+            })
+            dropdown = state['dropdown']
+            # 下拉框不存在或已经是目标选项时不用操作
+            if dropdown['count'] == 0 or config.WECHAT_LOCATION_TEXT in dropdown['text']:
+                return
+
+            await dom_snapshot.locator(page, 'dropdown').click()
+            option = page.locator(wc.SELECTORS['position_option']).filter(
+                has_text=config.WECHAT_LOCATION_TEXT
+            ).first
+            await waits.wait_visible(option, self._timeouts['element_wait'])
+            await option.click()
+            await waits.wait_hidden(option, self._timeouts['element_wait'])
         except:
             pass  # 位置设置失败不影响发布
 
-    def _declare_original(self, page):
+    async def _original_snapshot(self, page):
+        """原创声明相关元素的状态（一次读取）"""
+        dialog = wc.SELECTORS['original_dialog']
+        return await dom_snapshot.snapshot(page, {
+            'checkbox1': (wc.SELECTORS['original_checkbox_1'],
+                          wc.SELECTORS['original_checkbox_1_text']),
+            'checkbox1_checked': wc.SELECTORS['original_checkbox_1_checked'],
+            'dialog': dialog,
+            'checkbox2': f"{dialog} {wc.SELECTORS['original_checkbox_2']}",
+            'checkbox2_checked': f"{dialog} {wc.SELECTORS['original_checkbox_2_checked']}",
+            'confirm': (f"{dialog} {wc.SELECTORS['original_confirm_btn']}",
+                        wc.SELECTORS['original_confirm_text']),
+        })
+
+    async def _declare_original(self, page):
         """声明原创"""
         try:
-            checkbox1 = page.locator(wc.SELECTORS['original_checkbox_1']).filter(
-                has_text=wc.SELECTORS['original_checkbox_1_text']
-            ).first
-            if checkbox1.count() > 0:
-                checked = page.locator(wc.SELECTORS['original_checkbox_1_checked']).count() > 0
-                if not checked:
-                    checkbox1.click()
-                    time.sleep(wc.WAIT_TIME['after_click'])
-
-            dialog = page.locator(wc.SELECTORS['original_dialog'])
-            if dialog.count() > 0:
-                checkbox2 = page.locator(wc.SELECTORS['original_checkbox_2']).first
-                if checkbox2.count() > 0:
-                    checked2 = page.locator(wc.SELECTORS['original_checkbox_2_checked']).count() > 0
-                    if not checked2:
-                        checkbox2.click()
-                        time.sleep(wc.WAIT_TIME['after_click'])
-
-                confirm_selector = (
-                    f"{wc.SELECTORS['original_dialog']} "
-                    f"{wc.SELECTORS['original_confirm_btn']}"
-                    f"{wc.SELECTORS['original_confirm_btn_not_disabled']}"
-                )
-                confirm_btn = page.locator(confirm_selector).filter(
-                    has_text=wc.SELECTORS['original_confirm_text']
-                ).first
-                if confirm_btn.count() > 0:
-                    confirm_btn.click()
-                    time.sleep(wc.WAIT_TIME['after_click'])
+            state = await self._original_snapshot(page)
+
+            if state['checkbox1']['count'] > 0 and state['checkbox1_checked']['count'] == 0:
+                await dom_snapshot.locator(page, 'checkbox1').click()
+                # 勾选后弹出原创声明对话框
+                try:
+                    await waits.wait_visible(
+                        page.locator(wc.SELECTORS['original_dialog']).first,
+                        self._timeouts['element_wait']
+                    )
+                except Exception:
+                    pass
+                state = await self._original_snapshot(page)
+
+            if state['dialog']['count'] == 0:
+                return
+
+            ticked = False
+            if state['checkbox2']['count'] > 0 and state['checkbox2_checked']['count'] == 0:
+                await dom_snapshot.locator(page, 'checkbox2').click()
+                ticked = True
+
+            if state['confirm']['count'] > 0:
+                confirm_btn = dom_snapshot.locator(page, 'confirm')
+                if ticked or not dom_snapshot.ready(state['confirm']):
+                    # 勾选协议后确认按钮才可用
+                    confirm_selector = (
+                        f"{wc.SELECTORS['original_dialog']} "
+                        f"{wc.SELECTORS['original_confirm_btn']}"
+                        f"{wc.SELECTORS['original_confirm_btn_not_disabled']}"
+                    )
+                    confirm_btn = page.locator(confirm_selector).filter(
+                        has_text=wc.SELECTORS['original_confirm_text']
+                    ).first
                     try:
-                        dialog.first.wait_for(state='detached', timeout=5000)
-                    except:
+                        await waits.wait_visible(confirm_btn, self._timeouts['element_wait'])
+                    except Exception:
                         pass
+                await confirm_btn.click()
+                try:
+                    await page.locator(wc.SELECTORS['original_dialog']).first.wait_for(
+                        state='detached', timeout=5000
+                    )
+                except:
+                    pass
         except:
             pass  # 原创声明失败不影响发布
 
-    def _wait_for_upload_ready(self, page):
-        """等待视频处理完成"""
-        publish_btn = page.locator(
+    def _publish_button(self, page):
+        """可点击的发表按钮（视频处理完成前为禁用状态）"""
+        return page.locator(
             f"{wc.SELECTORS['publish_button']}:not(.weui-desktop-btn_disabled)"
         ).filter(has_text=wc.SELECTORS['publish_button_text']).first
-        publish_btn.wait_for(state='visible', timeout=wc.TIMEOUT['upload'])
 
-    def _click_publish(self, page):
-        """点击发布按钮"""
-        publish_btn = page.locator(
-            f"{wc.SELECTORS['publish_button']}:not(.weui-desktop-btn_disabled)"
-        ).filter(has_text=wc.SELECTORS['publish_button_text']).first
-        if publish_btn.count() == 0:
+    async def _watch_upload_ready(self, page):
+        """后台等待发表按钮可用，出现时立即记录时间（此时可能还在填写表单）"""
+        await self._publish_button(page).wait_for(state='visible', timeout=0)
+        self._upload_ready_at = time.monotonic()
+
+    def _stop_ready_watch(self):
+        """停止后台等待"""
+        watch, self._ready_watch = self._ready_watch, None
+        if watch is None:
+            return
+        if not watch.done():
+            watch.cancel()
+        elif not watch.cancelled():
+            watch.exception()   # 已取走异常，避免事件循环报告未处理的异常
+
+    async def _wait_for_upload_ready(self, page):
+        """
+        等待视频处理完成（上传超时从选择文件开始计时）
+        :return: 从选择文件到发表按钮可用的秒数（不含填写表单后等待的时间）
+        """
+        started = self._upload_started or time.monotonic()
+        if self._ready_watch is None:
+            self._ready_watch = asyncio.ensure_future(self._watch_upload_ready(page))
+        remaining = self._timeouts['upload'] - (time.monotonic() - started) * 1000
+        try:
+            await asyncio.wait_for(asyncio.shield(self._ready_watch),
+                                   max(remaining, 1000) / 1000)
+        except Exception:
+            raise Exception(f"视频处理超时 ({self._timeouts['upload'] / 1000:.0f}秒)")
+        finally:
+            self._stop_ready_watch()
+        return round(self._upload_ready_at - started, 2)
+
+    async def _click_publish(self, page):
+        """
+        点击发布按钮，并以发表接口响应或成功跳转确认结果
+        :return: {'confirmed_by', 'item_id', 'elapsed'}
+        """
+        publish_btn = self._publish_button(page)
+        if await publish_btn.count() == 0:
             raise Exception("未找到发布按钮")
-        publish_btn.click()
-        time.sleep(wc.WAIT_TIME['after_click'])
-        time.sleep(3)
+
+        # 点击前开始监听发表接口响应和页面跳转
+        watcher = PublishWatcher(
+            page, config.WECHAT_PUBLISH_API_PATTERN,
+            config.WECHAT_PUBLISH_SUCCESS_URL, config.WECHAT_PUBLISH_ID_KEYS
+        )
+        try:
+            await publish_btn.click()
+        except Exception:
+            watcher.close()
+            raise
+        return await watcher.wait()
 
     @classmethod
     def cleanup(cls):
         """清理浏览器资源"""
         if cls._browser:
             print("\n  关闭浏览器...")
-            cls._browser.close()
-            cls._browser = None
-            cls._context = None
-            cls._page = None
-            cls._uploaded_count = 0
+            cls._run(cls.cleanup_async())
+        if cls._loop is not None and not cls._loop.is_closed():
+            cls._loop.close()
+            cls._loop = None
+
+    @classmethod
+    async def cleanup_async(cls):
+        """清理浏览器资源（async 版本）"""
+        if cls._browser:
+            await cls._browser.close()
+        if cls._playwright:
+            await cls._playwright.stop()
+        cls._playwright = None
+        cls._browser = None
+        cls._context = None
+        cls._page = None
+        cls._blocker = None
+        cls._uploaded_count = 0
@@ -45,11 +45,3 @@ TIMEOUT = {
     'element_wait': 10000,
     'login_wait': 300000,
 }
-
-# ==================== 等待时间（秒）====================
-WAIT_TIME = {
-    'after_upload': 2,
-    'after_fill': 1,
-    'after_click': 1,
-    'after_page_load': 3,
-}
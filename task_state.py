@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+任务状态管理模块
+任务表常驻内存，状态变更和新增任务以 JSONL 记录追加到 <任务文件>.log（每条都落盘），
+每累计一定条数合并回任务文件快照，不再每次变更都重写整个任务表。
+执行中的任务带租约（lease_owner / lease_expires），运行期间后台续约；
+进程崩溃或被终止后租约过期，下次运行时任务自动恢复为 pending
+"""
+
+import os
+import json
+import time
+import socket
+import threading
+from contextlib import contextmanager
+
+import config
+import file_cache
+
+
+# 可以领取的状态 / 执行中的状态（抖音 processing，视频号 publishing）
+CLAIMABLE_STATUSES = ('pending', 'failed')
+RUNNING_STATUSES = ('processing', 'publishing')
+# 已完成的状态（抖音 completed，视频号 published）
+DONE_STATUSES = ('completed', 'published')
+# 日期已过仍未执行的任务，不再执行，占用的视频已放回待排期队列
+EXPIRED_STATUS = 'expired'
+# 不再执行的状态
+CLOSED_STATUSES = DONE_STATUSES + (EXPIRED_STATUS,)
+
+
+def lease_owner():
+    """当前进程的租约标识 '主机名:进程号'"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _owner_alive(owner):
+    """
+    租约持有进程是否还在运行
+    只能判断本机进程；其他主机或非 POSIX 系统一律视为在运行，等租约自然过期
+    """
+    host, _, pid = (owner or '').rpartition(':')
+    if host != socket.gethostname() or not pid.isdigit() or os.name != 'posix':
+        return True
+    if int(pid) == os.getpid():
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+
+def lease_expired(task, now=None):
+    """
+    执行中的任务租约是否已失效
+    租约到期、持有进程已退出、或没有租约字段（旧版本留下的任务）都算失效
+    """
+    if task.get('status') not in RUNNING_STATUSES:
+        return False
+    expires = task.get('lease_expires')
+    if not expires or float(expires) <= (now or time.time()):
+        return True
+    return not _owner_alive(task.get('lease_owner'))
+
+
+def is_claimable(task, now=None):
+    """任务是否可以执行（待发布、失败，或租约失效的执行中任务）"""
+    return task.get('status') in CLAIMABLE_STATUSES or lease_expired(task, now)
+
+
+def log_file_for(tasks_file):
+    """任务文件对应的变更日志路径"""
+    return tasks_file + '.log'
+
+
+def _cache_key(tasks_file):
+    return (tasks_file, log_file_for(tasks_file))
+
+
+def _read_log(log_file):
+    """读取变更日志；崩溃时写了一半的末尾记录会被截掉"""
+    records = []
+    if not os.path.exists(log_file):
+        return records
+    valid_size = 0
+    with open(log_file, 'rb') as f:
+        for raw in f:
+            if not raw.endswith(b'\n'):
+                break
+            line = raw.strip()
+            if line:
+                try:
+                    records.append(json.loads(line.decode('utf-8')))
+                except ValueError:
+                    break
+            valid_size += len(raw)
+    if valid_size < os.path.getsize(log_file):
+        with open(log_file, 'r+b') as f:
+            f.truncate(valid_size)
+    return records
+
+
+def _apply(table, index, record):
+    if 'task' in record:
+        # 新增任务（增量生成）
+        if record['task_id'] not in index:
+            table.setdefault('tasks', []).append(record['task'])
+            index[record['task_id']] = record['task']
+        return
+    task = index.get(record.get('task_id'))
+    if task is not None:
+        task.update(record.get('fields', {}))
+
+
+def _load(tasks_file):
+    """回放“快照 + 日志”得到任务表（在跨进程锁内读取，不会读到合并到一半的快照和日志）"""
+    if not os.path.exists(tasks_file):
+        # 还没有保存过（目录可能也不存在），不用加锁
+        return None
+    with file_cache.file_lock(tasks_file):
+        if not os.path.exists(tasks_file):
+            return None
+        with open(tasks_file, 'r', encoding='utf-8') as f:
+            content = f.read().strip()
+            if not content:
+                return None
+            table = json.loads(content)
+        records = _read_log(log_file_for(tasks_file))
+    index = {t['task_id']: t for t in table.get('tasks', [])}
+    for record in records:
+        _apply(table, index, record)
+    _update_summary(table)
+    return table
+
+
+def _update_summary(table):
+    if isinstance(table.get('summary'), dict):
+        table['summary']['total_tasks'] = len(table.get('tasks', []))
+
+
+def load_table(tasks_file):
+    """
+    读取任务表（含日志中尚未合并的状态变更）
+    :return: 任务表字典，不存在返回 None
+    """
+    return file_cache.load(_cache_key(tasks_file), lambda: _load(tasks_file))
+
+
+def save_table(tasks_file, table):
+    """整体写入任务表并清空旧日志（生成新任务表时使用）"""
+    with file_cache.file_lock(tasks_file):
+        file_cache.write_json_atomic(tasks_file, table)
+        log_file = log_file_for(tasks_file)
+        if os.path.exists(log_file):
+            os.remove(log_file)
+        file_cache.update(_cache_key(tasks_file), table)
+
+
+class TaskStateManager:
+    """
+    任务状态管理器
+    用法:
+        state = TaskStateManager(task_store.partition_file('douyin', date))
+        state.recover_expired()
+        with state.lease(task_id, 'processing') as claimed:
+            if claimed is None:
+                continue    # 已被其他进程领取
+            ...
+        state.release(task_id, 'completed')
+        state.close()
+    """
+
+    def __init__(self, tasks_file, snapshot_every=None):
+        self.tasks_file = tasks_file
+        self.log_file = log_file_for(tasks_file)
+        self.snapshot_every = snapshot_every or config.TASK_LOG_SNAPSHOT_EVERY
+        self.owner = lease_owner()
+        self._lock = threading.RLock()
+        self.table = load_table(tasks_file)
+        self._index = {t['task_id']: t for t in self.table.get('tasks', [])} if self.table else {}
+        self._log_count = len(_read_log(self.log_file))
+
+    @property
+    def tasks(self):
+        """任务列表"""
+        return self.table.get('tasks', []) if self.table else []
+
+    def get(self, task_id):
+        """根据ID获取任务"""
+        return self._index.get(task_id)
+
+    def update(self, task_id, **fields):
+        """
+        更新任务字段（先落盘日志，再改内存）
+        :return: 更新后的任务，任务不存在返回 None
+        """
+        with file_cache.file_lock(self.tasks_file), self._lock:
+            task = self._index.get(task_id)
+            if task is None:
+                return None
+
+            record = {'task_id': task_id, 'fields': fields}
+            with open(self.log_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+            task.update(fields)
+            self._log_count += 1
+            # 日志里可能还有其他进程写入、本任务表没有回放的记录，不能把当前签名记到这份数据上
+            file_cache.invalidate(_cache_key(self.tasks_file))
+
+            if self._log_count >= self.snapshot_every:
+                self.snapshot()
+            return task
+
+    def add_tasks(self, tasks):
+        """
+        追加新任务（只写日志，不重写任务表；已有的任务不受影响）
+        :return: 实际新增的任务数（任务ID已存在的跳过）
+        """
+        with file_cache.file_lock(self.tasks_file), self._lock:
+            if self.table is None:
+                return 0
+            if len(self._index) != len(self.table.get('tasks', [])):
+                self._index = {t['task_id']: t for t in self.table.get('tasks', [])}
+            tasks = [t for t in tasks if t['task_id'] not in self._index]
+            if not tasks:
+                return 0
+
+            with open(self.log_file, 'a', encoding='utf-8') as f:
+                for task in tasks:
+                    f.write(json.dumps({'task_id': task['task_id'], 'task': task},
+                                       ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+            for task in tasks:
+                _apply(self.table, self._index, {'task_id': task['task_id'], 'task': task})
+            _update_summary(self.table)
+            self._log_count += len(tasks)
+            # 日志里可能还有其他进程写入、本任务表没有回放的记录，不能把当前签名记到这份数据上
+            file_cache.invalidate(_cache_key(self.tasks_file))
+
+            if self._log_count >= self.snapshot_every:
+                self.snapshot()
+            return len(tasks)
+
+    def recover_expired(self):
+        """
+        把租约失效的执行中任务恢复为 pending（上次运行崩溃或被终止时留下的）
+        :return: 恢复的任务列表
+        """
+        recovered = []
+        with file_cache.file_lock(self.tasks_file), self._lock:
+            now = time.time()
+            for task in self.tasks:
+                if not lease_expired(task, now):
+                    continue
+                # 按磁盘上的最新状态再判断一次，其他进程可能刚领取或续约了这个任务
+                self._reload_task(task['task_id'])
+                if not lease_expired(task, now):
+                    continue
+                self.update(
+                    task['task_id'],
+                    status='pending',
+                    recovered_from=task['status'],
+                    recovered_at=time.strftime('%Y-%m-%d %H:%M:%S'),
+                    lease_owner=None,
+                    lease_expires=None,
+                )
+                recovered.append(task)
+        return recovered
+
+    def expire_open(self):
+        """
+        把尚未执行的任务（待发布、失败、租约失效）标记为 expired，用于日期已过的任务表
+        正在执行（租约有效）的任务不受影响
+        :return: 过期的任务列表
+        """
+        expired = []
+        with file_cache.file_lock(self.tasks_file), self._lock:
+            now = time.time()
+            for task in self.tasks:
+                self._reload_task(task['task_id'])
+                if not is_claimable(task, now):
+                    continue
+                self.update(
+                    task['task_id'],
+                    status=EXPIRED_STATUS,
+                    expired_from=task['status'],
+                    expired_at=time.strftime('%Y-%m-%d %H:%M:%S'),
+                    lease_owner=None,
+                    lease_expires=None,
+                )
+                expired.append(task)
+        return expired
+
+    def _reload_task(self, task_id):
+        """从“快照 + 日志”重新读取任务，合并其他进程写入的变更"""
+        task = self._index.get(task_id)
+        on_disk = _load(self.tasks_file)
+        for disk_task in (on_disk or {}).get('tasks', []):
+            if disk_task['task_id'] == task_id:
+                if task is not None:
+                    task.update(disk_task)
+                break
+        return task
+
+    def claim(self, task_id, status, **fields):
+        """
+        领取任务：设为执行中状态并写入租约
+        在跨进程锁内按磁盘上的最新状态判断，任务已被其他进程领取或已完成时不领取
+        :return: 领取到的任务，未领取返回 None
+        """
+        with file_cache.file_lock(self.tasks_file), self._lock:
+            task = self._reload_task(task_id)
+            if task is None or not is_claimable(task):
+                return None
+            return self.update(
+                task_id,
+                status=status,
+                lease_owner=self.owner,
+                lease_expires=time.time() + config.TASK_LEASE_SECONDS,
+                **fields
+            )
+
+    def heartbeat(self, task_id):
+        """
+        续约
+        :return: 租约仍归当前进程时返回 True
+        """
+        with self._lock:
+            task = self.get(task_id)
+            if task is None or task.get('lease_owner') != self.owner:
+                return False
+            self.update(task_id, lease_expires=time.time() + config.TASK_LEASE_SECONDS)
+            return True
+
+    def release(self, task_id, status, **fields):
+        """结束任务：写入最终状态并清除租约"""
+        return self.update(task_id, status=status, lease_owner=None, lease_expires=None, **fields)
+
+    @contextmanager
+    def lease(self, task_id, status, **fields):
+        """
+        领取任务并在执行期间由后台线程定期续约，yield 领取到的任务
+        任务已被其他进程领取或已完成时 yield None，调用方应跳过该任务
+        结束后调用方用 release() 写入最终状态；未 release 时任务保持执行中，租约到期后可被恢复
+        """
+        task = self.claim(task_id, status, **fields)
+        if task is None:
+            yield None
+            return
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(config.TASK_HEARTBEAT_INTERVAL):
+                self.heartbeat(task_id)
+
+        thread = threading.Thread(target=beat, daemon=True)
+        thread.start()
+        try:
+            yield task
+        finally:
+            stop.set()
+            thread.join()
+
+    def snapshot(self):
+        """
+        把日志合并回任务文件并清空日志
+        合并前先回放磁盘上的“快照 + 日志”：其他进程写入的状态变更和新增任务（增量生成）一并保留
+        """
+        with file_cache.file_lock(self.tasks_file), self._lock:
+            if self.table is None:
+                return
+            # 任务表可能与同进程的其他管理器共享（经文件缓存），按任务列表重建索引
+            self._index = {t['task_id']: t for t in self.table.get('tasks', [])}
+            # 本进程的变更都先写入了日志，磁盘上的回放结果包含所有进程的最新状态
+            on_disk = _load(self.tasks_file)
+            for task in (on_disk or {}).get('tasks', []):
+                if task['task_id'] in self._index:
+                    self._index[task['task_id']].update(task)
+                else:
+                    _apply(self.table, self._index, {'task_id': task['task_id'], 'task': task})
+            _update_summary(self.table)
+            save_table(self.tasks_file, self.table)
+            self._log_count = 0
+
+    def close(self):
+        """结束时合并日志"""
+        if self._log_count:
+            self.snapshot()
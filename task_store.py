@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多日任务存储
+任务表按平台和日期分区保存为 tasks/<平台>/<YYYY-MM-DD>.json（每个分区各自带变更日志，见 task_state），
+同目录的 index.json 记录每个日期的任务数和未完成数。
+可以提前生成多天的任务，执行时只加载仍有未完成任务的日期分区
+"""
+
+import os
+import re
+import time
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+import config
+import file_cache
+import task_state
+import videos
+
+PLATFORMS = ('douyin', 'wechat')
+
+_DATE_FILE = re.compile(r'^(\d{4}-\d{2}-\d{2})\.json$')
+_LEGACY_FILES = {
+    'douyin': lambda: config.DOUYIN_TASKS_FILE,
+    'wechat': lambda: config.WECHAT_TASKS_FILE,
+}
+
+_lock = threading.RLock()
+_migrated = set()
+
+
+def partition_dir(platform):
+    """平台的分区目录"""
+    return config.TASK_PARTITION_DIRS[platform]
+
+
+def partition_file(platform, date):
+    """某平台某日期的任务文件"""
+    return os.path.join(partition_dir(platform), f'{date}.json')
+
+
+def index_file(platform):
+    """平台的日期索引文件"""
+    return os.path.join(partition_dir(platform), 'index.json')
+
+
+def _summarize(table):
+    tasks = table.get('tasks', []) if table else []
+    open_count = sum(1 for t in tasks if t.get('status') not in task_state.CLOSED_STATUSES)
+    return {
+        'total': len(tasks),
+        'open': open_count,
+        'updated_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+
+
+def _scan_dates(platform):
+    """索引缺失时从分区文件重建"""
+    dates = {}
+    directory = partition_dir(platform)
+    if not os.path.isdir(directory):
+        return dates
+    for name in os.listdir(directory):
+        m = _DATE_FILE.match(name)
+        if m:
+            dates[m.group(1)] = _summarize(task_state.load_table(os.path.join(directory, name)))
+    return dates
+
+
+def _read_index(platform):
+    path = index_file(platform)
+    data = file_cache.load_json(path)
+    if data is None:
+        data = {'dates': _scan_dates(platform)}
+        if data['dates']:
+            with file_cache.file_lock(path):
+                file_cache.save_json(path, data)
+    return data
+
+
+def load_index(platform):
+    """
+    读取日期索引
+    :return: {'YYYY-MM-DD': {'total', 'open', 'updated_at'}}
+    """
+    _migrate_legacy(platform)
+    with _lock:
+        return dict(_read_index(platform).get('dates', {}))
+
+
+def _save_index(platform, **changes):
+    # 规划和执行可能在不同进程中同时更新索引，读改写在跨进程锁内完成
+    os.makedirs(partition_dir(platform), exist_ok=True)
+    with _lock, file_cache.file_lock(index_file(platform)):
+        data = dict(_read_index(platform))
+        data.update(changes)
+        file_cache.save_json(index_file(platform), data)
+
+
+def _set_index_entry(platform, date, table):
+    _migrate_legacy(platform)
+    os.makedirs(partition_dir(platform), exist_ok=True)
+    with _lock, file_cache.file_lock(index_file(platform)):
+        dates = dict(_read_index(platform).get('dates', {}))
+        if table is None:
+            dates.pop(date, None)
+        else:
+            dates[date] = _summarize(table)
+        _save_index(platform, dates=dict(sorted(dates.items())))
+
+
+def _migrate_legacy(platform):
+    """把旧版单文件任务表移入对应日期的分区（每个进程只检查一次）"""
+    with _lock:
+        if platform in _migrated:
+            return
+        _migrated.add(platform)
+
+        legacy = _LEGACY_FILES[platform]()
+        if not os.path.exists(legacy):
+            return
+        table = task_state.load_table(legacy)
+        date = table.get('target_date') if table else None
+        if date and not os.path.exists(partition_file(platform, date)):
+            save_partition(platform, date, table)
+            print(f"  >> 已将旧任务表迁移到分区: {platform}/{date}")
+        elif date:
+            print(f"  !! 分区 {platform}/{date} 已存在，旧任务表 {legacy} 未迁移")
+            return
+        for path in (legacy, task_state.log_file_for(legacy)):
+            if os.path.exists(path):
+                os.remove(path)
+        file_cache.invalidate((legacy, task_state.log_file_for(legacy)))
+
+
+def load_partition(platform, date):
+    """
+    读取某日期的任务表
+    :return: 任务表字典，不存在返回 None
+    """
+    _migrate_legacy(platform)
+    return task_state.load_table(partition_file(platform, date))
+
+
+def save_partition(platform, date, table):
+    """整体写入某日期的任务表并更新索引"""
+    os.makedirs(partition_dir(platform), exist_ok=True)
+    task_state.save_table(partition_file(platform, date), table)
+    _set_index_entry(platform, date, table)
+
+
+def append_tasks(platform, date, tasks):
+    """
+    向已有的任务表追加任务（写入变更日志，已有任务和执行中的任务不受影响）
+    :return: 新增的任务数
+    """
+    state = task_state.TaskStateManager(partition_file(platform, date))
+    added = state.add_tasks(tasks)
+    _set_index_entry(platform, date, state.table)
+    return added
+
+
+def _today():
+    return datetime.now().strftime('%Y-%m-%d')
+
+
+def open_dates(platform, until=None, include_past=False):
+    """
+    仍有未完成任务的日期（升序）
+    :param until: 'YYYY-MM-DD'，只返回不晚于该日期的
+    :param include_past: 是否包括今天以前的日期（默认不包括，过去的任务由 expire_past 关闭）
+    """
+    since = None if include_past else _today()
+    return sorted(d for d, info in load_index(platform).items()
+                  if info.get('open') and (until is None or d <= until)
+                  and (since is None or d >= since))
+
+
+def expire_past(platform, today=None):
+    """
+    把今天以前仍未执行的任务标记为 expired，占用的视频放回待排期队列
+    过去的日期不再执行（定时时间已过），视频由之后的排期重新分配
+    :return: 过期的任务数
+    """
+    today = today or _today()
+    total = 0
+    for date in open_dates(platform, include_past=True):
+        if date >= today:
+            break
+        state = task_state.TaskStateManager(partition_file(platform, date))
+        if not state.table:
+            continue
+        expired = state.expire_open()
+        state.close()
+        _set_index_entry(platform, date, state.table)
+        if expired:
+            videos.mark_reserved(platform, [t['video_id'] for t in expired], None)
+            print(f"  >> {platform}/{date}: {len(expired)} 个未执行的任务已过期，视频放回待排期队列")
+            total += len(expired)
+    return total
+
+
+def all_dates(platform):
+    """所有有任务表的日期（升序）"""
+    return sorted(load_index(platform))
+
+
+def booked_video_ids(platform):
+    """
+    仍有未完成任务的日期中已分配的视频
+    :return: {视频ID: 日期}
+    """
+    booked = {}
+    for date in open_dates(platform, include_past=True):
+        table = load_partition(platform, date)
+        if table:
+            booked.update((t['video_id'], date) for t in table.get('tasks', [])
+                          if t.get('status') not in task_state.CLOSED_STATUSES)
+    return booked
+
+
+def ensure_reservations(platform):
+    """
+    给升级前已排进任务表的视频补上占用标记（每个平台只做一次）
+    之后视频的占用在生成任务时写入，不再需要扫描任务表
+    """
+    with _lock:
+        if _read_index(platform).get('reservations_synced'):
+            return
+        by_date = {}
+        for video_id, date in booked_video_ids(platform).items():
+            by_date.setdefault(date, []).append(video_id)
+        for date, video_ids in by_date.items():
+            videos.mark_reserved(platform, video_ids, date)
+        _save_index(platform, reservations_synced=True)
+
+
+class PartitionedState:
+    """
+    多个日期分区的任务状态，接口与 TaskStateManager 相同，按任务ID转发到所属分区
+    用法:
+        state = PartitionedState('douyin', task_store.open_dates('douyin'))
+        state.recover_expired()
+        with state.lease(task_id, 'processing') as claimed:
+            if claimed is None:
+                continue    # 已被其他进程领取
+            ...
+        state.release(task_id, 'completed')
+        state.close()
+    """
+
+    def __init__(self, platform, dates):
+        _migrate_legacy(platform)
+        self.platform = platform
+        self.states = {}
+        self._owners = {}
+        for date in sorted(dates):
+            state = task_state.TaskStateManager(partition_file(platform, date))
+            if not state.table:
+                continue
+            self.states[date] = state
+            for task in state.tasks:
+                self._owners[task['task_id']] = state
+
+    @property
+    def dates(self):
+        """已加载的日期"""
+        return list(self.states)
+
+    @property
+    def tasks(self):
+        """所有分区的任务（按日期、分区内原有顺序）"""
+        return [t for state in self.states.values() for t in state.tasks]
+
+    @property
+    def accounts(self):
+        """各分区任务表中的账号（按账号ID去重）"""
+        merged = {}
+        for state in self.states.values():
+            for account in state.table.get('accounts', []):
+                merged.setdefault(account['account_id'], account)
+        return list(merged.values())
+
+    def get(self, task_id):
+        state = self._owners.get(task_id)
+        return state.get(task_id) if state else None
+
+    def update(self, task_id, **fields):
+        state = self._owners.get(task_id)
+        return state.update(task_id, **fields) if state else None
+
+    def claim(self, task_id, status, **fields):
+        state = self._owners.get(task_id)
+        return state.claim(task_id, status, **fields) if state else None
+
+    def release(self, task_id, status, **fields):
+        state = self._owners.get(task_id)
+        return state.release(task_id, status, **fields) if state else None
+
+    def recover_expired(self):
+        recovered = []
+        for state in self.states.values():
+            recovered.extend(state.recover_expired())
+        return recovered
+
+    @contextmanager
+    def lease(self, task_id, status, **fields):
+        with self._owners[task_id].lease(task_id, status, **fields) as claimed:
+            yield claimed
+
+    def close(self):
+        """合并各分区日志并更新日期索引"""
+        for date, state in self.states.items():
+            state.close()
+            _set_index_entry(self.platform, date, state.table)
@@ -2,79 +2,312 @@
 # -*- coding: utf-8 -*-
 """
 任务生成模块
-为抖音和视频号生成发布任务
+为抖音和视频号生成发布任务：单日生成，或一次排期多天（plan_tasks）。
+每天的发布时间由排期规则决定（开始时间、分钟级间隔、当天结束时间、禁发时段），
+排不下的视频留给后面的日期，不会回绕到当天凌晨
 """
 
 import os
-import json
-from datetime import datetime
+from datetime import datetime, timedelta
 
 import config
+import file_cache
+import task_state
+import task_store
 import videos
 from accounts.douyin_manager import DouyinAccountManager
 
 
 def load_douyin_config():
-    """加载抖音发布配置"""
-    if not os.path.exists(config.DOUYIN_CONFIG_FILE):
-        return dict(config.DOUYIN_DEFAULT_CONFIG)
-
-    with open(config.DOUYIN_CONFIG_FILE, 'r', encoding='utf-8') as f:
-        content = f.read().strip()
-        if not content:
-            return dict(config.DOUYIN_DEFAULT_CONFIG)
-        return json.loads(content)
+    """加载抖音发布配置（缺少的项使用默认值）"""
+    cfg = dict(config.DOUYIN_DEFAULT_CONFIG)
+    cfg.update(file_cache.load_json(config.DOUYIN_CONFIG_FILE) or {})
+    return cfg
 
 
 def save_douyin_config(cfg):
     """保存抖音发布配置"""
     os.makedirs(os.path.dirname(config.DOUYIN_CONFIG_FILE), exist_ok=True)
-    with open(config.DOUYIN_CONFIG_FILE, 'w', encoding='utf-8') as f:
-        json.dump(cfg, f, ensure_ascii=False, indent=2)
+    file_cache.save_json(config.DOUYIN_CONFIG_FILE, cfg)
+
+
+# ==================== 排期规则 ====================
+
+def _parse_hhmm(text):
+    """'08:30' -> 510（当天第几分钟）"""
+    hour, _, minute = str(text).partition(':')
+    return int(hour) * 60 + int(minute or 0)
+
+
+def _in_blackout(minute, blackouts):
+    for start, end in blackouts:
+        if start <= end:
+            if start <= minute < end:
+                return True
+        elif minute >= start or minute < end:   # 跨零点的时段，如 23:00-06:00
+            return True
+    return False
+
+
+def slot_rule(platform, cfg=None):
+    """
+    平台的排期规则
+    :param cfg: 抖音发布配置，默认读取 douyin_config.json
+    :return: {'minutes': 当天可用的发布时间（第几分钟）, 'cap': 每账号每天上限, 'account_caps': {账号ID: 上限}}
+    """
+    if platform == 'douyin':
+        cfg = cfg or load_douyin_config()
+        start = cfg['start_hour'] * 60 + cfg.get('start_minute', 0)
+        interval = cfg.get('interval_minutes') or cfg['interval_hours'] * 60
+        end = _parse_hhmm(cfg.get('end_time') or '23:59')
+        blackouts = cfg.get('blackouts') or []
+        cap = cfg['videos_per_account']
+        account_caps = cfg.get('account_caps') or {}
+    else:
+        start = config.WECHAT_START_HOUR * 60 + config.WECHAT_START_MINUTE
+        interval = config.WECHAT_INTERVAL_MINUTES or config.WECHAT_INTERVAL_HOURS * 60
+        end = _parse_hhmm(config.WECHAT_END_TIME)
+        blackouts = config.WECHAT_BLACKOUTS
+        cap = config.WECHAT_PUBLISH_COUNT
+        account_caps = {}
+
+    if interval <= 0:
+        raise Exception("发布时间间隔必须大于 0")
+    windows = [(_parse_hhmm(a), _parse_hhmm(b)) for a, b in blackouts]
+    minutes = [m for m in range(start, min(end, 24 * 60 - 1) + 1, int(interval))
+               if not _in_blackout(m, windows)]
+    return {'minutes': minutes, 'cap': cap,
+            'account_caps': {str(k): v for k, v in account_caps.items()}}
+
+
+def generate_time_slots(target_date, count, rule):
+    """
+    当天前 count 个发布时间
+    :return: ['YYYY-MM-DD HH:MM:00', ...]，当天可用时间不足 count 个时只返回可用的
+    """
+    return [f"{target_date} {m // 60:02d}:{m % 60:02d}:00" for m in rule['minutes'][:count]]
+
+
+def _account_cap(rule, account):
+    if account is None:
+        return rule['cap']
+    return rule['account_caps'].get(str(account['account_id']), rule['cap'])
+
+
+# ==================== 任务分配 ====================
+
+def _queued_count(platform):
+    """待排期视频数（未发布且没有排进任何任务表）"""
+    task_store.ensure_reservations(platform)
+    return videos.queue_size(platform)
+
+
+def _save_tasks(platform, target_date, tasks, table=None):
+    """
+    保存新任务：传入 table 时整表写入，否则追加到已有任务表
+    保存失败时释放这些任务占用的视频
+    """
+    try:
+        if table is not None:
+            task_store.save_partition(platform, target_date, table)
+        else:
+            task_store.append_tasks(platform, target_date, tasks)
+    except Exception:
+        videos.mark_reserved(platform, [t['video_id'] for t in tasks], None)
+        raise
+
+
+def _started_tasks(table):
+    """已完成或正在执行（租约有效）的任务，重新生成任务表时不能覆盖"""
+    return [t for t in (table or {}).get('tasks', [])
+            if t.get('status') in task_state.DONE_STATUSES
+            or (t.get('status') in task_state.RUNNING_STATUSES and not task_state.lease_expired(t))]
 
 
-def generate_time_slots(target_date, count, start_hour, interval_hours):
+def _releasable_videos(table):
+    """重新生成任务表时可以放回待排期队列的视频（未执行的任务占用的）"""
+    return [t['video_id'] for t in (table or {}).get('tasks', [])
+            if t.get('status') not in task_state.CLOSED_STATUSES]
+
+
+def _check_regenerate(platform, target_date):
+    """
+    检查能否整体重新生成某日期的任务表
+    :return: 重新生成时要释放的视频ID列表；不能重新生成时返回 None
     """
-    生成时间序列
-    :return: ['YYYY-MM-DD HH:00:00', ...]
+    old_table = task_store.load_partition(platform, target_date)
+    if _started_tasks(old_table):
+        print("\n  !! 该日期已有已完成或正在执行的任务，不能重新生成；"
+              "可以选择把新添加的视频排入剩余时间")
+        return None
+    return _releasable_videos(old_table)
+
+
+def _new_task(platform, target_date, number, account, video_item, scheduled_time):
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    task = {"task_id": f"task_{platform}_{target_date.replace('-', '')}_{number:03d}"}
+    if account is not None:
+        task.update({"account_id": account['account_id'], "account_name": account['account_name']})
+    task.update({
+        "video_id": video_item['id'],
+        "video_title": video_item['title'],
+        "scheduled_time": scheduled_time,
+        "status": "pending",
+        "created_at": now,
+    })
+    if account is not None:
+        task["last_updated"] = now
+    return task
+
+
+def _open_slots(target_date, rule, after=None):
+    """
+    该日期可用的发布时间
+    :param after: 'YYYY-MM-DD HH:MM:SS'，只返回晚于该时间的；今天默认为当前时间
     """
-    slots = []
-    hour = start_hour
-    for _ in range(count):
-        slots.append(f"{target_date} {hour:02d}:00:00")
-        hour += interval_hours
-        if hour >= 24:
-            hour = hour % 24
-    return slots
+    if after is None and target_date == datetime.now().strftime('%Y-%m-%d'):
+        after = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    slots = generate_time_slots(target_date, len(rule['minutes']), rule)
+    return [s for s in slots if after is None or s > after]
 
 
-def generate_douyin_tasks(target_date=None):
+def _assign_day(platform, target_date, accounts, rule, existing=(), after=None):
+    """
+    为一天分配任务：按发布时间依次给每个账号分一个视频，直到账号达到上限或视频用完
+    视频从待排期队列取出并标记为被该日期占用，调用方负责用 _save_tasks 保存
+    :param accounts: 账号列表（视频号为 [None]）
+    :param existing: 该日期已有的任务（增量生成），它们占用的时间和账号额度不再分配
+    :param after: 'YYYY-MM-DD HH:MM:SS'，只使用晚于该时间的发布时间；今天默认为当前时间
+    """
+    slots = generate_time_slots(target_date, len(rule['minutes']), rule)
+    open_slots = _open_slots(target_date, rule, after)
+    free, quota = [], []
+    for account in accounts:
+        account_id = account['account_id'] if account else None
+        used = {t['scheduled_time'] for t in existing if t.get('account_id') == account_id}
+        free.append([s for s in open_slots if s not in used])
+        quota.append(max(0, min(_account_cap(rule, account), len(slots)) - len(used)))
+
+    # 先确定全部 (账号, 时间)，再一次从队列取出同样数量的视频
+    placements = []
+    for i in range(max(quota, default=0)):
+        for account, account_slots, account_quota in zip(accounts, free, quota):
+            if i < account_quota and i < len(account_slots):
+                placements.append((account, account_slots[i]))
+    if not placements:
+        return []
+
+    picked = videos.reserve_videos(platform, len(placements), target_date)
+    number = max((_task_number(t['task_id']) for t in existing), default=0) + 1
+    return [_new_task(platform, target_date, number + i, account, video_item, scheduled_time)
+            for i, ((account, scheduled_time), video_item) in enumerate(zip(placements, picked))]
+
+
+def _task_number(task_id):
+    """'task_douyin_20240101_007' -> 7"""
+    tail = task_id.rsplit('_', 1)[-1]
+    return int(tail) if tail.isdigit() else 0
+
+
+def _fill_existing(platform, target_date, table, rule):
+    """
+    增量生成：把视频排进已有任务表的剩余时间（已完成和执行中的任务不动，只追加新任务）
+    今天的任务表只使用还没到的时间
+    :return: 新增的任务列表
+    """
+    accounts = table.get('accounts', []) if platform == 'douyin' else [None]
+    tasks = _assign_day(platform, target_date, accounts, rule, existing=table.get('tasks', []))
+    if tasks:
+        _save_tasks(platform, target_date, tasks)
+    return tasks
+
+
+def _build_table(platform, target_date, accounts, tasks):
+    table = {
+        "generated_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "target_date": target_date,
+        "platform": platform,
+    }
+    if platform == 'douyin':
+        table["accounts"] = accounts
+        table["tasks"] = tasks
+        table["summary"] = {"total_accounts": len(accounts), "total_tasks": len(tasks)}
+    else:
+        table["tasks"] = tasks
+        table["summary"] = {"total_tasks": len(tasks)}
+    return table
+
+
+def _platform_accounts(platform):
+    """抖音返回账号列表；视频号只有一个账号，返回 [None]"""
+    if platform == 'douyin':
+        return DouyinAccountManager().detect_accounts()
+    return [None]
+
+
+# ==================== 单日生成 ====================
+
+def _generate_incremental(platform, target_date, table):
+    """把新视频追加到已有任务表的剩余时间"""
+    name = '抖音' if platform == 'douyin' else '视频号'
+    print(f"\n{'='*60}")
+    print(f"  增量生成{name}发布任务: {target_date}")
+    print(f"{'='*60}")
+
+    rule = slot_rule(platform, load_douyin_config() if platform == 'douyin' else None)
+    available = _queued_count(platform)
+    print(f"\n  已有任务: {len(table.get('tasks', []))} 条")
+    print(f"  待排期视频: {available} 个")
+
+    tasks = _fill_existing(platform, target_date, table, rule) if available else []
+    if tasks:
+        print(f"\n  >> 新增 {len(tasks)} 个任务")
+        for t in tasks[:5]:
+            print(f"     {t.get('account_name', name)} | {t['scheduled_time']} | {t['video_title']}")
+        if len(tasks) > 5:
+            print(f"     ... 还有 {len(tasks) - 5} 条")
+    else:
+        print("\n  没有可排入的视频或剩余时间")
+    return task_store.load_partition(platform, target_date)
+
+
+def generate_douyin_tasks(target_date=None, incremental=False):
     """
     生成抖音发布任务
     :param target_date: 'YYYY-MM-DD'，默认今天
+    :param incremental: 该日期已有任务表时，只把未排期的视频追加到剩余时间
     :return: 任务表字典
     """
     if target_date is None:
         target_date = datetime.now().strftime('%Y-%m-%d')
 
+    if incremental:
+        existing = task_store.load_partition('douyin', target_date)
+        if existing:
+            return _generate_incremental('douyin', target_date, existing)
+
     print(f"\n{'='*60}")
     print("  生成抖音发布任务")
     print(f"{'='*60}")
 
+    # 重新生成已有日期时，旧任务表占用的视频会先放回队列
+    released = _check_regenerate('douyin', target_date)
+    if released is None:
+        return None
+
     # 1. 加载配置
     cfg = load_douyin_config()
-    videos_per_account = cfg['videos_per_account']
-    start_hour = cfg['start_hour']
-    interval_hours = cfg['interval_hours']
+    rule = slot_rule('douyin', cfg)
 
     print(f"\n  配置:")
-    print(f"    每账号视频数: {videos_per_account}")
-    print(f"    开始时间: {start_hour}:00")
-    print(f"    间隔: {interval_hours}小时")
+    print(f"    每账号视频数: {cfg['videos_per_account']}")
+    print(f"    开始时间: {cfg['start_hour']:02d}:{cfg.get('start_minute', 0):02d}")
+    print(f"    间隔: {cfg.get('interval_minutes') or cfg['interval_hours'] * 60}分钟")
+    if len(rule['minutes']) < cfg['videos_per_account']:
+        print(f"    !! 当天只有 {len(rule['minutes'])} 个可用时间，每账号最多排 {len(rule['minutes'])} 条")
 
     # 2. 加载账号
-    manager = DouyinAccountManager()
-    accounts = manager.detect_accounts()
+    accounts = _platform_accounts('douyin')
     if not accounts:
         print("\n  !! 未找到任何抖音账号，请先添加")
         return None
@@ -83,72 +316,33 @@ def generate_douyin_tasks(target_date=None):
     for acc in accounts:
         print(f"    - {acc['account_name']} (ID: {acc['account_id']})")
 
-    # 3. 获取未发布的视频
-    unpublished = videos.get_unpublished('douyin')
-    total_needed = len(accounts) * videos_per_account
+    # 3. 待排期的视频（未发布且没有排进任务表，加上旧任务表要释放的）
+    available = _queued_count('douyin') + len(released)
+    total_needed = sum(min(_account_cap(rule, acc), len(rule['minutes'])) for acc in accounts)
 
-    print(f"\n  可用视频: {len(unpublished)} 个")
+    print(f"\n  可用视频: {available} 个")
     print(f"  需要视频: {total_needed} 个")
 
-    if len(unpublished) < total_needed:
-        if len(unpublished) == 0:
-            print("\n  !! 没有可用的视频，请先添加视频")
-            return None
-        print(f"\n  !! 视频不足，将按可用数量分配")
-        videos_per_account = len(unpublished) // len(accounts)
-        if videos_per_account == 0:
-            videos_per_account = 1
-        total_needed = min(len(unpublished), len(accounts) * videos_per_account)
-
-    # 4. 生成任务
-    tasks = []
-    task_counter = 1
-    video_offset = 0
-
-    for account in accounts:
-        count = min(videos_per_account, len(unpublished) - video_offset)
-        if count <= 0:
-            break
+    if available == 0:
+        print("\n  !! 没有可用的视频，请先添加视频")
+        return None
+    if available < total_needed:
+        print(f"\n  !! 视频不足，将按可用数量轮流分配给各账号")
 
-        account_videos = unpublished[video_offset:video_offset + count]
-        video_offset += count
-
-        time_slots = generate_time_slots(target_date, count, start_hour, interval_hours)
-
-        for video_item, scheduled_time in zip(account_videos, time_slots):
-            tasks.append({
-                "task_id": f"task_douyin_{target_date.replace('-', '')}_{task_counter:03d}",
-                "account_id": account['account_id'],
-                "account_name": account['account_name'],
-                "video_id": video_item['id'],
-                "video_title": video_item['title'],
-                "scheduled_time": scheduled_time,
-                "status": "pending",
-                "created_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                "last_updated": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            })
-            task_counter += 1
-
-    # 5. 保存任务表
-    task_table = {
-        "generated_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-        "target_date": target_date,
-        "platform": "douyin",
-        "accounts": accounts,
-        "tasks": tasks,
-        "summary": {
-            "total_accounts": len(accounts),
-            "total_tasks": len(tasks)
-        }
-    }
+    if not _open_slots(target_date, rule):
+        print("\n  !! 该日期已没有晚于当前时间的发布时间")
+        return None
 
-    os.makedirs(os.path.dirname(config.DOUYIN_TASKS_FILE), exist_ok=True)
-    with open(config.DOUYIN_TASKS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(task_table, f, ensure_ascii=False, indent=2)
+    # 4. 生成并保存任务表（重新生成时先释放旧任务表占用的视频）
+    if released:
+        videos.mark_reserved('douyin', released, None)
+    tasks = _assign_day('douyin', target_date, accounts, rule)
+    task_table = _build_table('douyin', target_date, accounts, tasks)
+    _save_tasks('douyin', target_date, tasks, task_table)
 
     print(f"\n  >> 任务生成完成!")
     print(f"     总计: {len(tasks)} 个任务")
-    print(f"     保存至: {config.DOUYIN_TASKS_FILE}")
+    print(f"     保存至: {task_store.partition_file('douyin', target_date)}")
 
     # 显示预览
     for t in tasks[:5]:
@@ -159,62 +353,51 @@ def generate_douyin_tasks(target_date=None):
     return task_table
 
 
-def generate_wechat_tasks(target_date=None):
+def generate_wechat_tasks(target_date=None, incremental=False):
     """
     生成视频号发布任务
     :param target_date: 'YYYY-MM-DD'，默认今天
+    :param incremental: 该日期已有任务表时，只把未排期的视频追加到剩余时间
     :return: 任务表字典
     """
     if target_date is None:
         target_date = datetime.now().strftime('%Y-%m-%d')
 
+    if incremental:
+        existing = task_store.load_partition('wechat', target_date)
+        if existing:
+            return _generate_incremental('wechat', target_date, existing)
+
     print(f"\n{'='*60}")
     print("  生成视频号发布任务")
     print(f"{'='*60}")
 
-    publish_count = config.WECHAT_PUBLISH_COUNT
-    start_hour = config.WECHAT_START_HOUR
-    interval_hours = config.WECHAT_INTERVAL_HOURS
+    # 重新生成已有日期时，旧任务表占用的视频会先放回队列
+    released = _check_regenerate('wechat', target_date)
+    if released is None:
+        return None
 
-    # 获取未发布的视频
-    unpublished = videos.get_unpublished('wechat')
+    rule = slot_rule('wechat')
 
-    print(f"\n  可用视频: {len(unpublished)} 个")
-    print(f"  计划发布: {publish_count} 个")
+    # 待排期的视频（未发布且没有排进任务表，加上旧任务表要释放的）
+    available = _queued_count('wechat') + len(released)
 
-    if not unpublished:
+    print(f"\n  可用视频: {available} 个")
+    print(f"  计划发布: {min(rule['cap'], len(rule['minutes']))} 个")
+
+    if not available:
         print("\n  !! 没有可用的视频，请先添加视频")
         return None
 
-    actual_count = min(publish_count, len(unpublished))
-    selected = unpublished[:actual_count]
-
-    time_slots = generate_time_slots(target_date, actual_count, start_hour, interval_hours)
-
-    tasks = []
-    for idx, (video_item, scheduled_time) in enumerate(zip(selected, time_slots), 1):
-        tasks.append({
-            "task_id": f"task_wechat_{target_date.replace('-', '')}_{idx:03d}",
-            "video_id": video_item['id'],
-            "video_title": video_item['title'],
-            "scheduled_time": scheduled_time,
-            "status": "pending",
-            "created_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        })
-
-    task_table = {
-        "generated_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-        "target_date": target_date,
-        "platform": "wechat",
-        "tasks": tasks,
-        "summary": {
-            "total_tasks": len(tasks)
-        }
-    }
+    if not _open_slots(target_date, rule):
+        print("\n  !! 该日期已没有晚于当前时间的发布时间")
+        return None
 
-    os.makedirs(os.path.dirname(config.WECHAT_TASKS_FILE), exist_ok=True)
-    with open(config.WECHAT_TASKS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(task_table, f, ensure_ascii=False, indent=2)
+    if released:
+        videos.mark_reserved('wechat', released, None)
+    tasks = _assign_day('wechat', target_date, [None], rule)
+    task_table = _build_table('wechat', target_date, [None], tasks)
+    _save_tasks('wechat', target_date, tasks, task_table)
 
     print(f"\n  >> 任务生成完成!")
     print(f"     总计: {len(tasks)} 个任务")
@@ -227,6 +410,67 @@ def generate_wechat_tasks(target_date=None):
     return task_table
 
 
+# ==================== 多日排期 ====================
+
+def plan_tasks(start_date=None, days=None, platforms=task_store.PLATFORMS, incremental=False):
+    """
+    一次生成多天的任务（所有账号、两个平台）
+    已有任务表的日期跳过；视频按日期先后从待排期队列取出，总耗时与生成的任务数成正比
+    :param start_date: 'YYYY-MM-DD'，默认今天
+    :param days: 排期天数，默认 config.PLAN_HORIZON_DAYS
+    :param incremental: 已有任务表的日期也把视频追加到剩余时间
+    :return: {平台: {日期: 任务数}}
+    """
+    start = datetime.strptime(start_date, '%Y-%m-%d') if start_date else datetime.now()
+    days = days or config.PLAN_HORIZON_DAYS
+    dates = [(start + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(days)]
+
+    print(f"\n{'='*60}")
+    print(f"  多日排期: {dates[0]} ~ {dates[-1]}")
+    print(f"{'='*60}")
+
+    result = {}
+    for platform in platforms:
+        name = '抖音' if platform == 'douyin' else '视频号'
+        result[platform] = {}
+
+        accounts = _platform_accounts(platform)
+        if not accounts:
+            print(f"\n  [{name}] !! 未找到任何账号，跳过")
+            continue
+        rule = slot_rule(platform)
+        task_store.expire_past(platform)
+        available = _queued_count(platform)
+        existing = set(task_store.all_dates(platform))
+        print(f"\n  [{name}] 账号 {len(accounts)} 个, 每天 {len(rule['minutes'])} 个发布时间, "
+              f"可用视频 {available} 个")
+
+        for date in dates:
+            if date in existing:
+                if not incremental:
+                    print(f"    {date}: 已有任务表，跳过")
+                    continue
+                table = task_store.load_partition(platform, date)
+                tasks = _fill_existing(platform, date, table, rule)
+                result[platform][date] = len(tasks)
+                print(f"    {date}: 已有任务表，追加 {len(tasks)} 条")
+                continue
+            tasks = _assign_day(platform, date, accounts, rule)
+            if not tasks:
+                if _queued_count(platform):
+                    print(f"    {date}: 已没有晚于当前时间的发布时间，跳过")
+                    continue
+                print(f"    {date}: 视频已分配完")
+                break
+            _save_tasks(platform, date, tasks, _build_table(platform, date, accounts, tasks))
+            result[platform][date] = len(tasks)
+            print(f"    {date}: {len(tasks)} 条")
+
+    total = sum(n for per_date in result.values() for n in per_date.values())
+    print(f"\n  >> 排期完成, 共 {total} 条任务")
+    return result
+
+
 def manage_douyin_config():
     """管理抖音发布配置"""
     cfg = load_douyin_config()
@@ -238,8 +482,12 @@ def manage_douyin_config():
     while True:
         print(f"\n  当前配置:")
         print(f"    每账号视频数: {cfg.get('videos_per_account', 7)}")
-        print(f"    开始时间: {cfg.get('start_hour', 8):02d}:00")
-        print(f"    时间间隔: {cfg.get('interval_hours', 2)} 小时")
+        print(f"    开始时间: {cfg['start_hour']:02d}:{cfg.get('start_minute', 0):02d}")
+        if cfg.get('interval_minutes'):
+            print(f"    时间间隔: {cfg['interval_minutes']} 分钟")
+        else:
+            print(f"    时间间隔: {cfg['interval_hours']} 小时")
+        print(f"    结束时间: {cfg.get('end_time') or '23:59'}")
 
         print(f"\n  1. 修改配置")
         print(f"  2. 恢复默认")
@@ -257,19 +505,31 @@ def manage_douyin_config():
                 except ValueError:
                     print("    !! 无效输入")
 
-            val = input(f"    开始时间 (0-23) [{cfg.get('start_hour', 8)}]: ").strip()
+            val = input(f"    开始时间 (0-23 或 HH:MM) [{cfg.get('start_hour', 8)}]: ").strip()
+            if val:
+                try:
+                    minute = _parse_hhmm(val)
+                    if 0 <= minute < 24 * 60:
+                        cfg['start_hour'], cfg['start_minute'] = divmod(minute, 60)
+                except ValueError:
+                    print("    !! 无效输入")
+
+            val = input(f"    时间间隔 (小时，或如 90m 表示分钟) [{cfg.get('interval_hours', 2)}]: ").strip()
             if val:
                 try:
-                    h = int(val)
-                    if 0 <= h <= 23:
-                        cfg['start_hour'] = h
+                    if val.lower().endswith('m'):
+                        cfg['interval_minutes'] = int(val[:-1])
+                    else:
+                        cfg['interval_hours'] = int(val)
+                        cfg.pop('interval_minutes', None)
                 except ValueError:
                     print("    !! 无效输入")
 
-            val = input(f"    时间间隔 (小时) [{cfg.get('interval_hours', 2)}]: ").strip()
+            val = input(f"    结束时间 (HH:MM) [{cfg.get('end_time') or '23:59'}]: ").strip()
             if val:
                 try:
-                    cfg['interval_hours'] = int(val)
+                    _parse_hhmm(val)
+                    cfg['end_time'] = val
                 except ValueError:
                     print("    !! 无效输入")
 
@@ -0,0 +1,624 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+视频库存储后端
+videos.py 通过这里读写视频数据，支持两种后端：
+  - json:   data/videos.json + 变更日志（默认）
+  - sqlite: data/videos.db（带索引，适合大视频库）
+两种后端都维护各平台的待排期队列（未发布且未被任务表占用的视频），
+生成任务时从队首取出并写入占用标记（scheduled_<平台>），同一视频不会被排进两个任务表
+"""
+
+import os
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import config
+import file_cache
+
+# 平台 -> (发布标记字段, 发布时间字段)
+PLATFORM_FIELDS = {
+    'douyin': ('published_douyin', 'publish_time_douyin'),
+    'wechat': ('published_wechat', 'publish_time_wechat'),
+}
+
+
+# 平台 -> 排期占用字段（值为占用该视频的任务表日期）
+SCHEDULE_FIELDS = {
+    'douyin': 'scheduled_douyin',
+    'wechat': 'scheduled_wechat',
+}
+
+
+def platform_fields(platform):
+    """获取平台对应的发布标记字段和发布时间字段"""
+    return PLATFORM_FIELDS['douyin' if platform == 'douyin' else 'wechat']
+
+
+def schedule_field(platform):
+    """获取平台对应的排期占用字段"""
+    return SCHEDULE_FIELDS['douyin' if platform == 'douyin' else 'wechat']
+
+
+def is_queued(video, platform):
+    """视频是否在平台的待排期队列中（未发布且未被占用）"""
+    return not video.get(platform_fields(platform)[0]) and not video.get(schedule_field(platform))
+
+
+def parse_video_num(video_id):
+    """'v012' -> 12，无法解析返回 None"""
+    try:
+        return int(str(video_id).lstrip('v'))
+    except ValueError:
+        return None
+
+
+def format_video_id(num):
+    """12 -> 'v012'"""
+    return f"v{num:03d}"
+
+
+class _CatalogState:
+    """JSON 后端回放后的内存视频表"""
+
+    def __init__(self, videos):
+        self.videos = videos         # id -> video，保持插入顺序
+        self.journal_count = 0       # 日志中尚未合并的记录数
+        self.max_num = 0             # 已有视频的最大编号
+        self.queues = {}             # 平台 -> 待排期视频ID（按视频表顺序）
+        self.positions = {}          # id -> 在视频表中的顺序
+        self._unordered = set()      # 有视频插回、需要重新排序的队列
+
+    def build_queues(self):
+        self.positions = {vid: i for i, vid in enumerate(self.videos)}
+        self.queues = {
+            platform: OrderedDict((vid, None) for vid, v in self.videos.items()
+                                  if is_queued(v, platform))
+            for platform in PLATFORM_FIELDS
+        }
+        self._unordered.clear()
+
+    def requeue(self, video_id):
+        """视频变化后更新各平台队列"""
+        video = self.videos.get(video_id)
+        position = self.positions.setdefault(video_id, len(self.positions))
+        for platform, queue in self.queues.items():
+            if video is not None and is_queued(video, platform):
+                if video_id in queue:
+                    continue
+                # 释放的视频回到原来的位置（与 SQLite 后端按 seq 排序一致），取用前再排序
+                if queue and self.positions[next(reversed(queue))] > position:
+                    self._unordered.add(platform)
+                queue[video_id] = None
+            else:
+                queue.pop(video_id, None)
+
+    def queue(self, platform):
+        """平台的待排期队列（按视频表顺序）"""
+        if platform in self._unordered:
+            self.queues[platform] = OrderedDict(
+                sorted(self.queues[platform].items(), key=lambda item: self.positions[item[0]])
+            )
+            self._unordered.discard(platform)
+        return self.queues[platform]
+
+
+class JsonVideoStore:
+    """
+    JSON 文件后端
+    videos.json 为快照，增删改以 JSONL 变更记录追加到日志文件，
+    加载时回放“快照 + 日志”；日志条数达到阈值后合并回快照
+    """
+
+    def __init__(self, videos_file=None, journal_file=None, counter_file=None):
+        self.videos_file = videos_file or config.VIDEOS_FILE
+        base = os.path.splitext(self.videos_file)[0]
+        if videos_file is None:
+            self.journal_file = journal_file or config.VIDEOS_JOURNAL_FILE
+            self.counter_file = counter_file or config.VIDEO_ID_COUNTER_FILE
+        else:
+            self.journal_file = journal_file or base + '.journal.jsonl'
+            self.counter_file = counter_file or base + '.counter.json'
+        self.compact_threshold = config.VIDEOS_JOURNAL_COMPACT_THRESHOLD
+        self._lock = threading.RLock()
+        # 快照和日志共同决定视频表内容，作为一个缓存项
+        self._cache_key = (self.videos_file, self.journal_file)
+
+    def _read_snapshot(self):
+        if not os.path.exists(self.videos_file):
+            return []
+        with open(self.videos_file, 'r', encoding='utf-8') as f:
+            content = f.read().strip()
+            if not content:
+                return []
+            return json.loads(content)
+
+    @staticmethod
+    def _apply(videos, record):
+        """回放一条变更记录（可重复回放）"""
+        op = record.get('op')
+        if op == 'add':
+            video = record['video']
+            videos[video['id']] = video
+        elif op == 'update':
+            video = videos.get(record['id'])
+            if video is not None:
+                video.update(record['fields'])
+        elif op == 'remove':
+            videos.pop(record['id'], None)
+
+    def _read_journal(self, videos):
+        """
+        回放日志，返回记录条数
+        崩溃时写了一半的末尾记录会被截掉，保证后续追加从完整行开始
+        """
+        count = 0
+        if not os.path.exists(self.journal_file):
+            return count
+        valid_size = 0
+        with open(self.journal_file, 'rb') as f:
+            for raw in f:
+                if not raw.endswith(b'\n'):
+                    break
+                line = raw.strip()
+                if line:
+                    try:
+                        record = json.loads(line.decode('utf-8'))
+                    except ValueError:
+                        break
+                    self._apply(videos, record)
+                    count += 1
+                valid_size += len(raw)
+        if valid_size < os.path.getsize(self.journal_file):
+            with open(self.journal_file, 'r+b') as f:
+                f.truncate(valid_size)
+        return count
+
+    def _load_state(self):
+        """回放“快照 + 日志”得到视频表"""
+        state = _CatalogState({v['id']: v for v in self._read_snapshot()})
+        state.journal_count = self._read_journal(state.videos)
+        state.max_num = max(
+            (n for n in map(parse_video_num, state.videos) if n is not None), default=0
+        )
+        state.build_queues()
+        return state
+
+    def _file_lock(self):
+        """跨进程锁：读取、追加日志和合并快照互斥，其他进程不会读到合并到一半的文件"""
+        return file_cache.file_lock(self.videos_file)
+
+    def _state(self):
+        """获取视频表（经文件缓存，文件被外部修改过才重新加载）"""
+        with self._file_lock():
+            return file_cache.load(self._cache_key, self._load_state)
+
+    def _append(self, records):
+        """追加变更记录并同步到内存"""
+        with self._file_lock():
+            state = self._state()
+            lines = ''.join(json.dumps(r, ensure_ascii=False) + '\n' for r in records)
+            with open(self.journal_file, 'a', encoding='utf-8') as f:
+                f.write(lines)
+                f.flush()
+                os.fsync(f.fileno())
+            for record in records:
+                self._apply(state.videos, record)
+                state.requeue(record['video']['id'] if record['op'] == 'add' else record['id'])
+                if record['op'] == 'add':
+                    num = parse_video_num(record['video']['id'])
+                    if num is not None and num > state.max_num:
+                        state.max_num = num
+            state.journal_count += len(records)
+            file_cache.update(self._cache_key, state)
+            if state.journal_count >= self.compact_threshold:
+                self.compact()
+
+    def compact(self):
+        """把日志合并回快照并清空日志"""
+        with self._lock, self._file_lock():
+            state = self._state()
+            file_cache.write_json_atomic(self.videos_file, list(state.videos.values()))
+            if os.path.exists(self.journal_file):
+                os.remove(self.journal_file)
+            state.journal_count = 0
+            file_cache.update(self._cache_key, state)
+
+    def load_all(self):
+        """加载全部视频"""
+        with self._lock:
+            return list(self._state().videos.values())
+
+    def save_all(self, videos):
+        """保存全部视频"""
+        with self._lock, self._file_lock():
+            file_cache.write_json_atomic(self.videos_file, videos)
+            if os.path.exists(self.journal_file):
+                os.remove(self.journal_file)
+            file_cache.invalidate(self._cache_key)
+
+    def _read_counter(self):
+        try:
+            with open(self.counter_file, 'r', encoding='utf-8') as f:
+                return json.load(f).get('next_num', 1)
+        except (FileNotFoundError, ValueError):
+            return 1
+
+    def allocate_ids(self, count):
+        """
+        从持久化计数器分配 count 个视频ID
+        计数器只增不减，删除的ID不会被复用；在跨进程锁内读写，多个进程不会分到同一个ID
+        """
+        with self._lock, file_cache.file_lock(self.counter_file):
+            start = max(self._read_counter(), self._state().max_num + 1)
+            file_cache.write_json_atomic(self.counter_file, {'next_num': start + count})
+            return [format_video_id(n) for n in range(start, start + count)]
+
+    def next_id(self):
+        """获取下一个视频ID"""
+        return self.allocate_ids(1)[0]
+
+    def get(self, video_id):
+        """根据ID获取视频"""
+        with self._lock:
+            return self._state().videos.get(video_id)
+
+    def list_unpublished(self, platform):
+        """获取未发布到指定平台的视频"""
+        field, _ = platform_fields(platform)
+        with self._lock:
+            return [v for v in self._state().videos.values() if not v.get(field, False)]
+
+    def queue_size(self, platform):
+        """待排期视频数"""
+        with self._lock:
+            return len(self._state().queue(platform))
+
+    def take_queued(self, platform, count, reservation):
+        """
+        从待排期队列取出前 count 个视频并标记占用
+        :param reservation: 占用标记（任务表日期）
+        :return: 视频列表（可能少于 count）
+        """
+        # 在跨进程锁内按最新的视频表取出，两个进程同时排期不会取到同一批视频
+        with self._lock, self._file_lock():
+            state = self._state()
+            queue = state.queue(platform)
+            ids = [queue.popitem(last=False)[0] for _ in range(min(count, len(queue)))]
+            if ids:
+                self._append([{'op': 'update', 'id': vid,
+                               'fields': {schedule_field(platform): reservation}} for vid in ids])
+            return [self._state().videos[vid] for vid in ids]
+
+    def set_reservation(self, platform, video_ids, reservation):
+        """设置或清除（reservation=None，视频回到待排期队列）指定视频的占用标记"""
+        with self._lock:
+            videos = self._state().videos
+            records = [{'op': 'update', 'id': vid, 'fields': {schedule_field(platform): reservation}}
+                       for vid in video_ids if vid in videos]
+            if records:
+                self._append(records)
+            return len(records)
+
+    def _check_new_ids(self, videos):
+        """ID 已存在时报错（'add' 记录会按ID覆盖原有视频）"""
+        existing = self._state().videos
+        duplicated = [v['id'] for v in videos if v['id'] in existing]
+        if duplicated:
+            raise Exception(f"视频ID已存在: {', '.join(duplicated)}")
+
+    def add(self, video):
+        """添加视频"""
+        self.add_many([video])
+
+    def add_many(self, videos):
+        """批量添加视频，整批一次写入"""
+        if not videos:
+            return
+        with self._lock, self._file_lock():
+            self._check_new_ids(videos)
+            self._append([{'op': 'add', 'video': v} for v in videos])
+
+    def existing_paths(self):
+        """已入库的视频文件路径集合"""
+        with self._lock:
+            return {v.get('video_path') for v in self._state().videos.values()}
+
+    def update(self, video_id, fields):
+        """更新视频字段，返回是否找到"""
+        with self._lock:
+            if video_id not in self._state().videos:
+                return False
+            self._append([{'op': 'update', 'id': video_id, 'fields': fields}])
+            return True
+
+    def remove(self, video_id):
+        """删除视频，返回是否找到"""
+        with self._lock:
+            if video_id not in self._state().videos:
+                return False
+            self._append([{'op': 'remove', 'id': video_id}])
+            return True
+
+
+class SqliteVideoStore:
+    """
+    SQLite 后端
+    id 为主键，各平台发布标记建索引，单条读写不再需要加载整个视频库
+    """
+
+    # 固定列，其余字段存入 extra（JSON）
+    COLUMNS = [
+        'id', 'video_path', 'title', 'description', 'category', 'topics',
+        'published_douyin', 'published_wechat',
+        'publish_time_douyin', 'publish_time_wechat', 'added_at',
+        'scheduled_douyin', 'scheduled_wechat',
+    ]
+    BOOL_COLUMNS = ('published_douyin', 'published_wechat')
+
+    def __init__(self, db_file=None):
+        self.db_file = db_file or config.VIDEOS_DB_FILE
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._init_schema()
+
+    def _init_schema(self):
+        with self._lock, self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS videos (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    id TEXT NOT NULL UNIQUE,
+                    num INTEGER,
+                    video_path TEXT,
+                    title TEXT,
+                    description TEXT,
+                    category TEXT,
+                    topics TEXT,
+                    published_douyin INTEGER NOT NULL DEFAULT 0,
+                    published_wechat INTEGER NOT NULL DEFAULT 0,
+                    publish_time_douyin TEXT,
+                    publish_time_wechat TEXT,
+                    added_at TEXT,
+                    scheduled_douyin TEXT,
+                    scheduled_wechat TEXT,
+                    extra TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_videos_num ON videos(num);
+                CREATE INDEX IF NOT EXISTS idx_videos_douyin ON videos(published_douyin, seq);
+                CREATE INDEX IF NOT EXISTS idx_videos_wechat ON videos(published_wechat, seq);
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                );
+            """)
+            # 旧版数据库没有排期占用列
+            columns = {r[1] for r in self._conn.execute('PRAGMA table_info(videos)')}
+            for field in SCHEDULE_FIELDS.values():
+                if field not in columns:
+                    self._conn.execute(f'ALTER TABLE videos ADD COLUMN {field} TEXT')
+            # 待排期队列：未发布、未占用，按添加顺序
+            self._conn.executescript("""
+                CREATE INDEX IF NOT EXISTS idx_videos_douyin_queue
+                    ON videos(published_douyin, scheduled_douyin, seq);
+                CREATE INDEX IF NOT EXISTS idx_videos_wechat_queue
+                    ON videos(published_wechat, scheduled_wechat, seq);
+            """)
+
+    def _to_row(self, video):
+        """视频字典 -> 行参数"""
+        row = {}
+        for col in self.COLUMNS:
+            value = video.get(col)
+            if col == 'topics':
+                value = json.dumps(value or [], ensure_ascii=False)
+            elif col in self.BOOL_COLUMNS:
+                value = 1 if value else 0
+            row[col] = value
+        row['num'] = parse_video_num(video.get('id', ''))
+        extra = {k: v for k, v in video.items() if k not in self.COLUMNS}
+        row['extra'] = json.dumps(extra, ensure_ascii=False) if extra else None
+        return row
+
+    def _to_video(self, row):
+        """行 -> 视频字典（与 videos.json 中的结构一致）"""
+        video = {}
+        for col in self.COLUMNS:
+            value = row[col]
+            if col == 'topics':
+                value = json.loads(value) if value else []
+            elif col in self.BOOL_COLUMNS:
+                value = bool(value)
+            video[col] = value
+        if row['extra']:
+            video.update(json.loads(row['extra']))
+        return video
+
+    def _insert_many(self, videos, replace=False):
+        """插入视频；replace=False 时ID已存在会报错，不会覆盖原有视频"""
+        cols = self.COLUMNS + ['num', 'extra']
+        sql = (f"INSERT {'OR REPLACE ' if replace else ''}INTO videos ({', '.join(cols)}) "
+               f"VALUES ({', '.join(':' + c for c in cols)})")
+        self._conn.executemany(sql, (self._to_row(v) for v in videos))
+
+    def load_all(self):
+        """加载全部视频"""
+        with self._lock:
+            rows = self._conn.execute('SELECT * FROM videos ORDER BY seq').fetchall()
+        return [self._to_video(r) for r in rows]
+
+    def save_all(self, videos):
+        """整体替换视频列表"""
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM videos')
+            self._insert_many(videos)
+
+    def allocate_ids(self, count):
+        """
+        从持久化计数器分配 count 个视频ID
+        计数器只增不减，删除的ID不会被复用
+        """
+        with self._lock, self._conn:
+            # 先拿写锁再读计数器，多个进程不会分到同一个ID
+            self._conn.execute('BEGIN IMMEDIATE')
+            row = self._conn.execute(
+                "SELECT value FROM meta WHERE key = 'next_num'"
+            ).fetchone()
+            max_num = self._conn.execute('SELECT MAX(num) FROM videos').fetchone()[0] or 0
+            start = max(int(row[0]) if row else 1, max_num + 1)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('next_num', ?)",
+                (str(start + count),)
+            )
+        return [format_video_id(n) for n in range(start, start + count)]
+
+    def next_id(self):
+        """获取下一个视频ID"""
+        return self.allocate_ids(1)[0]
+
+    def get(self, video_id):
+        """根据ID获取视频"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT * FROM videos WHERE id = ?', (video_id,)
+            ).fetchone()
+        return self._to_video(row) if row else None
+
+    def list_unpublished(self, platform):
+        """获取未发布到指定平台的视频（走发布标记索引）"""
+        field, _ = platform_fields(platform)
+        with self._lock:
+            rows = self._conn.execute(
+                f'SELECT * FROM videos WHERE {field} = 0 ORDER BY seq'
+            ).fetchall()
+        return [self._to_video(r) for r in rows]
+
+    def queue_size(self, platform):
+        """待排期视频数"""
+        field, _ = platform_fields(platform)
+        with self._lock:
+            return self._conn.execute(
+                f'SELECT COUNT(*) FROM videos WHERE {field} = 0 AND {schedule_field(platform)} IS NULL'
+            ).fetchone()[0]
+
+    def take_queued(self, platform, count, reservation):
+        """
+        从待排期队列取出前 count 个视频并标记占用（走队列索引）
+        :param reservation: 占用标记（任务表日期）
+        :return: 视频列表（可能少于 count）
+        """
+        field, _ = platform_fields(platform)
+        sched = schedule_field(platform)
+        with self._lock, self._conn:
+            # 先拿写锁再查询，其他进程不能在查询和更新之间取出同一批视频
+            self._conn.execute('BEGIN IMMEDIATE')
+            rows = self._conn.execute(
+                f'SELECT * FROM videos WHERE {field} = 0 AND {sched} IS NULL ORDER BY seq LIMIT ?',
+                (count,)
+            ).fetchall()
+            self._conn.executemany(
+                f'UPDATE videos SET {sched} = ? WHERE id = ?',
+                [(reservation, r['id']) for r in rows]
+            )
+        videos = [self._to_video(r) for r in rows]
+        for video in videos:
+            video[sched] = reservation
+        return videos
+
+    def set_reservation(self, platform, video_ids, reservation):
+        """设置或清除（reservation=None，视频回到待排期队列）指定视频的占用标记"""
+        with self._lock, self._conn:
+            cur = self._conn.executemany(
+                f'UPDATE videos SET {schedule_field(platform)} = ? WHERE id = ?',
+                [(reservation, vid) for vid in video_ids]
+            )
+            return cur.rowcount
+
+    def add(self, video):
+        """添加视频（ID已存在时报错）"""
+        with self._lock, self._conn:
+            self._insert_many([video])
+
+    def add_many(self, videos):
+        """批量添加视频，整批在一个事务中提交"""
+        with self._lock, self._conn:
+            self._insert_many(videos)
+
+    def existing_paths(self):
+        """已入库的视频文件路径集合"""
+        with self._lock:
+            rows = self._conn.execute('SELECT video_path FROM videos').fetchall()
+        return {r[0] for r in rows}
+
+    def update(self, video_id, fields):
+        """更新视频字段，返回是否找到"""
+        with self._lock, self._conn:
+            video = self.get(video_id)
+            if video is None:
+                return False
+            video.update(fields)
+            row = self._to_row(video)
+            assignments = ', '.join(f'{c} = :{c}' for c in row if c != 'id')
+            self._conn.execute(f'UPDATE videos SET {assignments} WHERE id = :id', row)
+            return True
+
+    def remove(self, video_id):
+        """删除视频，返回是否找到"""
+        with self._lock, self._conn:
+            cur = self._conn.execute('DELETE FROM videos WHERE id = ?', (video_id,))
+            return cur.rowcount > 0
+
+    def count(self):
+        """视频总数"""
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM videos').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """获取当前配置的存储后端（进程内单例）"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            if config.VIDEO_STORE_BACKEND == 'sqlite':
+                _store = SqliteVideoStore()
+            else:
+                _store = JsonVideoStore()
+        return _store
+
+
+def migrate_json_to_sqlite(json_file=None, db_file=None):
+    """
+    一次性把 videos.json 导入 SQLite 视频库
+    已存在的同ID视频会被覆盖，原 JSON 文件保持不变；
+    ID 计数器一并迁移，已删除视频的ID不会在 SQLite 中被复用
+    :return: 导入的视频数量
+    """
+    source = JsonVideoStore(json_file)
+    target = SqliteVideoStore(db_file)
+    try:
+        videos = source.load_all()
+        with target._lock, target._conn:
+            target._insert_many(videos, replace=True)
+            row = target._conn.execute(
+                "SELECT value FROM meta WHERE key = 'next_num'"
+            ).fetchone()
+            next_num = max(source._read_counter(), int(row[0]) if row else 1)
+            target._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('next_num', ?)",
+                (str(next_num),)
+            )
+        return len(videos)
+    finally:
+        target.close()
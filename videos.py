@@ -2,46 +2,27 @@
 # -*- coding: utf-8 -*-
 """
 视频管理模块
-负责 videos.json 的增删查改操作
+负责视频库的增删查改操作（存储后端见 video_store.py）
 """
 
 import os
+import csv
 import json
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 import config
+from video_store import get_store, platform_fields
 
 
 def load_videos():
     """加载视频列表"""
-    if not os.path.exists(config.VIDEOS_FILE):
-        return []
-    with open(config.VIDEOS_FILE, 'r', encoding='utf-8') as f:
-        content = f.read().strip()
-        if not content:
-            return []
-        return json.loads(content)
+    return get_store().load_all()
 
 
 def save_videos(videos):
     """保存视频列表"""
-    with open(config.VIDEOS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(videos, f, ensure_ascii=False, indent=2)
-
-
-def get_next_id(videos):
-    """获取下一个视频ID"""
-    if not videos:
-        return "v001"
-    max_num = 0
-    for v in videos:
-        try:
-            num = int(v['id'].lstrip('v'))
-            if num > max_num:
-                max_num = num
-        except (ValueError, KeyError):
-            pass
-    return f"v{max_num + 1:03d}"
+    get_store().save_all(videos)
 
 
 def add_video(video_path, title, description, category="", topics=None):
@@ -54,17 +35,28 @@ def add_video(video_path, title, description, category="", topics=None):
     :param topics: 话题标签列表（可选）
     :return: 新添加的视频信息
     """
-    videos = load_videos()
+    store = get_store()
+
+    video_path = _resolve_path(video_path)
+    if not os.path.exists(video_path):
+        print(f"  !! 警告: 视频文件不存在: {video_path}")
+
+    new_video = _build_video(store.next_id(), video_path, title, description, category, topics)
+    store.add(new_video)
+    return new_video
+
 
-    # 处理视频路径：如果是相对路径，基于项目目录
+def _resolve_path(video_path):
+    """处理视频路径：如果是相对路径，基于项目目录"""
     if not os.path.isabs(video_path):
         video_path = os.path.join(config.BASE_DIR, video_path)
+    return video_path
 
-    if not os.path.exists(video_path):
-        print(f"  !! 警告: 视频文件不存在: {video_path}")
 
-    new_video = {
-        "id": get_next_id(videos),
+def _build_video(video_id, video_path, title, description, category="", topics=None):
+    """构造视频记录"""
+    return {
+        "id": video_id,
         "video_path": video_path,
         "title": title,
         "description": description,
@@ -77,9 +69,105 @@ def add_video(video_path, title, description, category="", topics=None):
         "added_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     }
 
-    videos.append(new_video)
-    save_videos(videos)
-    return new_video
+
+def add_videos_bulk(items, skip_missing=False, skip_existing=True, workers=8):
+    """
+    批量添加视频，整批一次写入
+    :param items: 可迭代对象，元素为字典：
+                  {'video_path', 'title', 'description', 'category', 'topics'}
+    :param skip_missing: 是否跳过文件不存在的视频（否则照常入库并返回在 missing 中）
+    :param skip_existing: 是否跳过已入库的同路径视频
+    :param workers: 并行检查文件的线程数
+    :return: (新添加的视频列表, 文件不存在的路径列表)
+    """
+    store = get_store()
+
+    entries = []
+    seen = store.existing_paths() if skip_existing else set()
+    for item in items:
+        video_path = _resolve_path(str(item['video_path']).strip())
+        if skip_existing:
+            if video_path in seen:
+                continue
+            seen.add(video_path)
+        entries.append((video_path, item))
+
+    # 并行检查文件是否存在（网络盘上逐个 stat 很慢）
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        exists = list(executor.map(os.path.exists, [p for p, _ in entries]))
+
+    missing = [p for (p, _), ok in zip(entries, exists) if not ok]
+    if skip_missing:
+        entries = [e for e, ok in zip(entries, exists) if ok]
+
+    ids = store.allocate_ids(len(entries)) if entries else []
+    new_videos = []
+    for video_id, (video_path, item) in zip(ids, entries):
+        title = (item.get('title') or '').strip() or os.path.splitext(os.path.basename(video_path))[0]
+        topics = item.get('topics') or []
+        if isinstance(topics, str):
+            topics = topics.split()
+        new_videos.append(_build_video(
+            video_id, video_path, title,
+            (item.get('description') or '').strip() or title,
+            item.get('category') or '',
+            topics
+        ))
+
+    store.add_many(new_videos)
+    return new_videos, missing
+
+
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.m4v', '.avi', '.mkv', '.flv', '.webm')
+
+
+def scan_video_dir(directory, category="", topics=None):
+    """
+    扫描目录下的视频文件（含子目录），文件名作为标题
+    :return: add_videos_bulk 可用的条目列表
+    """
+    items = []
+    for root, _, files in os.walk(directory):
+        for name in sorted(files):
+            if name.lower().endswith(VIDEO_EXTENSIONS):
+                items.append({
+                    'video_path': os.path.abspath(os.path.join(root, name)),
+                    'title': os.path.splitext(name)[0],
+                    'category': category,
+                    'topics': list(topics or []),
+                })
+    items.sort(key=lambda x: x['video_path'])
+    return items
+
+
+def read_manifest(manifest_path):
+    """
+    读取视频清单文件
+    CSV: 表头 video_path,title,description,category,topics（话题用空格分隔）
+    JSONL: 每行一个对象，字段同上，topics 可以是列表
+    :return: add_videos_bulk 可用的条目列表
+    """
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+
+    if manifest_path.lower().endswith(('.jsonl', '.ndjson')):
+        items = []
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    items.append(json.loads(line))
+    else:
+        with open(manifest_path, 'r', encoding='utf-8-sig', newline='') as f:
+            items = [row for row in csv.DictReader(f)]
+
+    # 清单中的相对路径相对于清单文件所在目录
+    for item in items:
+        path = str(item.get('video_path') or '').strip()
+        if not path:
+            raise ValueError(f"清单中存在缺少 video_path 的条目: {item}")
+        if not os.path.isabs(path):
+            item['video_path'] = os.path.join(base_dir, path)
+    return items
 
 
 def remove_video(video_id):
@@ -88,24 +176,12 @@ def remove_video(video_id):
     :param video_id: 视频ID
     :return: 是否成功
     """
-    videos = load_videos()
-    original_len = len(videos)
-    videos = [v for v in videos if v['id'] != video_id]
-
-    if len(videos) == original_len:
-        return False
-
-    save_videos(videos)
-    return True
+    return get_store().remove(video_id)
 
 
 def get_video_by_id(video_id):
     """根据ID获取视频"""
-    videos = load_videos()
-    for v in videos:
-        if v['id'] == video_id:
-            return v
-    return None
+    return get_store().get(video_id)
 
 
 def get_unpublished(platform):
@@ -114,9 +190,26 @@ def get_unpublished(platform):
     :param platform: 'douyin' 或 'wechat'
     :return: 视频列表
     """
-    videos = load_videos()
-    field = 'published_douyin' if platform == 'douyin' else 'published_wechat'
-    return [v for v in videos if not v.get(field, False)]
+    return get_store().list_unpublished(platform)
+
+
+def queue_size(platform):
+    """未发布且未排进任务表的视频数"""
+    return get_store().queue_size(platform)
+
+
+def reserve_videos(platform, count, reservation):
+    """
+    从待排期队列取出 count 个视频并标记占用（生成任务时使用）
+    :param reservation: 占用标记（任务表日期）
+    :return: 视频列表（可能少于 count）
+    """
+    return get_store().take_queued(platform, count, reservation)
+
+
+def mark_reserved(platform, video_ids, reservation):
+    """给指定视频设置占用标记（reservation=None 时释放，视频回到待排期队列）"""
+    return get_store().set_reservation(platform, video_ids, reservation)
 
 
 def mark_published(video_id, platform):
@@ -125,17 +218,11 @@ def mark_published(video_id, platform):
     :param video_id: 视频ID
     :param platform: 'douyin' 或 'wechat'
     """
-    videos = load_videos()
-    field = 'published_douyin' if platform == 'douyin' else 'published_wechat'
-    time_field = 'publish_time_douyin' if platform == 'douyin' else 'publish_time_wechat'
-
-    for v in videos:
-        if v['id'] == video_id:
-            v[field] = True
-            v[time_field] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            break
-
-    save_videos(videos)
+    field, time_field = platform_fields(platform)
+    get_store().update(video_id, {
+        field: True,
+        time_field: datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    })
 
 
 def show_videos():